@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
-from typing import Optional, List, Union
+from typing import Optional, Dict, List, Union
 import os
 
 
@@ -17,6 +17,15 @@ class Settings(BaseSettings):
     cookie_secure: bool = Field(default=True, env="COOKIE_SECURE")
     cookie_httponly: bool = Field(default=True, env="COOKIE_HTTPONLY")
     cookie_samesite: str = Field(default="lax", env="COOKIE_SAMESITE")
+
+    # Access token verification: "remote" (Supabase auth API per request) or "local" (in-process JWT check)
+    auth_jwt_verification: str = Field(default="remote", env="AUTH_JWT_VERIFICATION")
+    auth_remote_fallback: bool = Field(default=True, env="AUTH_REMOTE_FALLBACK")
+    auth_jwt_leeway_seconds: int = Field(default=0, env="AUTH_JWT_LEEWAY_SECONDS")
+    supabase_jwt_secret: Optional[str] = Field(default=None, env="SUPABASE_JWT_SECRET")
+    # JWKS endpoint for asymmetric keys; "auto" uses the project's standard endpoint
+    supabase_jwks_url: Optional[str] = Field(default=None, env="SUPABASE_JWKS_URL")
+    supabase_jwt_audience: str = Field(default="authenticated", env="SUPABASE_JWT_AUDIENCE")
     
     # Application Settings
     app_name: str = Field(default="Convot API", env="APP_NAME")
@@ -61,6 +70,35 @@ class Settings(BaseSettings):
     gemini_api_key: Optional[str] = Field(default=None, env="GEMINI_API_KEY")
     # Embedding batching
     embedding_batch_size: int = Field(default=64, env="EMBEDDING_BATCH_SIZE")
+    # Insert chunks together with their embeddings (False: insert, then update embeddings)
+    ingestion_single_write: bool = Field(default=True, env="INGESTION_SINGLE_WRITE")
+    # File sources are streamed: chunks are embedded and stored this many at a time
+    ingestion_stream_batch_chunks: int = Field(default=256, env="INGESTION_STREAM_BATCH_CHUNKS")
+    # Parallel PDF page extraction (0 workers = extract serially in the web process)
+    pdf_parse_workers: int = Field(default=0, env="PDF_PARSE_WORKERS")
+    pdf_parse_pages_per_task: int = Field(default=16, env="PDF_PARSE_PAGES_PER_TASK")
+    pdf_parse_parallel_min_pages: int = Field(default=32, env="PDF_PARSE_PARALLEL_MIN_PAGES")
+    # Durable ingestion queue (ingestion_jobs table) worked by worker.py processes
+    ingestion_worker_concurrency: int = Field(default=2, env="INGESTION_WORKER_CONCURRENCY")
+    ingestion_worker_poll_seconds: float = Field(default=2.0, env="INGESTION_WORKER_POLL_SECONDS")
+    ingestion_job_max_attempts: int = Field(default=3, env="INGESTION_JOB_MAX_ATTEMPTS")
+    ingestion_job_lease_seconds: int = Field(default=600, env="INGESTION_JOB_LEASE_SECONDS")
+    ingestion_retry_base_seconds: float = Field(default=30.0, env="INGESTION_RETRY_BASE_SECONDS")
+    ingestion_retry_max_seconds: float = Field(default=900.0, env="INGESTION_RETRY_MAX_SECONDS")
+    ingestion_invalidation_poll_seconds: float = Field(default=5.0, env="INGESTION_INVALIDATION_POLL_SECONDS")
+    # Ingestion embedding concurrency and per-provider quotas (0 = unlimited)
+    embedding_max_concurrency: int = Field(default=4, env="EMBEDDING_MAX_CONCURRENCY")
+    embedding_rate_limit_retries: int = Field(default=3, env="EMBEDDING_RATE_LIMIT_RETRIES")
+    embedding_openai_rpm: int = Field(default=0, env="EMBEDDING_OPENAI_RPM")
+    embedding_openai_tpm: int = Field(default=0, env="EMBEDDING_OPENAI_TPM")
+    embedding_gemini_rpm: int = Field(default=0, env="EMBEDDING_GEMINI_RPM")
+    embedding_gemini_tpm: int = Field(default=0, env="EMBEDDING_GEMINI_TPM")
+    # Content-addressed embedding cache for ingestion (embedding_cache table)
+    embedding_cache_enabled: bool = Field(default=True, env="EMBEDDING_CACHE_ENABLED")
+    # Query embedding cache (in-process LRU)
+    query_embedding_cache_enabled: bool = Field(default=True, env="QUERY_EMBEDDING_CACHE_ENABLED")
+    query_embedding_cache_ttl_seconds: int = Field(default=3600, env="QUERY_EMBEDDING_CACHE_TTL_SECONDS")
+    query_embedding_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="QUERY_EMBEDDING_CACHE_MAX_BYTES")
 
     # Crawler settings
     crawler_render_js: bool = Field(default=True, env="CRAWLER_RENDER_JS")
@@ -72,6 +110,63 @@ class Settings(BaseSettings):
     llm_preferred: str = Field(default="gemini", env="LLM_PREFERRED")
     openai_chat_model: str = Field(default="gpt-4o-mini", env="OPENAI_CHAT_MODEL")
     gemini_chat_model: str = Field(default="gemini-2.5-flash", env="GEMINI_CHAT_MODEL")
+
+    # Prompt token budget (system prompt, chat history, retrieved context and question)
+    prompt_token_budget: int = Field(default=6000, env="PROMPT_TOKEN_BUDGET")
+    prompt_token_budgets: Union[Dict[str, int], str] = Field(default={}, env="PROMPT_TOKEN_BUDGETS")
+    prompt_history_max_tokens: int = Field(default=1000, env="PROMPT_HISTORY_MAX_TOKENS")
+    prompt_budget_approximate: bool = Field(default=False, env="PROMPT_BUDGET_APPROXIMATE")
+
+    @field_validator("prompt_token_budgets", mode="before")
+    @classmethod
+    def parse_prompt_token_budgets(cls, v: Union[str, Dict[str, int]]) -> Dict[str, int]:
+        # "model=tokens,model=tokens" (a JSON object is decoded before this runs)
+        if isinstance(v, str):
+            budgets = {}
+            for item in v.split(","):
+                model, _, tokens = item.partition("=")
+                if model.strip() and tokens.strip():
+                    budgets[model.strip()] = int(tokens)
+            return budgets
+        return v or {}
+
+    # Shared provider clients (OpenAI HTTP pool; Gemini uses the SDK's gRPC channel)
+    provider_http_timeout_seconds: float = Field(default=60.0, env="PROVIDER_HTTP_TIMEOUT_SECONDS")
+    provider_http_connect_timeout_seconds: float = Field(default=5.0, env="PROVIDER_HTTP_CONNECT_TIMEOUT_SECONDS")
+    provider_http_max_connections: int = Field(default=100, env="PROVIDER_HTTP_MAX_CONNECTIONS")
+    provider_http_max_keepalive: int = Field(default=20, env="PROVIDER_HTTP_MAX_KEEPALIVE")
+    provider_http_keepalive_expiry_seconds: float = Field(default=60.0, env="PROVIDER_HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    provider_max_retries: int = Field(default=2, env="PROVIDER_MAX_RETRIES")
+    provider_warmup_enabled: bool = Field(default=True, env="PROVIDER_WARMUP_ENABLED")
+    provider_warmup_timeout_seconds: float = Field(default=5.0, env="PROVIDER_WARMUP_TIMEOUT_SECONDS")
+
+    # Semantic answer cache
+    answer_cache_enabled: bool = Field(default=True, env="ANSWER_CACHE_ENABLED")
+    answer_cache_max_distance: float = Field(default=0.05, env="ANSWER_CACHE_MAX_DISTANCE")
+    answer_cache_ttl_seconds: int = Field(default=3600, env="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries_per_bot: int = Field(default=128, env="ANSWER_CACHE_MAX_ENTRIES_PER_BOT")
+
+    # Bot configuration cache (system prompt, owner, LLM config for the query path)
+    bot_config_cache_ttl_seconds: int = Field(default=300, env="BOT_CONFIG_CACHE_TTL_SECONDS")
+
+    # Plan caches (resolved plan per user, subscription_plans by plan_key)
+    plan_cache_ttl_seconds: int = Field(default=300, env="PLAN_CACHE_TTL_SECONDS")
+    plan_catalog_cache_ttl_seconds: int = Field(default=3600, env="PLAN_CATALOG_CACHE_TTL_SECONDS")
+
+    # Daily query quota counters (bot_daily_usage)
+    usage_counter_refresh_seconds: int = Field(default=10, env="USAGE_COUNTER_REFRESH_SECONDS")
+    usage_counter_flush_interval_seconds: int = Field(default=5, env="USAGE_COUNTER_FLUSH_INTERVAL_SECONDS")
+    usage_counter_reconcile_interval_seconds: int = Field(default=600, env="USAGE_COUNTER_RECONCILE_INTERVAL_SECONDS")
+
+    # Query log write-behind buffer
+    query_log_batch_size: int = Field(default=100, env="QUERY_LOG_BATCH_SIZE")
+    query_log_flush_interval_seconds: float = Field(default=1.0, env="QUERY_LOG_FLUSH_INTERVAL_SECONDS")
+    query_log_max_buffer: int = Field(default=10000, env="QUERY_LOG_MAX_BUFFER")
+    query_log_max_attempts: int = Field(default=5, env="QUERY_LOG_MAX_ATTEMPTS")
+
+    # Widget token validation cache
+    widget_token_cache_ttl_seconds: int = Field(default=60, env="WIDGET_TOKEN_CACHE_TTL_SECONDS")
+    widget_token_last_used_flush_seconds: int = Field(default=60, env="WIDGET_TOKEN_LAST_USED_FLUSH_SECONDS")
     
     class Config:
         env_file = ".env"
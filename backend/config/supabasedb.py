@@ -1,7 +1,11 @@
 import os
+import threading
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 import dotenv
-from typing import Optional
+import httpx
+from typing import Dict, Optional, Union
 import logging
 
 dotenv.load_dotenv()
@@ -50,7 +54,98 @@ db_manager = DatabaseManager()
 _service_role_warning_emitted = False
 
 
-def get_supabase_client(access_token: Optional[str] = None, use_service_role: bool = False) -> Client:
+class _SharedTransport(httpx.HTTPTransport):
+    """Process-wide connection pool; closing a client that uses it leaves the pool open"""
+
+    def close(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+class _SharedAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async counterpart of _SharedTransport (bound to the server's event loop)"""
+
+    async def aclose(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        await super().aclose()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.environ.get("SUPABASE_HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.environ.get("SUPABASE_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.environ.get("SUPABASE_HTTP_KEEPALIVE_EXPIRY", 30)),
+    )
+
+
+_transport: Optional[_SharedTransport] = None
+_async_transport: Optional[_SharedAsyncTransport] = None
+_transport_lock = threading.Lock()
+
+
+def _shared_transport() -> _SharedTransport:
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = _SharedTransport(limits=_pool_limits())
+    return _transport
+
+
+def _shared_async_transport() -> _SharedAsyncTransport:
+    global _async_transport
+    if _async_transport is None:
+        _async_transport = _SharedAsyncTransport(limits=_pool_limits())
+    return _async_transport
+
+
+class _PooledSession(httpx.Client):
+    # postgrest's request builders and SyncPostgrestClient.aclose() expect this alias
+    def aclose(self) -> None:
+        self.close()
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """
+    PostgREST client whose session only carries the caller's headers; connections
+    come from the process-wide pool, so creating one per request is cheap.
+    """
+
+    def create_session(self, base_url: str, headers: Dict[str, str], timeout, *args, **kwargs) -> httpx.Client:
+        return _PooledSession(base_url=base_url, headers=headers, timeout=timeout, transport=_shared_transport())
+
+
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """Async counterpart of PooledPostgrestClient"""
+
+    def create_session(self, base_url: str, headers: Dict[str, str], timeout, *args, **kwargs) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout, transport=_shared_async_transport())
+
+
+def _rest_url() -> str:
+    url: str = os.environ.get("SUPABASE_URL")
+    if not url:
+        raise ValueError("SUPABASE_URL must be set in environment variables")
+    return f"{url.rstrip('/')}/rest/v1"
+
+
+def _user_headers(access_token: str) -> Dict[str, str]:
+    # RLS requires anon key + user's JWT token in Authorization header
+    # CRITICAL: We MUST use anon key, NOT service role key, for RLS to work
+    anon_key: str = os.environ.get("SUPABASE_ANON_KEY")
+    if not anon_key:
+        raise ValueError(
+            "SUPABASE_ANON_KEY must be set for RLS-enabled operations. "
+            "Service role key (SUPABASE_SERVICE_KEY) bypasses RLS and should not be used for user operations."
+        )
+    return {**DEFAULT_POSTGREST_CLIENT_HEADERS, "apikey": anon_key, "Authorization": f"Bearer {access_token}"}
+
+
+def get_supabase_client(access_token: Optional[str] = None, use_service_role: bool = False) -> Union[Client, PooledPostgrestClient]:
     """Get the Supabase client with proper error handling
     
     Args:
@@ -60,7 +155,8 @@ def get_supabase_client(access_token: Optional[str] = None, use_service_role: bo
                          WARNING: Only use for admin operations or auth validation.
     
     Returns:
-        Supabase Client instance
+        Supabase Client (service role) or a pooled PostgREST client scoped to
+        the user's token (supports table/from_/rpc)
         
     Raises:
         ValueError: If access_token is not provided and use_service_role is False
@@ -91,77 +187,72 @@ def get_supabase_client(access_token: Optional[str] = None, use_service_role: bo
                 "If you need admin access, explicitly set use_service_role=True"
             )
         
-        # Use anon key with user token for RLS compliance
-        # RLS requires anon key + user's JWT token in Authorization header
-        # CRITICAL: We MUST use anon key, NOT service role key, for RLS to work
-        anon_key: str = os.environ.get("SUPABASE_ANON_KEY")
-        
-        if not anon_key:
-            raise ValueError(
-                "SUPABASE_ANON_KEY must be set for RLS-enabled operations. "
-                "Service role key (SUPABASE_SERVICE_KEY) bypasses RLS and should not be used for user operations."
-            )
-        
-        # Create client with anon key
-        client = create_client(url, anon_key)
-        
-        # Set the user's access token for RLS
-        # The Supabase Python client uses postgrest for database queries
-        # We need to set the Authorization header on each request
-        # The postgrest client has an 'auth' method or we can monkey-patch the headers
-        
-        if hasattr(client, 'postgrest'):
-            # Try the auth method first (if available in postgrest-py)
-            if hasattr(client.postgrest, 'auth'):
-                try:
-                    client.postgrest.auth(access_token)
-                except Exception:
-                    # If auth method doesn't work, set headers manually
-                    pass
-            
-            # Always set headers as fallback/primary method
-            # The postgrest client typically uses a session with headers
-            # We need to intercept requests or set default headers
-            
-            # Try to access and modify the headers
-            if hasattr(client.postgrest, 'session'):
-                # httpx or requests session
-                if hasattr(client.postgrest.session, 'headers'):
-                    client.postgrest.session.headers.update({
-                        "Authorization": f"Bearer {access_token}",
-                        "apikey": anon_key
-                    })
-                elif hasattr(client.postgrest.session, '_headers'):
-                    if client.postgrest.session._headers is None:
-                        client.postgrest.session._headers = {}
-                    client.postgrest.session._headers.update({
-                        "Authorization": f"Bearer {access_token}",
-                        "apikey": anon_key
-                    })
-            
-            # Also try direct headers attribute
-            if hasattr(client.postgrest, 'headers'):
-                if isinstance(client.postgrest.headers, dict):
-                    client.postgrest.headers.update({
-                        "Authorization": f"Bearer {access_token}",
-                        "apikey": anon_key
-                    })
-            
-            # Fallback to private _headers
-            if hasattr(client.postgrest, '_headers'):
-                if client.postgrest._headers is None:
-                    client.postgrest._headers = {}
-                client.postgrest._headers.update({
-                    "Authorization": f"Bearer {access_token}",
-                    "apikey": anon_key
-                })
-        
-        return client
+        # Thin PostgREST client with the user's token; connections come from the shared pool
+        return PooledPostgrestClient(base_url=_rest_url(), headers=_user_headers(access_token))
     except Exception as e:
         logger.error(f"Database connection error: {str(e)}")
         raise
 
 
+_async_service_client: Optional[AsyncPostgrestClient] = None
+
+
+def get_async_postgrest_client(access_token: Optional[str] = None, use_service_role: bool = False) -> AsyncPostgrestClient:
+    """Get an async PostgREST client for database calls made on the event loop
+    
+    Args:
+        access_token: JWT access token for user-specific operations (RLS enabled).
+                     Required if use_service_role is False.
+        use_service_role: If True, uses service role key (bypasses RLS).
+    
+    Returns:
+        AsyncPostgrestClient instance
+    
+    Notes:
+        - The service role client is shared process-wide and must only be used from
+          the server's event loop; close it on shutdown with close_async_clients().
+        - User clients are created per call (the token lives in the session headers)
+          on top of the shared connection pool; `await client.aclose()` releases the
+          client but leaves the pool open.
+    """
+    rest_url = _rest_url()
+
+    if use_service_role:
+        global _async_service_client
+        if _async_service_client is None:
+            key: str = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+            if not key:
+                raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment variables")
+            _async_service_client = PooledAsyncPostgrestClient(
+                base_url=rest_url,
+                headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, "apikey": key, "Authorization": f"Bearer {key}"},
+            )
+            logger.info("Async Supabase service role client initialized")
+        return _async_service_client
+
+    if not access_token:
+        raise ValueError(
+            "access_token is required for user operations. "
+            "If you need admin access, explicitly set use_service_role=True"
+        )
+
+    return PooledAsyncPostgrestClient(base_url=rest_url, headers=_user_headers(access_token))
+
+
+async def close_async_clients() -> None:
+    """Close the shared async service role client and connection pools (call on application shutdown)"""
+    global _async_service_client, _async_transport, _transport
+    if _async_service_client is not None:
+        await _async_service_client.aclose()
+        _async_service_client = None
+    if _async_transport is not None:
+        await _async_transport.shutdown()
+        _async_transport = None
+    if _transport is not None:
+        _transport.shutdown()
+        _transport = None
+
+
 # Backward compatibility - DEPRECATED: Use get_supabase_client() with explicit parameters
 def supabase_db() -> Client:
     """Legacy function for backward compatibility
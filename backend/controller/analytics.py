@@ -11,7 +11,7 @@ import logging
 
 from middleware.auth_guard import auth_guard
 from services.analytics_service import AnalyticsService
-from services.plan_service import PlanService
+from services.plan_service import plan_service
 from core.exceptions import ValidationError, DatabaseError, AuthorizationError
 
 logger = logging.getLogger(__name__)
@@ -86,7 +86,6 @@ async def get_top_queries(
             pass
 
         # Check if user has access to advanced analytics
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         analytics_tier = user_plan.get("analytics_tier", "basic")
@@ -144,7 +143,6 @@ async def get_unanswered_queries(
             pass
 
         # Check if user has access to advanced analytics
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         analytics_tier = user_plan.get("analytics_tier", "basic")
@@ -247,7 +245,6 @@ async def get_analytics_overview(
             pass
 
         # Check if user has access to advanced analytics
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         analytics_tier = user_plan.get("analytics_tier", "basic")
@@ -9,7 +9,7 @@ from models.bot_model import (
     BotResponse
 )
 from repositories.bot_repo import BotRepository
-from services.bot_service import BotService
+from services.bot_service import bot_service
 from middleware.auth_guard import auth_guard
 from middleware.auth import get_access_token_from_request
 from core.exceptions import BaseAPIException, NotFoundError, ValidationError, AuthorizationError
@@ -19,9 +19,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize service (repository created per request with access token)
-bot_service = BotService()
-
 
 @router.post("/bots", response_model=BotResponse, status_code=status.HTTP_201_CREATED)
 @auth_guard
@@ -9,7 +9,7 @@ from typing import Optional
 import logging
 
 from middleware.auth_guard import auth_guard
-from services.plan_service import PlanService
+from services.plan_service import plan_service
 from models.plan_model import PlanResponse, UserPlanResponseModel, SubscriptionPlanModel
 from core.exceptions import DatabaseError, NotFoundError
 
@@ -36,7 +36,6 @@ async def get_user_plan(request: Request):
                 detail="User ID not found in token"
             )
         
-        plan_service = PlanService(use_service_role=True)
         plan_data = plan_service.get_plan_for_user(str(user_id))
         
         if not plan_data:
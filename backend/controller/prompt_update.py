@@ -13,8 +13,8 @@ from starlette.concurrency import run_in_threadpool
 
 from middleware.auth_guard import auth_guard
 from services.prompt_update_service import PromptUpdateService
-from services.bot_service import BotService
-from services.plan_service import PlanService
+from services.bot_service import bot_service
+from services.plan_service import plan_service
 from services.llm_service import LLMService
 from core.exceptions import ValidationError, DatabaseError, AuthorizationError, NotFoundError
 
@@ -57,7 +57,6 @@ async def create_prompt_update(
             pass
 
         # Check if user has access to train feature
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         can_access, error_msg = plan_service.can_access_feature(user_plan, "train_enabled")
@@ -166,7 +165,6 @@ async def apply_prompt_update(
             pass
 
         # Check if user has access to train feature
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         can_access, error_msg = plan_service.can_access_feature(user_plan, "train_enabled")
@@ -225,7 +223,6 @@ async def revert_prompt(
             pass
 
         # Check if user has access to train feature
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         can_access, error_msg = plan_service.can_access_feature(user_plan, "train_enabled")
@@ -284,7 +281,6 @@ async def generate_prompt_from_feedback(
             pass
 
         # Check if user has access to train feature
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         can_access, error_msg = plan_service.can_access_feature(user_plan, "train_enabled")
@@ -296,7 +292,6 @@ async def generate_prompt_from_feedback(
             )
 
         # Get the current bot and its prompt
-        bot_service = BotService()
         bot = bot_service.get_bot(str(bot_id), str(user_id), access_token=access_token)
         if not bot:
             raise NotFoundError("Bot", str(bot_id))
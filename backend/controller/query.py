@@ -1,20 +1,21 @@
 """
 Query API Controller
 
-Handles RAG query endpoint.
+Handles RAG query endpoints (JSON and Server-Sent Events streaming).
 """
 
 from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
 from uuid import UUID
+import json
 import logging
 
 from middleware.auth_guard import auth_guard
 from middleware.widget_token_guard import widget_token_guard
 from services.rag_service import RagService
-from starlette.concurrency import run_in_threadpool
-from core.exceptions import ValidationError, DatabaseError, AuthorizationError
+from core.exceptions import ValidationError, DatabaseError, AuthorizationError, NotFoundError
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +49,63 @@ class SandboxQueryRequest(BaseModel):
     include_metadata: Optional[bool] = Field(default=True, description="Include confidence and detailed source info for testing")
 
 
+def _pair_chat_history(messages: Optional[List[ChatMessage]]) -> Optional[List[Dict[str, str]]]:
+    """
+    Convert client chat messages to the (query, response) pairs expected by RagService.
+
+    Messages come in chronological order: user1, assistant1, user2, assistant2, etc.
+    Returns the last 5 pairs (most recent).
+    """
+    if not messages:
+        return None
+
+    history_pairs = []
+    i = 0
+    while i < len(messages):
+        if messages[i].isUser:
+            # Found a user message, look for the next assistant message
+            query = messages[i].text
+            if i + 1 < len(messages) and not messages[i + 1].isUser:
+                # Next message is assistant response
+                response = messages[i + 1].text
+                history_pairs.append({"query": query, "response": response})
+                i += 2  # Skip both messages
+            else:
+                i += 1  # No response yet, skip user message
+        else:
+            i += 1  # Skip standalone assistant messages
+
+    return history_pairs[-5:]
+
+
+def _sse_response(rag: RagService, prepared: Dict[str, Any], extra_done: Dict[str, Any]) -> StreamingResponse:
+    """
+    Wrap RagService.stream_answer in a Server-Sent Events response.
+
+    Events: "citations", then one "token" per chunk of answer text, then "done"
+    (or "error" if generation fails after the stream has started).
+    """
+    async def event_stream():
+        try:
+            async for event in rag.stream_answer(prepared):
+                event_type = event.pop("type")
+                if event_type == "done":
+                    event.update(extra_done)
+                yield f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming answer failed: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Unexpected error'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
+
+
 @query_router.post("/bots/{bot_id}/query")
 @auth_guard
 async def query_bot(request: Request, bot_id: UUID, body: QueryRequest):
@@ -68,32 +126,10 @@ async def query_bot(request: Request, bot_id: UUID, body: QueryRequest):
         rag = RagService(access_token=access_token)
         
         # Convert chat history to format expected by RAG service
-        chat_history = None
-        if body.chat_history:
-            # Pair up user messages with assistant responses
-            # Messages come in chronological order: user1, assistant1, user2, assistant2, etc.
-            history_pairs = []
-            i = 0
-            while i < len(body.chat_history):
-                if body.chat_history[i].isUser:
-                    # Found a user message, look for the next assistant message
-                    query = body.chat_history[i].text
-                    if i + 1 < len(body.chat_history) and not body.chat_history[i + 1].isUser:
-                        # Next message is assistant response
-                        response = body.chat_history[i + 1].text
-                        history_pairs.append({"query": query, "response": response})
-                        i += 2  # Skip both messages
-                    else:
-                        i += 1  # No response yet, skip user message
-                else:
-                    i += 1  # Skip standalone assistant messages
-            
-            # Take last 5 pairs (most recent)
-            chat_history = history_pairs[-5:] if len(history_pairs) > 5 else history_pairs
+        chat_history = _pair_chat_history(body.chat_history)
         
-        # Offload blocking retrieval/LLM work to a thread to avoid blocking the event loop
-        result = await run_in_threadpool(
-            rag.answer,
+        # Retrieval and LLM calls are async end-to-end (no threadpool hop)
+        result = await rag.answer(
             bot_id,
             str(user_id),
             body.query_text,
@@ -109,6 +145,8 @@ async def query_bot(request: Request, bot_id: UUID, body: QueryRequest):
 
     except ValidationError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.detail))
     except AuthorizationError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
     except DatabaseError as e:
@@ -137,33 +175,11 @@ async def query_bot_widget(request: Request, body: QueryRequest):
         rag = RagService(access_token=None)  # No user token needed for widget queries
         
         # Convert chat history from widget to format expected by RAG service
-        chat_history = None
-        if body.chat_history:
-            # Pair up user messages with assistant responses
-            # Messages come in chronological order: user1, assistant1, user2, assistant2, etc.
-            history_pairs = []
-            i = 0
-            while i < len(body.chat_history):
-                if body.chat_history[i].isUser:
-                    # Found a user message, look for the next assistant message
-                    query = body.chat_history[i].text
-                    if i + 1 < len(body.chat_history) and not body.chat_history[i + 1].isUser:
-                        # Next message is assistant response
-                        response = body.chat_history[i + 1].text
-                        history_pairs.append({"query": query, "response": response})
-                        i += 2  # Skip both messages
-                    else:
-                        i += 1  # No response yet, skip user message
-                else:
-                    i += 1  # Skip standalone assistant messages
-            
-            # Take last 5 pairs (most recent)
-            chat_history = history_pairs[-5:] if len(history_pairs) > 5 else history_pairs
+        chat_history = _pair_chat_history(body.chat_history)
         
         # Widget queries should not include metadata (production mode)
         # Override include_metadata to False for widgets (lighter responses)
-        result = await run_in_threadpool(
-            rag.answer,
+        result = await rag.answer(
             bot_id,
             None,  # No user_id for widget queries (token validates bot access)
             body.query_text,
@@ -194,6 +210,99 @@ async def query_bot_widget(request: Request, body: QueryRequest):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error")
 
 
+@query_router.post("/bots/{bot_id}/query/stream")
+@auth_guard
+async def query_bot_stream(request: Request, bot_id: UUID, body: QueryRequest):
+    """
+    Streaming variant of the bot query endpoint (Server-Sent Events).
+    Retrieval and validation errors are returned as regular HTTP errors
+    before the stream starts.
+    """
+    try:
+        access_token = None
+        try:
+            from controller.source import get_access_token_from_request
+            access_token = get_access_token_from_request(request)
+        except Exception:
+            pass
+
+        user_data = request.state.user
+        user_id = getattr(user_data, 'id', None)
+        if not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User ID not found in token")
+
+        rag = RagService(access_token=access_token)
+        chat_history = _pair_chat_history(body.chat_history)
+
+        try:
+            prepared = await rag.prepare_answer(
+                bot_id,
+                str(user_id),
+                body.query_text,
+                body.top_k or 5,
+                body.min_score or 0.25,
+                body.session_id,
+                body.page_url,
+                body.include_metadata or False,
+                chat_history,
+            )
+        except Exception:
+            await rag.aclose()
+            raise
+        return _sse_response(rag, prepared, {"session_id": body.session_id, "page_url": body.page_url})
+
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.detail))
+    except AuthorizationError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except DatabaseError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in streaming query: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error")
+
+
+@query_router.post("/widget/query/stream")
+@widget_token_guard
+async def query_bot_widget_stream(request: Request, body: QueryRequest):
+    """
+    Streaming variant of the public widget query endpoint (Server-Sent Events).
+    """
+    try:
+        token_data = request.state.widget_token
+        bot_id = UUID(token_data["bot_id"])
+
+        rag = RagService(access_token=None)
+        chat_history = _pair_chat_history(body.chat_history)
+
+        try:
+            prepared = await rag.prepare_answer(
+                bot_id,
+                None,
+                body.query_text,
+                body.top_k or 5,
+                body.min_score or 0.25,
+                body.session_id,
+                body.page_url,
+                False,  # Widget queries: always exclude metadata
+                chat_history,
+            )
+        except Exception:
+            await rag.aclose()
+            raise
+        return _sse_response(rag, prepared, {"session_id": body.session_id, "page_url": body.page_url})
+
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except DatabaseError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in widget streaming query: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error")
+
+
 @query_router.post("/bots/{bot_id}/query/sandbox")
 @auth_guard
 async def query_bot_sandbox(request: Request, bot_id: UUID, body: SandboxQueryRequest):
@@ -214,35 +323,14 @@ async def query_bot_sandbox(request: Request, bot_id: UUID, body: SandboxQueryRe
         if not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User ID not found in token")
 
-        # Verify user owns the bot
-        from services.bot_service import BotService
-        bot_service = BotService()
-        bot = bot_service.get_bot(str(bot_id), str(user_id), access_token=access_token)
-
+        # RagService verifies that the user owns the bot
         rag = RagService(access_token=access_token)
 
         # Convert chat history to format expected by RAG service
-        chat_history = None
-        if body.chat_history:
-            history_pairs = []
-            i = 0
-            while i < len(body.chat_history):
-                if body.chat_history[i].isUser:
-                    query = body.chat_history[i].text
-                    if i + 1 < len(body.chat_history) and not body.chat_history[i + 1].isUser:
-                        response = body.chat_history[i + 1].text
-                        history_pairs.append({"query": query, "response": response})
-                        i += 2
-                    else:
-                        i += 1
-                else:
-                    i += 1
-
-            chat_history = history_pairs[-5:] if len(history_pairs) > 5 else history_pairs
+        chat_history = _pair_chat_history(body.chat_history)
 
         # Use custom prompt for sandbox testing
-        result = await run_in_threadpool(
-            rag.answer,
+        result = await rag.answer(
             bot_id,
             str(user_id),
             body.query_text,
@@ -263,6 +351,8 @@ async def query_bot_sandbox(request: Request, bot_id: UUID, body: SandboxQueryRe
 
     except ValidationError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.detail))
     except AuthorizationError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
     except DatabaseError as e:
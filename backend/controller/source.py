@@ -4,7 +4,7 @@ Source API Controller
 Handles HTTP requests for source management (file uploads and URL submissions).
 """
 
-from fastapi import APIRouter, Request, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException, status, UploadFile, File, Form
 from typing import Optional
 from uuid import UUID
 import logging
@@ -16,11 +16,12 @@ from models.source_model import (
     SourceResponseModel,
     SourceResponse,
     SourceListResponseModel,
+    SourceStatus,
     SourceType,
 )
 from services.source_service import SourceService
 from starlette.concurrency import run_in_threadpool
-from services.parsing_service import ParsingService
+from services.ingestion_queue import ingestion_queue
 from middleware.auth_guard import auth_guard
 from middleware.auth import get_access_token_from_request
 from core.exceptions import (
@@ -92,12 +93,50 @@ def validate_file(file: UploadFile) -> tuple[SourceType, str]:
     return source_type, mime_type
 
 
+async def enqueue_new_source(source_service: SourceService, source_id: UUID, bot_id: UUID, user_id: UUID) -> None:
+    """
+    Queue parsing of a source that was just created.
+    
+    If the job can't be queued, the source (and its file in storage) is
+    deleted so the user can simply submit it again; should that fail too,
+    the source is marked failed rather than left waiting for a job that
+    will never come.
+    
+    Raises:
+        DatabaseError: If the job couldn't be queued
+    """
+    try:
+        await run_in_threadpool(ingestion_queue.enqueue_parse, source_id, bot_id)
+        return
+    except Exception as e:
+        logger.error(f"Error queueing source for parsing: source_id={source_id}, error={str(e)}")
+        enqueue_error = e
+    
+    try:
+        await run_in_threadpool(source_service.delete_source, source_id, bot_id, user_id)
+        logger.info(f"Source removed after failed enqueue: source_id={source_id}")
+    except Exception as e:
+        logger.error(f"Error removing source after failed enqueue: source_id={source_id}, error={str(e)}")
+        try:
+            await run_in_threadpool(
+                source_service.repository.update_source_status,
+                source_id,
+                SourceStatus.FAILED.value,
+                "Could not be queued for parsing; please delete and upload it again",
+            )
+        except Exception as status_error:
+            logger.error(f"Status update failed: source_id={source_id}, error={str(status_error)}")
+    
+    if isinstance(enqueue_error, DatabaseError):
+        raise enqueue_error
+    raise DatabaseError(f"Failed to queue source for parsing: {str(enqueue_error)}")
+
+
 @source_router.post("/bots/{bot_id}/sources/upload", status_code=status.HTTP_201_CREATED)
 @auth_guard
 async def upload_file_source(
     request: Request,
     bot_id: UUID,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
     """
@@ -141,8 +180,7 @@ async def upload_file_source(
         # This ensures only authorized uploads proceed
         source_service = SourceService(access_token=access_token)
         # We'll verify ownership by trying to get the bot
-        from services.bot_service import BotService
-        bot_service = BotService()
+        from services.bot_service import bot_service
         await run_in_threadpool(bot_service.get_bot, str(bot_id), str(user_id), access_token)
         
         # Generate storage path: bots/{bot_id}/sources/{source_id}/{filename}
@@ -189,14 +227,8 @@ async def upload_file_source(
         
         source_id = UUID(source_data["id"])
         
-        # Trigger parsing in background (non-blocking)
-        # Background task will run after response is sent
-        background_tasks.add_task(
-            _parse_source_background,
-            source_id=source_id,
-            bot_id=bot_id,
-            access_token=access_token
-        )
+        # Queue parsing for the ingestion workers (worker.py processes)
+        await enqueue_new_source(source_service, source_id, bot_id, UUID(user_id))
         
         response_data = SourceResponseModel(**source_data)
         
@@ -238,7 +270,6 @@ async def create_url_source(
     request: Request,
     bot_id: UUID,
     source_data: SourceCreateModel,
-    background_tasks: BackgroundTasks,
 ):
     """
     Submit a URL as a source.
@@ -273,13 +304,8 @@ async def create_url_source(
             source_data.original_url,
         )
         
-        # Trigger parsing in background (non-blocking) for URL crawl + chunk + embed
-        background_tasks.add_task(
-            _parse_source_background,
-            source_id=UUID(source_result["id"]),
-            bot_id=bot_id,
-            access_token=access_token,
-        )
+        # Queue crawl + chunk + embed for the ingestion workers
+        await enqueue_new_source(source_service, UUID(source_result["id"]), bot_id, UUID(user_id))
 
         response_data = SourceResponseModel(**source_result)
 
@@ -493,30 +519,100 @@ async def delete_source(
         )
 
 
-# Background task function for parsing
-def _parse_source_background(
-    source_id: UUID,
+@source_router.post("/bots/{bot_id}/sources/refresh", status_code=status.HTTP_202_ACCEPTED)
+@auth_guard
+async def refresh_url_sources(
+    request: Request,
     bot_id: UUID,
-    access_token: Optional[str] = None
 ):
     """
-    Background task to parse a source document.
-    This runs asynchronously after the upload response is sent.
-    
-    Args:
-        source_id: Source UUID to parse
-        bot_id: Bot UUID
-        access_token: User's JWT token for RLS operations
+    Re-crawl all URL sources of a bot.
+
+    Pages that are unchanged (HTTP 304 or same content checksum) keep their
+    chunks and only get last_checked_at updated; changed pages are re-indexed.
     """
+    return await _schedule_refresh(request, bot_id)
+
+
+@source_router.post("/bots/{bot_id}/sources/{source_id}/refresh", status_code=status.HTTP_202_ACCEPTED)
+@auth_guard
+async def refresh_url_source(
+    request: Request,
+    bot_id: UUID,
+    source_id: UUID,
+):
+    """Re-crawl one URL source, re-indexing only if the page changed"""
+    return await _schedule_refresh(request, bot_id, source_id=source_id)
+
+
+async def _schedule_refresh(
+    request: Request,
+    bot_id: UUID,
+    source_id: Optional[UUID] = None,
+):
     try:
-        parsing_service = ParsingService(access_token=access_token)
-        success = parsing_service.parse_source(source_id, bot_id)
+        user_data = request.state.user
+        user_id = getattr(user_data, 'id', None)
         
-        if success:
-            logger.info(f"Background parsing completed: source_id={source_id}, bot_id={bot_id}")
-        else:
-            logger.warning(f"Background parsing failed: source_id={source_id}, bot_id={bot_id}")
-            
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User ID not found in token"
+            )
+        
+        access_token = get_access_token_from_request(request)
+        
+        source_service = SourceService(access_token=access_token)
+        
+        sources = await run_in_threadpool(
+            source_service.get_refreshable_sources,
+            bot_id,
+            UUID(user_id),
+            source_id,
+        )
+        
+        # Queue conditional re-crawls for the ingestion workers
+        await run_in_threadpool(
+            ingestion_queue.enqueue_refresh,
+            [UUID(s["id"]) for s in sources],
+            bot_id,
+        )
+        
+        return {
+            "status": "success",
+            "data": {"scheduled": len(sources)},
+            "message": f"Refresh scheduled for {len(sources)} URL source(s)",
+        }
+        
+    except ValidationError as e:
+        logger.error(f"Validation error refreshing sources: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except NotFoundError as e:
+        logger.error(f"Source not found: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Source not found",
+        )
+    except AuthorizationError as e:
+        logger.error(f"Authorization error refreshing sources: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to refresh sources for this bot",
+        )
+    except DatabaseError as e:
+        logger.error(f"Database error refreshing sources: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch sources",
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Background parsing error: source_id={source_id}, bot_id={bot_id}, error={str(e)}", exc_info=True)
-
+        logger.error(f"Unexpected error refreshing sources: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
@@ -0,0 +1,152 @@
+"""
+In-Process Cache
+
+Thread-safe LRU cache with per-entry TTL and a size cap in bytes.
+Used for hot-path lookups that are expensive to recompute (embeddings,
+bot configuration, plans) and cheap to hold in memory.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with time-to-live expiry.
+
+    Entries are evicted least-recently-used first when either the entry
+    count or the estimated byte size exceeds its cap. Expired entries are
+    dropped lazily on access.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_entries: int = 10_000,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Hashable, Any], int]] = None,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            name: Cache name (used in logs and stats)
+            ttl_seconds: Default time-to-live for entries
+            max_entries: Maximum number of entries
+            max_bytes: Optional maximum total estimated size in bytes
+            sizeof: Optional function estimating the size of (key, value) in bytes
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda key, value: 0)
+        # key -> (value, expires_at, size_bytes)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Insert or replace an entry"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+
+        size = self._sizeof(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never cache a single value larger than the whole cache
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            self._evict_if_needed()
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove an entry, returning True if it existed"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove all entries whose key matches predicate"""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                self._remove(k)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Membership test that does not count as a lookup (may include expired entries)"""
+        return key in self._entries
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict_if_needed(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
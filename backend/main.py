@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -12,6 +13,12 @@ from controller.analytics import analytics_router
 from controller.prompt_update import prompt_update_router
 from controller.plan import plan_router
 from config.settings import settings
+from config.supabasedb import close_async_clients
+from services.provider_clients import warm_up as warm_up_providers, close_provider_clients
+from services.ingestion_queue import ingestion_queue
+from services.query_log_buffer import query_log_buffer
+from services.usage_counter import daily_usage_counter
+from services.widget_token_cache import widget_token_cache
 from core.exceptions import BaseAPIException
 from core.logging import setup_logging
 from middleware.rate_limit import rate_limit_middleware
@@ -21,12 +28,32 @@ from middleware.widget_query_cors import WidgetQueryCORSMiddleware
 setup_logging()
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    daily_usage_counter.start()
+    query_log_buffer.start()
+    widget_token_cache.start()
+    ingestion_queue.start()
+    if settings.provider_warmup_enabled:
+        await warm_up_providers()
+    yield
+    await ingestion_queue.stop()
+    await widget_token_cache.stop()
+    await query_log_buffer.stop()
+    await daily_usage_counter.stop()
+    await close_async_clients()
+    await close_provider_clients()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="Convot API - Production-ready backend with user authentication check",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # Add general CORS middleware for other endpoints
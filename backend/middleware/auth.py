@@ -1,9 +1,13 @@
 from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, Dict, Any, Mapping
 import logging
 import base64
 import json
+import jwt
+from config.settings import settings
 from config.supabasedb import get_supabase_client
+from middleware.jwt_verifier import jwt_verifier, TokenUnverifiable
 
 logger = logging.getLogger(__name__)
 
@@ -101,11 +105,22 @@ def get_access_token_from_request(request: Request) -> Optional[str]:
 
 
 class AuthMiddleware:
-    """Authentication middleware for Supabase token validation"""
+    """
+    Authentication middleware for Supabase token validation.
+
+    In "remote" mode every token is checked with the Supabase auth API. In
+    "local" mode tokens are verified in-process (see middleware.jwt_verifier)
+    and the auth API is only used, if enabled, for tokens that cannot be
+    verified locally.
+    """
     
     def __init__(self):
         # Use service role for auth validation (legitimate admin operation)
         self.supabase = get_supabase_client(use_service_role=True)
+        self.local = settings.auth_jwt_verification.lower() == "local"
+        if self.local and not jwt_verifier.configured:
+            logger.warning("AUTH_JWT_VERIFICATION=local but no JWT secret or JWKS URL configured; using remote validation")
+            self.local = False
     
     async def get_current_user(self, request: Request) -> Optional[Dict[str, Any]]:
         """Get current user from Supabase auth token (Header or Cookie)"""
@@ -115,8 +130,29 @@ class AuthMiddleware:
             if not access_token:
                 return None
 
+            if self.local:
+                user = jwt_verifier.cached(access_token)
+                if user is not None:
+                    return user
+                try:
+                    if jwt_verifier.needs_key_fetch(access_token):
+                        # May fetch the JWKS over HTTP on first use or key rotation
+                        return await run_in_threadpool(jwt_verifier.verify, access_token)
+                    return jwt_verifier.verify(access_token)
+                except jwt.PyJWTError as exc:
+                    logger.warning("Local token verification failed: %s", exc)
+                    return None
+                except TokenUnverifiable as exc:
+                    if not settings.auth_remote_fallback:
+                        logger.warning("Token could not be verified locally: %s", exc)
+                        return None
+                    logger.info("Token could not be verified locally, using Supabase auth: %s", exc)
+
             try:
-                user = self.supabase.auth.get_user(access_token)
+                # gotrue client is sync; keep the event loop free while it calls Supabase
+                user = await run_in_threadpool(self.supabase.auth.get_user, access_token)
+                if self.local and user:
+                    jwt_verifier.remember(access_token, user)
                 return user
             except Exception as exc:
                 logger.warning("Supabase token validation failed: %s", exc)
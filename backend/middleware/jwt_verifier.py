@@ -0,0 +1,172 @@
+"""
+Local JWT Verification
+
+Verifies Supabase access tokens in-process instead of calling the auth API:
+signature (HS256 with the project JWT secret, or RS256/ES256 with keys from
+the project JWKS endpoint), expiry and audience. Verified tokens are cached by
+SHA-256 hash until they expire, so repeated dashboard calls with the same
+token cost a dictionary lookup.
+
+Local verification does not see sessions revoked before the token expires
+(e.g. sign-out elsewhere); Supabase access tokens are short-lived, which
+bounds that window.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import hashlib
+import logging
+import time
+
+import jwt
+
+from config.settings import settings
+from core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+
+class TokenUnverifiable(Exception):
+    """Local verification could not decide (missing key material, unknown key id, JWKS unreachable)"""
+
+
+@dataclass
+class VerifiedUser:
+    """Authenticated user built from verified JWT claims (attribute-compatible with the Supabase user object)"""
+    id: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    role: Optional[str] = None
+    aud: Optional[str] = None
+    app_metadata: Dict[str, Any] = field(default_factory=dict)
+    user_metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "VerifiedUser":
+        return cls(
+            id=claims["sub"],
+            email=claims.get("email"),
+            phone=claims.get("phone"),
+            role=claims.get("role"),
+            aud=claims.get("aud"),
+            app_metadata=claims.get("app_metadata") or {},
+            user_metadata=claims.get("user_metadata") or {},
+        )
+
+
+class LocalJWTVerifier:
+    """Verifies Supabase JWTs with the project secret or JWKS and caches results until exp"""
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = "authenticated",
+        leeway_seconds: int = 0,
+        max_entries: int = 10_000,
+    ):
+        """
+        Initialize verifier.
+
+        Args:
+            secret: Project JWT secret for HS256 tokens
+            jwks_url: JWKS endpoint for asymmetric (RS256/ES256) tokens
+            audience: Required "aud" claim (None skips the audience check)
+            leeway_seconds: Clock skew tolerated on exp/nbf/iat
+            max_entries: Maximum number of cached verified tokens
+        """
+        self.secret = secret
+        self.audience = audience
+        self.leeway_seconds = leeway_seconds
+        self._jwks = jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=3600) if jwks_url else None
+        self._cache = TTLCache(name="verified_jwts", ttl_seconds=0, max_entries=max_entries)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret or self._jwks)
+
+    def cached(self, token: str) -> Optional[VerifiedUser]:
+        """Return the user for a previously verified, unexpired token"""
+        return self._cache.get(self._key(token))
+
+    def needs_key_fetch(self, token: str) -> bool:
+        """True when verifying this token may fetch the JWKS over the network"""
+        try:
+            return not jwt.get_unverified_header(token).get("alg", "").startswith("HS")
+        except jwt.PyJWTError:
+            return False
+
+    def verify(self, token: str) -> VerifiedUser:
+        """
+        Verify signature, expiry and audience, caching the result until exp.
+
+        Raises:
+            jwt.PyJWTError: If the token is invalid (bad signature, expired, wrong audience)
+            TokenUnverifiable: If no key is available to verify this token
+        """
+        user = self.cached(token)
+        if user is not None:
+            return user
+
+        claims = jwt.decode(
+            token,
+            self._signing_key(token),
+            algorithms=["HS256", *ASYMMETRIC_ALGORITHMS],
+            audience=self.audience,
+            leeway=self.leeway_seconds,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+        user = VerifiedUser.from_claims(claims)
+        self.remember(token, user, claims["exp"])
+        return user
+
+    def remember(self, token: str, user: Any, exp: Optional[float] = None) -> None:
+        """Cache a verified user until the token's exp"""
+        if exp is None:
+            try:
+                exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            except jwt.PyJWTError:
+                return
+        if exp:
+            self._cache.set(self._key(token), user, ttl_seconds=float(exp) - time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        return self._cache.stats()
+
+    def _signing_key(self, token: str) -> Any:
+        alg = jwt.get_unverified_header(token).get("alg", "")
+        if alg == "HS256":
+            if not self.secret:
+                raise TokenUnverifiable("HS256 token but no JWT secret configured")
+            return self.secret
+        if alg in ASYMMETRIC_ALGORITHMS:
+            if self._jwks is None:
+                raise TokenUnverifiable(f"{alg} token but no JWKS URL configured")
+            try:
+                return self._jwks.get_signing_key_from_jwt(token).key
+            except jwt.PyJWKClientError as e:
+                raise TokenUnverifiable(f"JWKS lookup failed: {e}")
+        raise jwt.InvalidAlgorithmError(f"Unsupported JWT algorithm: {alg or 'none'}")
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _jwks_url() -> Optional[str]:
+    # Only when asked for: "auto" selects the project's standard JWKS endpoint
+    if (settings.supabase_jwks_url or "").strip().lower() == "auto":
+        return f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+    return settings.supabase_jwks_url or None
+
+
+# Global local JWT verifier instance
+jwt_verifier = LocalJWTVerifier(
+    secret=settings.supabase_jwt_secret,
+    jwks_url=_jwks_url(),
+    audience=settings.supabase_jwt_audience or None,
+    leeway_seconds=settings.auth_jwt_leeway_seconds,
+)
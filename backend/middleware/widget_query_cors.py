@@ -2,7 +2,8 @@
 Widget Query CORS Middleware
 
 Handles CORS for widget query endpoint to allow all origins.
-This middleware only applies to /api/v1/widget/query endpoint.
+This middleware only applies to the /api/v1/widget/query endpoints
+(JSON and streaming).
 """
 
 from fastapi import Request
@@ -12,6 +13,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+WIDGET_QUERY_PATHS = {"/api/v1/widget/query", "/api/v1/widget/query/stream"}
+
 
 class WidgetQueryCORSMiddleware(BaseHTTPMiddleware):
     """
@@ -21,7 +24,7 @@ class WidgetQueryCORSMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next):
         # Only handle widget query endpoint
-        if request.url.path != "/api/v1/widget/query":
+        if request.url.path not in WIDGET_QUERY_PATHS:
             return await call_next(request)
         
         # Handle preflight OPTIONS requests
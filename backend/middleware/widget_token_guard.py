@@ -6,6 +6,7 @@ Extracts token from Authorization header or query parameter and validates it.
 """
 
 from fastapi import Request, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from functools import wraps
 from typing import Callable, Optional
 import logging
@@ -13,6 +14,9 @@ from services.widget_token_service import WidgetTokenService
 
 logger = logging.getLogger(__name__)
 
+# Stateless; uses the service role client (no access_token needed)
+token_service = WidgetTokenService()
+
 
 def widget_token_guard(func: Callable) -> Callable:
     """
@@ -61,8 +65,7 @@ def widget_token_guard(func: Callable) -> Callable:
                 )
             
             # Validate token
-            token_service = WidgetTokenService()  # No access_token needed (uses service role)
-            token_data = token_service.validate_token(token, origin=origin)
+            token_data = await run_in_threadpool(token_service.validate_token, token, origin=origin)
             
             if not token_data:
                 logger.warning(f"Invalid or expired widget token (origin: {origin})")
@@ -54,6 +54,7 @@ class SourceResponseModel(BaseModel):
     error_message: Optional[str] = Field(None, description="Error message if failed")
     file_size: Optional[int] = Field(None, description="File size in bytes")
     mime_type: Optional[str] = Field(None, description="MIME type")
+    last_checked_at: Optional[str] = Field(None, description="Last crawl or re-check timestamp (URL sources)")
     created_at: str = Field(..., description="Creation timestamp")
     updated_at: str = Field(..., description="Update timestamp")
 
@@ -6,9 +6,11 @@ This ensures consistency and allows for easy extension with new parsers.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, Optional
 import logging
 
+from parsers.exceptions import ParsingFailedError
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +41,8 @@ class BaseParser(ABC):
     - parse(): Extract text from document
     - can_parse(): Check if parser can handle file type
     - get_supported_types(): Return list of supported MIME types
+    
+    Parsers that can extract incrementally also override iter_pages().
     """
     
     def __init__(self):
@@ -61,6 +65,31 @@ class BaseParser(ABC):
         """
         pass
     
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """
+        Extract text from a document on disk, yielding it piece by piece.
+        
+        The default reads the whole file and yields the parsed text once;
+        parsers that can extract incrementally (PDF, page by page) override
+        it so memory stays bounded by a few pages.
+        
+        Args:
+            file_path: Path to the document
+        
+        Yields:
+            Non-empty text pieces in document order (joined by blank lines,
+            they equal parse().text)
+        
+        Raises:
+            ParsingFailedError: If parsing fails or yields no text
+        """
+        with open(file_path, "rb") as f:
+            result = self.parse(f.read(), file_path)
+        if not result.success:
+            raise ParsingFailedError(result.error_message or "Parsing failed")
+        if result.text:
+            yield result.text
+    
     @abstractmethod
     def can_parse(self, mime_type: str, file_extension: Optional[str] = None) -> bool:
         """
@@ -3,22 +3,119 @@ PDF Parser
 
 Extracts text from PDF documents using pdfplumber.
 Handles encrypted, corrupted, and multi-page PDFs.
+Large files are streamed page by page with iter_pages().
+Page ranges of large PDFs can be extracted in parallel across a process pool
+(PDF_PARSE_WORKERS).
 """
 
-from typing import Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Iterator, List, Optional, Tuple
 import io
 import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from config.settings import settings
 from parsers.base import BaseParser, ParseResult
+from parsers.exceptions import ParsingFailedError
+
+NO_TEXT_ERROR = "PDF contains no extractable text. It may be image-based or encrypted."
 
 logger = logging.getLogger(__name__)
 
+# Process pool shared by all PDFParser instances (created on first parallel parse)
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared page extraction pool, (re)creating it for this worker count"""
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != workers:
+            if _page_pool is not None:
+                _page_pool.shutdown(wait=False)
+            # spawn: forking the threaded web process can deadlock the children
+            _page_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _page_pool_workers = workers
+            logger.info(f"PDF page extraction pool started: workers={workers}")
+        return _page_pool
+
+
+def _discard_page_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next parallel parse starts a fresh one"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_page_pool() -> None:
+    """Stop the page extraction worker processes (application shutdown)"""
+    global _page_pool
+    with _page_pool_lock:
+        pool, _page_pool = _page_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Extract pages start..end-1 (0-based) of a PDF in a worker process.
+    
+    The worker opens the document itself and only loads the pages of its
+    range. A page that fails is returned with its error instead of text, so
+    one bad page doesn't lose the rest of the range.
+    
+    Returns:
+        (page_num, text, error) per page, 1-based and in page order
+    """
+    import pdfplumber
+    
+    results = []
+    with pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))) as pdf:
+        for page_num, page in enumerate(pdf.pages, start + 1):
+            try:
+                results.append((page_num, page.extract_text(), None))
+            except Exception as e:
+                results.append((page_num, None, str(e)))
+            finally:
+                page.close()
+    return results
+
 
 class PDFParser(BaseParser):
     """Parser for PDF documents"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None,
+        parallel_min_pages: Optional[int] = None
+    ):
+        """
+        Args:
+            workers: Processes for parallel page extraction (0 = extract serially
+                in this process); defaults to PDF_PARSE_WORKERS
+            pages_per_task: Pages each worker task extracts; defaults to PDF_PARSE_PAGES_PER_TASK
+            parallel_min_pages: Smaller PDFs are always extracted serially;
+                defaults to PDF_PARSE_PARALLEL_MIN_PAGES
+        """
         super().__init__()
         self._pdfplumber = None
+        self.workers = settings.pdf_parse_workers if workers is None else workers
+        self.pages_per_task = max(1, settings.pdf_parse_pages_per_task if pages_per_task is None else pages_per_task)
+        self.parallel_min_pages = (
+            settings.pdf_parse_parallel_min_pages if parallel_min_pages is None else parallel_min_pages
+        )
     
     def _get_pdfplumber(self):
         """Lazy load pdfplumber to avoid import errors if not installed"""
@@ -60,17 +157,20 @@ class PDFParser(BaseParser):
             with pdfplumber.open(pdf_file) as pdf:
                 metadata["page_count"] = len(pdf.pages)
                 
-                for page_num, page in enumerate(pdf.pages, 1):
+                if self._use_pool(metadata["page_count"]):
+                    # Workers open the document themselves, so they need it on disk
+                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                        tmp.write(file_content)
                     try:
-                        page_text = page.extract_text()
-                        if page_text:
+                        for page_text in self._extract_pages_parallel(tmp.name, metadata["page_count"]):
                             text_parts.append(page_text)
                             metadata["total_chars"] += len(page_text)
-                    except Exception as e:
-                        self.logger.warning(
-                            f"Failed to extract text from page {page_num}: {str(e)}"
-                        )
-                        continue
+                    finally:
+                        os.remove(tmp.name)
+                else:
+                    for page_text in self._extract_pages(pdf):
+                        text_parts.append(page_text)
+                        metadata["total_chars"] += len(page_text)
             
             full_text = "\n\n".join(text_parts)
             
@@ -79,7 +179,7 @@ class PDFParser(BaseParser):
                     text="",
                     metadata=metadata,
                     success=False,
-                    error_message="PDF contains no extractable text. It may be image-based or encrypted."
+                    error_message=NO_TEXT_ERROR
                 )
             
             metadata["extracted_chars"] = len(full_text)
@@ -104,6 +204,126 @@ class PDFParser(BaseParser):
                 error_message=error_msg
             )
     
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """
+        Extract text from a PDF on disk one page at a time.
+        
+        pdfplumber reads the file lazily and each page's parsed objects are
+        released once its text is out, so memory is bounded by the page being
+        extracted rather than the document. Large PDFs are extracted in
+        parallel when PDF_PARSE_WORKERS is set; pages still come out in order
+        and only a few ranges per worker are in flight.
+        
+        Args:
+            file_path: Path to the PDF
+        
+        Yields:
+            Text of each page that has any, in page order
+        
+        Raises:
+            ParsingFailedError: If the PDF can't be opened or has no extractable text
+        """
+        pdfplumber = self._get_pdfplumber()
+        try:
+            pdf = pdfplumber.open(file_path)
+        except Exception as e:
+            raise ParsingFailedError(f"Failed to parse PDF: {str(e)}")
+        
+        page_count = 0
+        total_chars = 0
+        has_text = False
+        with pdf:
+            if self._use_pool(len(pdf.pages)):
+                page_texts = self._extract_pages_parallel(file_path, len(pdf.pages))
+            else:
+                page_texts = self._extract_pages(pdf)
+            for page_text in page_texts:
+                page_count += 1
+                total_chars += len(page_text)
+                has_text = has_text or not page_text.isspace()
+                yield page_text
+        
+        if not has_text:
+            raise ParsingFailedError(NO_TEXT_ERROR)
+        self.logger.info(
+            f"Successfully streamed PDF: {len(pdf.pages)} pages, {page_count} with text, "
+            f"{total_chars} characters"
+        )
+    
+    def _extract_pages(self, pdf) -> Iterator[str]:
+        """Yield the non-empty text of each page, skipping pages that fail"""
+        for page_num, page in enumerate(pdf.pages, 1):
+            try:
+                page_text = page.extract_text()
+                if page_text:
+                    yield page_text
+            except Exception as e:
+                self.logger.warning(
+                    f"Failed to extract text from page {page_num}: {str(e)}"
+                )
+            finally:
+                # Drop the page's cached layout objects
+                page.close()
+    
+    def _use_pool(self, page_count: int) -> bool:
+        """Whether a PDF of this size is extracted across the process pool"""
+        return self.workers > 0 and page_count >= max(self.parallel_min_pages, 2)
+    
+    def _extract_pages_parallel(self, file_path: str, page_count: int) -> Iterator[str]:
+        """
+        Yield the non-empty text of each page, extracting page ranges across
+        the process pool.
+        
+        Ranges are submitted a couple per worker ahead of the one being
+        yielded, so results come back in page order without holding the whole
+        document. Pages that fail are skipped like in _extract_pages; a range
+        whose task fails outright is skipped as a whole.
+        
+        Raises:
+            ParsingFailedError: If a worker process dies
+        """
+        pool = _get_page_pool(self.workers)
+        ranges = iter([
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ])
+        in_flight: Deque[Tuple[Tuple[int, int], object]] = deque()
+        
+        def submit_next() -> None:
+            page_range = next(ranges, None)
+            if page_range is not None:
+                in_flight.append((page_range, pool.submit(_extract_page_range, file_path, *page_range)))
+        
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
+            
+            while in_flight:
+                (start, end), future = in_flight.popleft()
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    _discard_page_pool(pool)
+                    raise ParsingFailedError("Failed to parse PDF: a page extraction worker crashed")
+                except Exception as e:
+                    self.logger.warning(
+                        f"Failed to extract text from pages {start + 1}-{end}: {str(e)}"
+                    )
+                    results = []
+                submit_next()
+                
+                for page_num, page_text, error in results:
+                    if error is not None:
+                        self.logger.warning(
+                            f"Failed to extract text from page {page_num}: {error}"
+                        )
+                    elif page_text:
+                        yield page_text
+        finally:
+            # Stopped early (error or consumer gave up): don't leave ranges queued
+            for _, future in in_flight:
+                future.cancel()
+    
     def can_parse(self, mime_type: str, file_extension: Optional[str] = None) -> bool:
         """Check if this parser can handle PDF files"""
         return (
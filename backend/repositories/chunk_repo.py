@@ -4,20 +4,29 @@ Chunk Repository
 Handles all database operations for chunks.
 """
 
-from typing import List, Optional
+from typing import Callable, List, Optional
 from uuid import UUID
 import logging
 from datetime import datetime, timezone
 
+from postgrest.types import ReturnMethod
+
 from core.exceptions import DatabaseError, NotFoundError
 from config.supabasedb import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# PostgREST returns at most 1000 rows per request (db-max-rows), so reads of a
+# whole source are paged
+READ_PAGE_SIZE = 1000
+
 
 class ChunkRepository:
     """Repository for chunk operations"""
 
+    # Cleared when the database lacks update_chunk_embeddings() (older schema)
+    _bulk_update_available = True
+
     def __init__(self, access_token: Optional[str] = None):
         """
         Initialize the repository with a Supabase client.
@@ -63,12 +72,40 @@ class ChunkRepository:
             logger.error(f"Chunk creation failed: source_id={source_id}, count={len(chunks_data)}, error={str(e)}")
             raise DatabaseError(f"Failed to create chunks: {str(e)}")
 
-    def get_chunks_by_source(self, source_id: UUID) -> List[dict]:
+    def insert_chunks(self, chunks_data: List[dict]) -> int:
+        """
+        Insert complete chunk rows (text and embedding) without returning them.
+
+        Used by single-write ingestion; skipping the returned representation
+        avoids sending every vector back over the wire.
+
+        Args:
+            chunks_data: List of chunk data dictionaries including "embedding"
+
+        Returns:
+            Number of rows sent
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        if not chunks_data:
+            return 0
+
+        try:
+            self.client.table("chunks").insert(chunks_data, returning=ReturnMethod.minimal).execute()
+            logger.debug(f"Chunks inserted: count={len(chunks_data)}, source_id={chunks_data[0].get('source_id')}")
+            return len(chunks_data)
+        except Exception as e:
+            logger.error(f"Chunk insert failed: source_id={chunks_data[0].get('source_id')}, count={len(chunks_data)}, error={str(e)}")
+            raise DatabaseError(f"Failed to insert chunks: {str(e)}")
+
+    def get_chunks_by_source(self, source_id: UUID, columns: str = "*") -> List[dict]:
         """
         Get all chunks for a source.
 
         Args:
             source_id: ID of the source
+            columns: Columns to select (e.g. leave out "embedding" when vectors are not needed)
 
         Returns:
             List of chunk records
@@ -77,20 +114,55 @@ class ChunkRepository:
             DatabaseError: If database operation fails
         """
         try:
-            response = (
-                self.client.table("chunks")
-                .select("*")
+            return self._select_pages(
+                lambda: self.client.table("chunks")
+                .select(columns)
                 .eq("source_id", str(source_id))
-                .order("chunk_index", desc=False)
-                .execute()
             )
 
-            return response.data or []
-
         except Exception as e:
             logger.error(f"Error fetching chunks for source {source_id}: {str(e)}")
             raise DatabaseError(f"Failed to fetch chunks: {str(e)}")
 
+    def get_unembedded_chunk_ids(self, source_id: UUID) -> List[str]:
+        """
+        Get IDs of a source's chunks that have no embedding (e.g. an interrupted
+        insert-then-embed run).
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            rows = self._select_pages(
+                lambda: self.client.table("chunks")
+                .select("id, chunk_index")
+                .eq("source_id", str(source_id))
+                .is_("embedding", "null")
+            )
+            return [row["id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error fetching unembedded chunks for source {source_id}: {str(e)}")
+            raise DatabaseError(f"Failed to fetch chunks: {str(e)}")
+
+    @staticmethod
+    def _select_pages(build_query: Callable, page_size: int = READ_PAGE_SIZE) -> List[dict]:
+        """
+        Run a chunk select page by page (ordered by chunk_index, then id, so pages
+        don't overlap) until a page comes back short; returns all rows.
+        """
+        rows: List[dict] = []
+        while True:
+            response = build_query()\
+                .order("chunk_index", desc=False)\
+                .order("id", desc=False)\
+                .range(len(rows), len(rows) + page_size - 1)\
+                .execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
     def get_chunks_by_bot(self, bot_id: UUID, limit: Optional[int] = None) -> List[dict]:
         """
         Get all chunks for a bot.
@@ -181,6 +253,62 @@ class ChunkRepository:
             logger.error(f"Error deleting chunks for source {source_id}: {str(e)}")
             raise DatabaseError(f"Failed to delete chunks: {str(e)}")
 
+    def delete_chunks_by_ids(self, chunk_ids: List[str], batch_size: int = 100) -> int:
+        """
+        Delete chunks by ID, one request per batch of IDs.
+
+        Args:
+            chunk_ids: IDs of chunks to delete
+            batch_size: IDs per request (keeps the filter URL short)
+
+        Returns:
+            Number of IDs sent for deletion
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            for i in range(0, len(chunk_ids), batch_size):
+                batch = [str(c) for c in chunk_ids[i : i + batch_size]]
+                self.client.table("chunks")\
+                    .delete(returning=ReturnMethod.minimal)\
+                    .in_("id", batch)\
+                    .execute()
+            if chunk_ids:
+                logger.debug(f"Chunks deleted: count={len(chunk_ids)}")
+            return len(chunk_ids)
+        except Exception as e:
+            logger.error(f"Chunk delete failed: count={len(chunk_ids)}, error={str(e)}")
+            raise DatabaseError(f"Failed to delete chunks: {str(e)}")
+
+    def update_chunk_positions(self, rows: List[dict], batch_size: int = 500) -> int:
+        """
+        Rewrite position metadata (chunk_index, char_range, heading, tokens_estimate)
+        of existing chunks, one upsert per batch.
+
+        Rows must carry every non-null column of the chunk except embedding; the
+        embedding column is not sent, so stored vectors are left untouched.
+
+        Args:
+            rows: Complete chunk rows including "id"
+            batch_size: Rows per request
+
+        Returns:
+            Number of rows sent
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            for i in range(0, len(rows), batch_size):
+                self.client.table("chunks")\
+                    .upsert(rows[i : i + batch_size], returning=ReturnMethod.minimal, on_conflict="id")\
+                    .execute()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Chunk position update failed: count={len(rows)}, error={str(e)}")
+            raise DatabaseError(f"Failed to update chunk positions: {str(e)}")
+
     def count_chunks_by_source(self, source_id: UUID) -> int:
         """
         Count chunks for a source.
@@ -212,6 +340,9 @@ class ChunkRepository:
         """
         Update embeddings for a batch of chunks.
 
+        Uses the update_chunk_embeddings() SQL function to write the whole batch
+        in one statement; falls back to per-row updates if the function is missing.
+
         Args:
             chunk_ids: IDs of chunks to update
             embeddings: Corresponding embedding vectors
@@ -225,8 +356,24 @@ class ChunkRepository:
         if not chunk_ids or not embeddings or len(chunk_ids) != len(embeddings):
             return 0
 
+        if ChunkRepository._bulk_update_available:
+            try:
+                payload = [{"id": str(cid), "embedding": vec} for cid, vec in zip(chunk_ids, embeddings)]
+                response = self.client.rpc("update_chunk_embeddings", {"payload": payload}).execute()
+                return int(response.data or 0)
+            except Exception as e:
+                if not self._is_missing_function(e):
+                    logger.error(f"Error updating chunk embeddings: count={len(chunk_ids)}, error={str(e)}")
+                    raise DatabaseError(f"Failed to update embeddings: {str(e)}")
+                # Schema predates update_chunk_embeddings(); use per-row updates from now on
+                ChunkRepository._bulk_update_available = False
+                logger.warning("update_chunk_embeddings() not found in database; falling back to per-row embedding updates")
+
+        return self._update_chunk_embeddings_per_row(chunk_ids, embeddings)
+
+    def _update_chunk_embeddings_per_row(self, chunk_ids: List[UUID], embeddings: List[List[float]]) -> int:
+        """Fallback for databases without update_chunk_embeddings(): one UPDATE per chunk"""
         try:
-            # Supabase does not support bulk update by different values easily; do per-row
             updated_count = 0
             for cid, vec in zip(chunk_ids, embeddings):
                 response = (
@@ -242,3 +389,8 @@ class ChunkRepository:
             logger.error(f"Error updating chunk embeddings: {str(e)}")
             raise DatabaseError(f"Failed to update embeddings: {str(e)}")
 
+    @staticmethod
+    def _is_missing_function(e: Exception) -> bool:
+        # PostgREST answers PGRST202 when the function is not in its schema cache
+        message = str(e)
+        return "PGRST202" in message or "Could not find the function" in message
@@ -0,0 +1,79 @@
+from typing import Dict, List, Sequence
+import json
+import logging
+
+from postgrest.types import ReturnMethod
+
+from core.exceptions import DatabaseError
+from config.supabasedb import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheRepository:
+    """Content-addressed embeddings (embedding_cache table, service role only)"""
+
+    def __init__(self):
+        # Shared across tenants, so never exposed to user tokens
+        self.client = get_supabase_client(use_service_role=True)
+
+    def get_many(self, content_hashes: Sequence[str], provider: str, model: str, dimension: int) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors for many texts in one request.
+
+        Args:
+            content_hashes: SHA-256 hex digests of the texts
+            provider: Embedding provider name
+            model: Embedding model
+            dimension: Vector dimension
+
+        Returns:
+            Mapping of content hash to vector (misses are absent)
+        """
+        if not content_hashes:
+            return {}
+        try:
+            response = self.client.table("embedding_cache")\
+                .select("content_hash, embedding")\
+                .in_("content_hash", list(content_hashes))\
+                .eq("provider", provider)\
+                .eq("model", model)\
+                .eq("dimension", dimension)\
+                .execute()
+            found: Dict[str, List[float]] = {}
+            for row in response.data or []:
+                vector = row["embedding"]
+                # pgvector columns come back as "[0.1,0.2,...]"
+                if isinstance(vector, str):
+                    vector = json.loads(vector)
+                found[row["content_hash"]] = vector
+            return found
+        except Exception as e:
+            logger.error(f"Error reading embedding cache: count={len(content_hashes)}, error={str(e)}")
+            raise DatabaseError(f"Failed to read embedding cache: {str(e)}")
+
+    def put_many(self, rows: List[dict]) -> int:
+        """
+        Store vectors, keeping existing entries for the same key.
+
+        Args:
+            rows: Dicts with content_hash, provider, model, dimension and embedding
+
+        Returns:
+            Number of rows sent
+        """
+        if not rows:
+            return 0
+        try:
+            self.client.table("embedding_cache")\
+                .upsert(
+                    rows,
+                    returning=ReturnMethod.minimal,
+                    ignore_duplicates=True,
+                    on_conflict="content_hash,provider,model,dimension",
+                )\
+                .execute()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error writing embedding cache: count={len(rows)}, error={str(e)}")
+            raise DatabaseError(f"Failed to write embedding cache: {str(e)}")
@@ -0,0 +1,137 @@
+from typing import List, Optional
+import logging
+
+from core.exceptions import DatabaseError
+from config.supabasedb import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJobRepository:
+    """Durable ingestion queue (ingestion_jobs table, service role only)"""
+
+    def __init__(self):
+        self.client = get_supabase_client(use_service_role=True)
+
+    def enqueue_jobs(self, jobs: List[dict], max_attempts: int) -> int:
+        """
+        Queue jobs ({source_id, bot_id, kind}); sources that already have a
+        queued job of the same kind are skipped. Returns the number of jobs added.
+        """
+        if not jobs:
+            return 0
+        try:
+            response = self.client.rpc(
+                "enqueue_ingestion_jobs",
+                {"payload": jobs, "attempts_allowed": int(max_attempts)},
+            ).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            logger.error(f"Error enqueueing ingestion jobs: count={len(jobs)}, error={str(e)}")
+            raise DatabaseError(f"Failed to enqueue ingestion jobs: {str(e)}")
+
+    def claim_jobs(self, worker_id: str, max_jobs: int, lease_seconds: int) -> List[dict]:
+        """Claim ready jobs (FOR UPDATE SKIP LOCKED); returns the claimed rows"""
+        try:
+            response = self.client.rpc(
+                "claim_ingestion_jobs",
+                {"worker": worker_id, "max_jobs": int(max_jobs), "lease_seconds": int(lease_seconds)},
+            ).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error claiming ingestion jobs: worker={worker_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to claim ingestion jobs: {str(e)}")
+
+    def get_finished_jobs(self, since: Optional[str], limit: int = 1000, offset: int = 0) -> List[dict]:
+        """Jobs that succeeded after `since` (ISO timestamp, None: all), oldest first"""
+        try:
+            query = self.client.table("ingestion_jobs")\
+                .select("id, bot_id, finished_at")\
+                .eq("status", "succeeded")
+            if since is not None:
+                query = query.gt("finished_at", since)
+            response = query\
+                .order("finished_at")\
+                .order("id")\
+                .range(offset, offset + limit - 1)\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error reading finished ingestion jobs: error={str(e)}")
+            raise DatabaseError(f"Failed to read finished ingestion jobs: {str(e)}")
+
+    def get_last_finished_at(self) -> Optional[str]:
+        """finished_at of the most recently succeeded job (None if there is none)"""
+        try:
+            response = self.client.table("ingestion_jobs")\
+                .select("finished_at")\
+                .eq("status", "succeeded")\
+                .order("finished_at", desc=True)\
+                .limit(1)\
+                .execute()
+            return response.data[0]["finished_at"] if response.data else None
+        except Exception as e:
+            logger.error(f"Error reading finished ingestion jobs: error={str(e)}")
+            raise DatabaseError(f"Failed to read finished ingestion jobs: {str(e)}")
+
+    def renew_leases(self, worker_id: str, job_ids: List[str]) -> None:
+        """Extend the lease of jobs this worker is running (timed by the database clock)"""
+        if not job_ids:
+            return
+        try:
+            self.client.rpc(
+                "renew_ingestion_job_leases",
+                {"worker": worker_id, "job_ids": job_ids},
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error renewing ingestion job leases: worker={worker_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to renew ingestion job leases: {str(e)}")
+
+    def set_stage(self, job_id: str, worker_id: str, stage: str) -> None:
+        """Record the pipeline stage a running job has reached"""
+        self._update(job_id, worker_id, {"stage": stage})
+
+    def complete_job(self, job_id: str, worker_id: str) -> None:
+        self._finish(job_id, worker_id, True, None)
+
+    def retry_job(self, job_id: str, worker_id: str, error: str, delay_seconds: float) -> None:
+        """Put a job back in the queue to run again delay_seconds from now (database clock)"""
+        try:
+            self.client.rpc(
+                "retry_ingestion_job",
+                {
+                    "job_id": job_id,
+                    "worker": worker_id,
+                    "error_message": error,
+                    "delay_seconds": float(delay_seconds),
+                },
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error requeueing ingestion job: job_id={job_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to requeue ingestion job: {str(e)}")
+
+    def fail_job(self, job_id: str, worker_id: str, error: Optional[str]) -> None:
+        self._finish(job_id, worker_id, False, error)
+
+    def _finish(self, job_id: str, worker_id: str, succeeded: bool, error: Optional[str]) -> None:
+        # finished_at is set by the database, whose clock the API polls against
+        try:
+            self.client.rpc(
+                "complete_ingestion_job",
+                {"job_id": job_id, "worker": worker_id, "succeeded": succeeded, "error_message": error},
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error finishing ingestion job: job_id={job_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to finish ingestion job: {str(e)}")
+
+    def _update(self, job_id: str, worker_id: str, update_data: dict) -> None:
+        # Only while this worker holds the job (a lapsed lease may have passed it on)
+        try:
+            self.client.table("ingestion_jobs")\
+                .update(update_data)\
+                .eq("id", job_id)\
+                .eq("locked_by", worker_id)\
+                .execute()
+        except Exception as e:
+            logger.error(f"Error updating ingestion job: job_id={job_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to update ingestion job: {str(e)}")
@@ -3,19 +3,59 @@ from uuid import UUID
 import logging
 import time
 
+from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
+
 from core.exceptions import DatabaseError
-from config.supabasedb import get_supabase_client
+from config.supabasedb import get_supabase_client, get_async_postgrest_client
 
 logger = logging.getLogger(__name__)
 
 
 class QueryRepository:
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(self, access_token: Optional[str] = None, async_client: Optional[AsyncPostgrestClient] = None):
         # For widget queries (access_token=None), use service role
         if access_token is None:
             self.client = get_supabase_client(use_service_role=True)
         else:
             self.client = get_supabase_client(access_token=access_token)
+        # Async methods use this client; the owner of the client is responsible for closing it
+        self.async_client = async_client or (
+            get_async_postgrest_client(use_service_role=True) if access_token is None else None
+        )
+
+    @staticmethod
+    def build_query_record(
+        bot_id: UUID,
+        session_id: str,
+        query_text: str,
+        page_url: Optional[str],
+        returned_sources: List[Dict[str, Any]],
+        response_summary: str,
+        tokens_used: int = 0,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        planned_prompt_tokens: Optional[int] = None,
+        confidence: Optional[float] = None,
+        latency_ms: Optional[int] = None,
+        cache_hit: bool = False,
+    ) -> Dict[str, Any]:
+        """Build a queries table row"""
+        return {
+            "bot_id": str(bot_id),
+            "session_id": session_id,
+            "query_text": query_text,
+            "page_url": page_url,
+            "returned_sources": returned_sources,
+            "response_summary": response_summary,
+            "tokens_used": tokens_used,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "planned_prompt_tokens": planned_prompt_tokens,
+            "confidence": confidence,
+            "latency_ms": latency_ms,
+            "cache_hit": cache_hit,
+        }
 
     def create_query(
         self,
@@ -28,23 +68,27 @@ class QueryRepository:
         tokens_used: int = 0,
         prompt_tokens: Optional[int] = None,
         completion_tokens: Optional[int] = None,
+        planned_prompt_tokens: Optional[int] = None,
         confidence: Optional[float] = None,
         latency_ms: Optional[int] = None,
+        cache_hit: bool = False,
     ) -> Dict[str, Any]:
         try:
-            payload = {
-                "bot_id": str(bot_id),
-                "session_id": session_id,
-                "query_text": query_text,
-                "page_url": page_url,
-                "returned_sources": returned_sources,
-                "response_summary": response_summary,
-                "tokens_used": tokens_used,
-                "prompt_tokens": prompt_tokens,
-                "completion_tokens": completion_tokens,
-                "confidence": confidence,
-                "latency_ms": latency_ms,
-            }
+            payload = self.build_query_record(
+                bot_id=bot_id,
+                session_id=session_id,
+                query_text=query_text,
+                page_url=page_url,
+                returned_sources=returned_sources,
+                response_summary=response_summary,
+                tokens_used=tokens_used,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                planned_prompt_tokens=planned_prompt_tokens,
+                confidence=confidence,
+                latency_ms=latency_ms,
+                cache_hit=cache_hit,
+            )
             resp = self.client.table("queries").insert(payload).execute()
             if not resp.data:
                 raise DatabaseError("Failed to insert query log")
@@ -86,4 +130,38 @@ class QueryRepository:
             logger.warning(f"Failed to fetch chat history for session {session_id}: {e}")
             return []
 
+    async def insert_queries_async(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Insert many query log records in one multi-row insert.
+
+        Args:
+            records: Payloads built with build_query_record (all with the same keys)
 
+        Returns:
+            Number of records written
+        """
+        if not records:
+            return 0
+        try:
+            await self.async_client.table("queries")\
+                .insert(records, returning=ReturnMethod.minimal)\
+                .execute()
+            return len(records)
+        except Exception as e:
+            logger.error(f"Error inserting {len(records)} query logs: {str(e)}")
+            raise DatabaseError(f"Failed to insert query logs: {str(e)}") from e
+
+    async def get_recent_messages_async(self, bot_id: UUID, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Async variant of get_recent_messages"""
+        try:
+            response = await self.async_client.table("queries")\
+                .select("query_text, response_summary, created_at")\
+                .eq("bot_id", str(bot_id))\
+                .eq("session_id", session_id)\
+                .order("created_at", desc=True)\
+                .limit(limit)\
+                .execute()
+            return list(reversed(response.data or []))
+        except Exception as e:
+            logger.warning(f"Failed to fetch chat history for session {session_id}: {e}")
+            return []
@@ -5,6 +5,7 @@ Handles all database operations for sources.
 Sources can be files (PDF, DOCX, TXT) or URLs (HTML).
 """
 
+from datetime import datetime, timezone
 from typing import List, Optional
 from uuid import UUID
 import logging
@@ -18,14 +19,18 @@ logger = logging.getLogger(__name__)
 class SourceRepository:
     """Repository for source operations"""
 
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(self, access_token: Optional[str] = None, use_service_role: bool = False):
         """
         Initialize the repository with a Supabase client.
         
         Args:
             access_token: User's JWT token for RLS-enabled operations
+            use_service_role: Bypass RLS (the ingestion worker, which has no user session)
         """
-        self.client = get_supabase_client(access_token=access_token)
+        if use_service_role:
+            self.client = get_supabase_client(use_service_role=True)
+        else:
+            self.client = get_supabase_client(access_token=access_token)
         self.access_token = access_token
 
     def create_source(self, source_data: dict) -> dict:
@@ -134,7 +139,6 @@ class SourceRepository:
             DatabaseError: If database operation fails
         """
         try:
-            from datetime import datetime, timezone
             update_data = {
                 "status": status,
                 "updated_at": datetime.now(timezone.utc).isoformat(),
@@ -161,6 +165,60 @@ class SourceRepository:
             logger.error(f"Source status update failed: source_id={source_id}, status={status}, error={str(e)}")
             raise DatabaseError(f"Failed to update source status: {str(e)}")
 
+    def update_crawl_metadata(
+        self,
+        source_id: UUID,
+        etag: Optional[str],
+        last_modified: Optional[datetime],
+        page_checksum: Optional[str],
+        canonical_url: Optional[str] = None,
+    ) -> None:
+        """
+        Store the validators of the last successful crawl and mark the source checked.
+
+        Args:
+            source_id: ID of the source
+            etag: ETag response header
+            last_modified: Parsed Last-Modified response header
+            page_checksum: SHA-256 of the extracted text
+            canonical_url: Final URL after redirects
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        update_data = {
+            "etag": etag,
+            "last_modified": last_modified.isoformat() if last_modified else None,
+            "page_checksum": page_checksum,
+            "last_checked_at": now,
+            "updated_at": now,
+        }
+        if canonical_url:
+            update_data["canonical_url"] = canonical_url
+        try:
+            self.client.table("sources").update(update_data).eq("id", str(source_id)).execute()
+            logger.debug(f"Crawl metadata updated: source_id={source_id}, etag={etag}, checksum={page_checksum}")
+        except Exception as e:
+            logger.error(f"Crawl metadata update failed: source_id={source_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to update crawl metadata: {str(e)}")
+
+    def mark_checked(self, source_id: UUID) -> None:
+        """
+        Record that an unchanged source was re-checked (last_checked_at only).
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            self.client.table("sources")\
+                .update({"last_checked_at": datetime.now(timezone.utc).isoformat()})\
+                .eq("id", str(source_id))\
+                .execute()
+        except Exception as e:
+            logger.error(f"Source check update failed: source_id={source_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to update last_checked_at: {str(e)}")
+
     def delete_source(self, source_id: UUID, bot_id: UUID) -> bool:
         """
         Delete a source.
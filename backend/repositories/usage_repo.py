@@ -0,0 +1,60 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+import logging
+
+from core.exceptions import DatabaseError
+from config.supabasedb import get_async_postgrest_client
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRepository:
+    """Per-bot daily usage counters (bot_daily_usage table, service role only)"""
+
+    def __init__(self):
+        self.client = get_async_postgrest_client(use_service_role=True)
+
+    async def get_daily_query_count(self, bot_id: UUID, usage_date: date) -> int:
+        """Read a bot's query counter for a day (0 if no row yet)"""
+        try:
+            response = await self.client.table("bot_daily_usage")\
+                .select("query_count")\
+                .eq("bot_id", str(bot_id))\
+                .eq("usage_date", usage_date.isoformat())\
+                .limit(1)\
+                .execute()
+            rows = response.data or []
+            return int(rows[0]["query_count"]) if rows else 0
+        except Exception as e:
+            logger.error(f"Error reading daily usage: bot_id={bot_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to read daily usage: {str(e)}")
+
+    async def increment_daily_query_count(self, bot_id: UUID, usage_date: date, amount: int = 1) -> int:
+        """Atomically add to a bot's daily counter; returns the new count"""
+        try:
+            response = await self.client.rpc(
+                "increment_bot_daily_usage",
+                {
+                    "bot_uuid": str(bot_id),
+                    "usage_day": usage_date.isoformat(),
+                    "amount": int(amount),
+                },
+            ).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            logger.error(f"Error incrementing daily usage: bot_id={bot_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to increment daily usage: {str(e)}")
+
+    async def reconcile_daily_query_counts(self, usage_date: Optional[date] = None) -> int:
+        """
+        Reconcile a day's counters with the queries table (a past day is reset,
+        today's counters are only raised); returns the number of bots updated
+        """
+        try:
+            params = {"usage_day": usage_date.isoformat()} if usage_date else {}
+            response = await self.client.rpc("reconcile_bot_daily_usage", params).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            logger.error(f"Error reconciling daily usage: {str(e)}")
+            raise DatabaseError(f"Failed to reconcile daily usage: {str(e)}")
@@ -11,7 +11,7 @@ from uuid import UUID
 import logging
 
 from core.exceptions import DatabaseError, NotFoundError
-from config.supabasedb import get_supabase_client
+from config.supabasedb import get_supabase_client, get_async_postgrest_client
 
 logger = logging.getLogger(__name__)
 
@@ -219,3 +219,22 @@ class WidgetTokenRepository:
             # Don't raise - this is non-critical
             return False
 
+    @staticmethod
+    async def update_last_used_many_async(token_ids: List[str], used_at: datetime) -> None:
+        """
+        Set last_used_at for several tokens in one request (service role).
+
+        Used by the widget token cache to write coalesced usage timestamps.
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            client = get_async_postgrest_client(use_service_role=True)
+            await client.table("widget_tokens")\
+                .update({"last_used_at": used_at.isoformat()})\
+                .in_("id", [str(t) for t in token_ids])\
+                .execute()
+        except Exception as e:
+            logger.error(f"Error updating token last_used_at: count={len(token_ids)}, error={str(e)}")
+            raise DatabaseError(f"Failed to update token last_used_at: {str(e)}")
@@ -12,7 +12,7 @@ import logging
 
 from core.exceptions import DatabaseError, AuthorizationError
 from config.supabasedb import get_supabase_client
-from services.bot_service import BotService
+from services.bot_service import bot_service
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +30,7 @@ class AnalyticsService:
         self.access_token = access_token
         # Use service role for analytics queries (admin-level access needed)
         self.client = get_supabase_client(use_service_role=True)
-        self.bot_service = BotService()
+        self.bot_service = bot_service
 
     def get_summary_stats(self, bot_id: UUID, user_id: str, access_token: Optional[str] = None, days: int = 30) -> Dict[str, Any]:
         """
@@ -0,0 +1,152 @@
+"""
+Answer Cache
+
+Semantic cache for RAG answers. A lookup hits when a previous query for the
+same bot, system prompt version and retrieval settings has an embedding within
+a configurable cosine distance of the new query embedding.
+
+The cache is per-process; entries are invalidated explicitly when a bot's
+knowledge base or prompt changes, and expire after a TTL otherwise.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import hashlib
+import math
+import operator
+import threading
+import time
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Stable short version identifier for a system prompt"""
+    return hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize(vector: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return None
+    return [v / norm for v in vector]
+
+
+class AnswerCache:
+    """Per-bot semantic answer cache with cosine-distance lookup"""
+
+    def __init__(
+        self,
+        max_distance: float = 0.05,
+        ttl_seconds: float = 3600,
+        max_entries_per_bot: int = 128,
+    ):
+        """
+        Initialize answer cache.
+
+        Args:
+            max_distance: Maximum cosine distance (1 - similarity) for a hit
+            ttl_seconds: Time-to-live for entries
+            max_entries_per_bot: Maximum cached answers per bot (LRU eviction)
+        """
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_bot = max_entries_per_bot
+        # bot_id -> OrderedDict[entry_id, (variant, unit_vector, result, expires_at)]
+        self._buckets: Dict[str, "OrderedDict[int, Tuple[Hashable, List[float], Dict[str, Any], float]]"] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, bot_id: str, variant: Hashable, query_vec: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            bot_id: Bot ID
+            variant: Hashable describing prompt version and retrieval settings
+            query_vec: Query embedding
+
+        Returns:
+            Cached result dict (copy) or None
+        """
+        unit = _normalize(query_vec)
+        if unit is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(str(bot_id))
+            if not bucket:
+                self.misses += 1
+                return None
+
+            best_id = None
+            best_distance = self.max_distance
+            expired = []
+            for entry_id, (entry_variant, entry_vec, _, expires_at) in bucket.items():
+                if expires_at <= now:
+                    expired.append(entry_id)
+                    continue
+                if entry_variant != variant:
+                    continue
+                distance = 1.0 - sum(map(operator.mul, unit, entry_vec))
+                if distance <= best_distance:
+                    best_id = entry_id
+                    best_distance = distance
+            for entry_id in expired:
+                del bucket[entry_id]
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            bucket.move_to_end(best_id)
+            self.hits += 1
+            logger.debug(f"Answer cache hit: bot_id={bot_id}, distance={best_distance:.4f}")
+            return dict(bucket[best_id][2])
+
+    def store(self, bot_id: str, variant: Hashable, query_vec: List[float], result: Dict[str, Any]) -> None:
+        """Cache an answer for a query embedding"""
+        unit = _normalize(query_vec)
+        if unit is None:
+            return
+
+        with self._lock:
+            bucket = self._buckets.setdefault(str(bot_id), OrderedDict())
+            self._next_id += 1
+            bucket[self._next_id] = (variant, unit, dict(result), time.monotonic() + self.ttl_seconds)
+            while len(bucket) > self.max_entries_per_bot:
+                bucket.popitem(last=False)
+
+    def invalidate_bot(self, bot_id: str) -> None:
+        """Drop all cached answers for a bot"""
+        with self._lock:
+            if self._buckets.pop(str(bot_id), None) is not None:
+                self.invalidations += 1
+                logger.debug(f"Answer cache invalidated: bot_id={bot_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "bots": len(self._buckets),
+                "entries": sum(len(b) for b in self._buckets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global answer cache instance
+answer_cache = AnswerCache(
+    max_distance=settings.answer_cache_max_distance,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    max_entries_per_bot=settings.answer_cache_max_entries_per_bot,
+)
@@ -0,0 +1,100 @@
+"""
+Bot Configuration Cache
+
+Process-wide TTL cache of the bot fields needed on the query hot path
+(id, owner, system prompt, LLM provider and config). Entries are invalidated
+explicitly whenever a bot is updated or deleted, and expire after a TTL
+otherwise (which bounds staleness across workers).
+"""
+
+from typing import Any, Dict, Optional
+import logging
+
+from config.settings import settings
+from config.supabasedb import get_supabase_client, get_async_postgrest_client
+from core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+BOT_CONFIG_COLUMNS = "id, created_by, system_prompt, llm_provider, llm_config"
+
+
+class BotConfigCache:
+    """Read-through cache of bot configuration, keyed by bot id"""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 10_000):
+        """
+        Initialize bot configuration cache.
+
+        Args:
+            ttl_seconds: Time-to-live for entries (0 disables caching)
+            max_entries: Maximum number of cached bots
+        """
+        self._cache = TTLCache(name="bot_config", ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def get(self, bot_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get bot configuration, fetching it with the service role client on a miss.
+
+        Returns:
+            Dict with id, created_by, system_prompt, llm_provider, llm_config,
+            or None if the bot does not exist
+        """
+        bot_id = str(bot_id)
+        config = self._cache.get(bot_id)
+        if config is not None:
+            return config
+
+        client = get_supabase_client(use_service_role=True)
+        response = (
+            client.table("bots")
+            .select(BOT_CONFIG_COLUMNS)
+            .eq("id", bot_id)
+            .maybe_single()
+            .execute()
+        )
+        return self._store(bot_id, response.data if response else None)
+
+    async def get_async(self, bot_id: str) -> Optional[Dict[str, Any]]:
+        """Async variant of get"""
+        bot_id = str(bot_id)
+        config = self._cache.get(bot_id)
+        if config is not None:
+            return config
+
+        client = get_async_postgrest_client(use_service_role=True)
+        response = await (
+            client.table("bots")
+            .select(BOT_CONFIG_COLUMNS)
+            .eq("id", bot_id)
+            .maybe_single()
+            .execute()
+        )
+        return self._store(bot_id, response.data if response else None)
+
+    def invalidate(self, bot_id: str) -> None:
+        """Drop the cached configuration for a bot"""
+        if self._cache.delete(str(bot_id)):
+            logger.debug(f"Bot config cache invalidated: bot_id={bot_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        return self._cache.stats()
+
+    def _store(self, bot_id: str, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not data:
+            # Missing bots are not cached, so a newly created bot is visible immediately
+            return None
+        config = {
+            "id": str(data.get("id") or bot_id),
+            "created_by": data.get("created_by"),
+            "system_prompt": data.get("system_prompt"),
+            "llm_provider": data.get("llm_provider"),
+            "llm_config": data.get("llm_config") or {},
+        }
+        self._cache.set(bot_id, config)
+        return config
+
+
+# Global bot configuration cache instance
+bot_config_cache = BotConfigCache(ttl_seconds=settings.bot_config_cache_ttl_seconds)
@@ -2,7 +2,9 @@ from typing import Dict, Any, Optional, List
 import logging
 from models.bot_model import BotCreateModel, BotUpdateModel
 from repositories.bot_repo import BotRepository
-from services.plan_service import PlanService
+from services.plan_service import plan_service
+from services.bot_config_cache import bot_config_cache
+from services.answer_cache import answer_cache
 from core.exceptions import ValidationError, NotFoundError, AuthorizationError
 
 logger = logging.getLogger(__name__)
@@ -26,7 +28,6 @@ class BotService:
             repository = self._get_repository(access_token=access_token)
             
             # Check plan limits before creating bot
-            plan_service = PlanService(use_service_role=True)
             user_plan = plan_service.get_plan_for_user(user_id)
             
             # Get current bot count for user
@@ -123,6 +124,7 @@ class BotService:
                     update_data["llm_config"] = existing_config
 
             result = repository.update_bot(bot_id, update_data)
+            bot_config_cache.invalidate(bot_id)
             logger.info(f"Bot updated: bot_id={bot_id}, user_id={user_id}, fields={list(update_data.keys())}")
             return result
         except (NotFoundError, AuthorizationError):
@@ -145,6 +147,8 @@ class BotService:
                 raise AuthorizationError("You do not have permission to delete this bot")
 
             result = repository.delete_bot(bot_id)
+            bot_config_cache.invalidate(bot_id)
+            answer_cache.invalidate_bot(bot_id)
             logger.info(f"Bot deleted: bot_id={bot_id}, user_id={user_id}")
             return result
         except (NotFoundError, AuthorizationError):
@@ -153,3 +157,6 @@ class BotService:
             logger.error(f"Bot deletion failed: bot_id={bot_id}, user_id={user_id}, error={str(e)}")
             raise
 
+
+# Global bot service instance (repositories are created per request with the access token)
+bot_service = BotService()
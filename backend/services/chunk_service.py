@@ -5,19 +5,77 @@ Business logic for chunk operations.
 Orchestrates chunking, storage, and retrieval.
 """
 
-from typing import List, Optional
-from uuid import UUID
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID, uuid4
+import hashlib
 import logging
 
 from core.exceptions import ValidationError, NotFoundError, AuthorizationError, DatabaseError
 from repositories.chunk_repo import ChunkRepository
-from services.bot_service import BotService
+from services.bot_service import bot_service
 from services.chunking_service import ChunkingService, TextChunk
 from models.source_model import SourceType
 
 logger = logging.getLogger(__name__)
 
 
+# Columns needed to diff stored chunks against re-chunked text (no embedding)
+DIFF_COLUMNS = "id, chunk_index, excerpt, heading, char_range, tokens_estimate"
+
+# Fields that may change on a kept chunk without re-embedding it
+POSITION_FIELDS = ("chunk_index", "char_range", "heading", "tokens_estimate")
+
+
+@dataclass
+class ChunkDiff:
+    """Re-chunked text matched against a source's stored chunks by content hash"""
+    kept: int = 0
+    # Kept chunks whose position metadata changed (complete rows with stored ids)
+    updates: List[dict] = field(default_factory=list)
+    # Chunks with new text (client-generated ids), to embed and insert
+    new_rows: List[dict] = field(default_factory=list)
+    # Stored chunks whose text no longer occurs
+    removed_ids: List[str] = field(default_factory=list)
+
+
+def diff_chunks(existing: List[dict], rows: List[dict]) -> ChunkDiff:
+    """
+    Match new chunk rows to stored chunks by SHA-256 of their excerpt.
+
+    Repeated excerpts are paired in order. Runs in O(n) over both lists.
+
+    Args:
+        existing: Stored chunks (at least DIFF_COLUMNS)
+        rows: Rows from ChunkService.build_chunk_rows
+
+    Returns:
+        ChunkDiff describing what to update, insert and delete
+    """
+    by_hash: Dict[str, Deque[dict]] = defaultdict(deque)
+    for chunk in existing:
+        by_hash[_excerpt_hash(chunk.get("excerpt", ""))].append(chunk)
+
+    diff = ChunkDiff()
+    for row in rows:
+        matches = by_hash.get(_excerpt_hash(row.get("excerpt", "")))
+        if matches:
+            stored = matches.popleft()
+            diff.kept += 1
+            if any(stored.get(f) != row.get(f) for f in POSITION_FIELDS):
+                diff.updates.append({**row, "id": stored["id"]})
+        else:
+            diff.new_rows.append({**row, "id": str(uuid4())})
+
+    diff.removed_ids = [chunk["id"] for remaining in by_hash.values() for chunk in remaining]
+    return diff
+
+
+def _excerpt_hash(excerpt: str) -> str:
+    return hashlib.sha256(excerpt.encode("utf-8")).hexdigest()
+
+
 class ChunkService:
     """Service for chunk operations"""
 
@@ -56,12 +114,45 @@ class ChunkService:
             ValidationError: If validation fails
             DatabaseError: If database operation fails
         """
+        chunks_data = self.build_chunk_rows(source_id, bot_id, text, source_type, default_heading)
+        if not chunks_data:
+            return []
+
+        # Store chunks in database
+        try:
+            created_chunks = self.repository.create_chunks(chunks_data)
+            logger.debug(f"Chunks stored: source_id={source_id}, bot_id={bot_id}, count={len(created_chunks)}")
+            return created_chunks
+        except Exception as e:
+            logger.error(f"Chunk storage failed: source_id={source_id}, bot_id={bot_id}, error={str(e)}")
+            raise DatabaseError(f"Failed to store chunks: {str(e)}")
+
+    def build_chunk_rows(
+        self,
+        source_id: UUID,
+        bot_id: UUID,
+        text: str,
+        source_type: SourceType,
+        default_heading: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Chunk text into rows ready for insertion (without embeddings).
+
+        Args:
+            source_id: Source UUID
+            bot_id: Bot UUID
+            text: Extracted text to chunk
+            source_type: Type of source (pdf, docx, text, html)
+            default_heading: Heading applied to chunks that have none
+
+        Returns:
+            List of chunk row dicts (empty if the text yields no chunks)
+        """
         if not text or not text.strip():
             logger.warning(f"Empty text provided for chunking source {source_id}")
             return []
 
         # Verify bot ownership (authorization)
-        bot_service = BotService()
         # Note: We need user_id for authorization, but in parsing context we might not have it
         # For now, we'll use service role to bypass RLS since we've already verified ownership
         # during source creation/parsing
@@ -74,26 +165,46 @@ class ChunkService:
             return []
 
         # Convert TextChunk objects to dicts for database insertion
-        chunks_data = []
-        for text_chunk in text_chunks:
-            chunk_dict = text_chunk.to_dict()
-            # Apply default heading if not present
-            if default_heading and not chunk_dict.get("heading"):
-                chunk_dict["heading"] = default_heading
-            chunk_dict.update({
-                "source_id": str(source_id),
-                "bot_id": str(bot_id),
-            })
-            chunks_data.append(chunk_dict)
+        return [self._to_row(text_chunk, source_id, bot_id, default_heading) for text_chunk in text_chunks]
 
-        # Store chunks in database
-        try:
-            created_chunks = self.repository.create_chunks(chunks_data)
-            logger.debug(f"Chunks stored: source_id={source_id}, bot_id={bot_id}, count={len(created_chunks)}")
-            return created_chunks
-        except Exception as e:
-            logger.error(f"Chunk storage failed: source_id={source_id}, bot_id={bot_id}, error={str(e)}")
-            raise DatabaseError(f"Failed to store chunks: {str(e)}")
+    def iter_chunk_rows(
+        self,
+        source_id: UUID,
+        bot_id: UUID,
+        pieces: Iterable[str],
+        source_type: SourceType,
+        default_heading: Optional[str] = None
+    ) -> Iterator[dict]:
+        """
+        Chunk text that arrives in pieces (e.g. PDF pages) into rows, yielding
+        each row as soon as its chunk is complete.
+
+        Rows match build_chunk_rows on the pieces joined by blank lines.
+
+        Args:
+            source_id: Source UUID
+            bot_id: Bot UUID
+            pieces: Text pieces in document order
+            source_type: Type of source (pdf, docx, text, html)
+            default_heading: Heading applied to chunks that have none
+
+        Yields:
+            Chunk row dicts (without embeddings)
+        """
+        for text_chunk in self.chunking_service.chunk_stream(pieces, source_type.value):
+            yield self._to_row(text_chunk, source_id, bot_id, default_heading)
+
+    @staticmethod
+    def _to_row(text_chunk: TextChunk, source_id: UUID, bot_id: UUID, default_heading: Optional[str]) -> dict:
+        chunk_dict = text_chunk.to_dict()
+        # Apply default heading if not present
+        if default_heading and not chunk_dict.get("heading"):
+            chunk_dict["heading"] = default_heading
+        chunk_dict.update({
+            "source_id": str(source_id),
+            "bot_id": str(bot_id),
+        })
+        return chunk_dict
 
     def get_chunks_by_source(
         self,
@@ -118,7 +229,6 @@ class ChunkService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         return self.repository.get_chunks_by_source(source_id)
@@ -145,7 +255,6 @@ class ChunkService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         return self.repository.get_chunks_by_bot(bot_id, limit)
@@ -173,7 +282,6 @@ class ChunkService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         chunk = self.repository.get_chunk_by_id(chunk_id)
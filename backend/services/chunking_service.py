@@ -5,13 +5,21 @@ Service for splitting text into chunks with metadata extraction.
 Implements sentence-aware chunking with overlap for context preservation.
 """
 
-from typing import List, Optional, Dict
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Dict, Tuple
 import re
 import logging
-from services.tokenizer import Tokenizer
+from services.tokenizer import Tokenizer, get_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# Pattern to match sentence endings (period, exclamation, question mark)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+# chunk_stream cuts a run of text without any sentence boundary at whitespace
+# once it grows past this many characters, to keep memory bounded
+MAX_PENDING_CHARS = 100_000
+
 
 class ChunkMetadata:
     """Metadata for a text chunk"""
@@ -87,7 +95,7 @@ class ChunkingService:
         self.overlap_tokens = overlap_tokens
         self.min_chunk_tokens = min_chunk_tokens
         self.max_chunk_tokens = max_chunk_tokens
-        self.tokenizer = Tokenizer()
+        self.tokenizer = get_tokenizer()
     
     def chunk_text(
         self,
@@ -111,25 +119,86 @@ class ChunkingService:
         # Extract headings if available (for structured documents)
         headings = self._extract_headings(text, source_type)
         
-        # Split into sentences (sentence-aware chunking)
-        sentences = self._split_into_sentences(text)
+        # Split into sentences (sentence-aware chunking), keeping their offsets
+        sentences = self._split_into_sentence_spans(text)
         
         if not sentences:
             logger.warning("No sentences found in text")
             return []
         
         # Build chunks with overlap
-        chunks = self._build_chunks_with_overlap(
-            sentences=sentences,
-            headings=headings,
-            text=text
-        )
+        builder = _ChunkBuilder(self, headings)
+        chunks = builder.add_sentences(sentences)
+        chunks.extend(builder.finish(len(text)))
         
         avg_tokens = sum(c.metadata.token_count for c in chunks) / len(chunks) if chunks else 0
         logger.info(f"Text chunked: chunks={len(chunks)}, avg_tokens={avg_tokens:.0f}")
         
         return chunks
     
+    def chunk_stream(
+        self,
+        pieces: Iterable[str],
+        source_type: str = "text"
+    ) -> Iterator[TextChunk]:
+        """
+        Chunk text that arrives in pieces (e.g. PDF pages), yielding each chunk
+        as soon as it is complete.
+        
+        The pieces are treated as joined by blank lines, and the chunks are the
+        same as chunk_text("\n\n".join(pieces)) would return. Only the
+        unfinished sentence and the sentences of the chunk being built are held
+        in memory. The one difference: a run of more than MAX_PENDING_CHARS
+        without a sentence boundary is cut at whitespace (chunk_text keeps it
+        as one sentence).
+        
+        Args:
+            pieces: Text pieces in document order (empty pieces are skipped)
+            source_type: Type of source (pdf, docx, html, text)
+        
+        Yields:
+            TextChunk objects, indexed from 0
+        """
+        builder = _ChunkBuilder(self, {})
+        pending = ""        # text after the last sentence boundary
+        pending_start = 0   # offset of pending in the joined text
+        length = 0
+        chunk_count = 0
+        
+        for piece in pieces:
+            if not piece:
+                continue
+            if length:
+                piece = "\n\n" + piece
+            builder.add_headings({length + pos: heading for pos, heading in self._extract_headings(piece, source_type).items()})
+            pending += piece
+            length += len(piece)
+            
+            sentences, consumed = self._sentence_spans(pending, final=False)
+            if len(pending) - consumed > MAX_PENDING_CHARS:
+                # No sentence boundary for too long: cut at the last whitespace
+                cut = max(pending.rfind(" "), pending.rfind("\n"))
+                if cut <= consumed:
+                    cut = len(pending)
+                forced, _ = self._sentence_spans(pending[consumed:cut], final=True)
+                sentences.extend((sentence, consumed + pos) for sentence, pos in forced)
+                consumed = cut
+            
+            for chunk in builder.add_sentences([(sentence, pending_start + pos) for sentence, pos in sentences]):
+                chunk_count += 1
+                yield chunk
+            pending = pending[consumed:]
+            pending_start += consumed
+        
+        sentences, _ = self._sentence_spans(pending, final=True)
+        tail = builder.add_sentences([(sentence, pending_start + pos) for sentence, pos in sentences])
+        tail.extend(builder.finish(length))
+        for chunk in tail:
+            chunk_count += 1
+            yield chunk
+        
+        logger.info(f"Text stream chunked: chunks={chunk_count}, chars={length}")
+    
     def _extract_headings(self, text: str, source_type: str) -> Dict[int, str]:
         """
         Extract headings from text.
@@ -166,164 +235,197 @@ class ChunkingService:
         
         return headings
     
-    def _split_into_sentences(self, text: str) -> List[str]:
+    def _split_into_sentence_spans(self, text: str) -> List[Tuple[str, int]]:
         """
-        Split text into sentences.
+        Split text into sentences with their start offsets in the text.
         
         Uses regex to detect sentence boundaries while preserving abbreviations.
+        Offsets come from the split itself, so sentences never have to be
+        searched for in the text afterwards.
         """
-        # Pattern to match sentence endings (period, exclamation, question mark)
-        # Excludes common abbreviations
-        sentence_endings = r'(?<=[.!?])\s+(?=[A-Z])'
-        
-        # Split by sentence endings
-        sentences = re.split(sentence_endings, text)
-        
-        # Filter out empty sentences
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        return sentences
+        return self._sentence_spans(text, final=True)[0]
     
-    def _build_chunks_with_overlap(
-        self,
-        sentences: List[str],
-        headings: Dict[int, str],
-        text: str
-    ) -> List[TextChunk]:
+    @staticmethod
+    def _sentence_spans(text: str, final: bool) -> Tuple[List[Tuple[str, int]], int]:
         """
-        Build chunks with overlap between adjacent chunks.
+        Sentences of text with their start offsets, and how much text they used.
         
-        Strategy:
-        1. Accumulate sentences until we reach target token count
-        2. When creating next chunk, include overlap from previous chunk
-        3. Preserve sentence boundaries
-        4. Associate chunks with nearest heading
+        Unless final, the piece after the last boundary is left out (more text
+        may still extend it) and the returned length ends at that boundary.
+        A boundary needs the capital letter after it, so boundaries found in a
+        prefix of a text are boundaries of the whole text too.
         """
-        chunks = []
-        current_chunk_sentences = []
-        current_char_start = 0
-        current_heading = None
+        spans = []
+        piece_start = 0
+        boundaries = list(SENTENCE_BOUNDARY.finditer(text))
+        if final:
+            boundaries.append(None)
+        for boundary in boundaries:
+            piece_end = boundary.start() if boundary else len(text)
+            piece = text[piece_start:piece_end]
+            sentence = piece.strip()
+            # Filter out empty sentences
+            if sentence:
+                spans.append((sentence, piece_start + len(piece) - len(piece.lstrip())))
+            if boundary:
+                piece_start = boundary.end()
         
-        # Rebuild text with sentence positions for accurate character tracking
-        # We'll use the original text and find positions by reconstructing
+        return spans, (len(text) if final else piece_start)
+
+
+class _Sentence:
+    """A sentence, its offset in the text and its token counts"""
+    
+    __slots__ = ("text", "pos", "spaced_tokens", "bare_tokens")
+    
+    def __init__(self, text: str, pos: int, spaced_tokens: int):
+        self.text = text
+        self.pos = pos
+        # Tokens the sentence adds after a joining space
+        self.spaced_tokens = spaced_tokens
+        # Tokens of the sentence on its own (counted on first use)
+        self.bare_tokens: Optional[int] = None
+
+
+class _ChunkBuilder:
+    """
+    Turns sentences, fed in text order, into chunks with overlap.
+    
+    Strategy:
+    1. Accumulate sentences until we reach target token count
+    2. When creating next chunk, include overlap from previous chunk
+    3. Preserve sentence boundaries
+    4. Associate chunks with nearest heading
+    
+    Runs in linear time: every sentence is tokenized once with its joining
+    space (one batch per add_sentences call) and at most once on its own, the
+    chunk total is kept as a running sum, and the joined chunk is only
+    re-tokenized for an exact count once the running sum is within a few
+    tokens of the target. Only the current chunk's sentences are kept, so
+    chunk_text and chunk_stream share it.
+    """
+    
+    def __init__(self, service: ChunkingService, headings: Dict[int, str]):
+        self.service = service
+        self.tokenizer = service.tokenizer
+        self.window = _SentenceWindow(service.tokenizer)
+        # Headings not yet reached, by position; a sentence takes the last heading at or before it
+        self.headings: Deque[Tuple[int, str]] = deque(sorted(headings.items()))
+        self.current_heading: Optional[str] = None
+        self.chunk_count = 0
+    
+    def add_headings(self, headings: Dict[int, str]) -> None:
+        """Queue headings found after every heading added so far"""
+        self.headings.extend(sorted(headings.items()))
+    
+    def add_sentences(self, sentences: List[Tuple[str, int]]) -> List[TextChunk]:
+        """Add sentences (after all previous ones); returns the chunks they completed"""
+        if not sentences:
+            return []
+        spaced_counts = self.tokenizer.count_tokens_batch([" " + sentence for sentence, _ in sentences])
+        window = self.window
+        service = self.service
+        chunks = []
         
-        for i, sentence in enumerate(sentences):
-            # Find the closest heading before or at this sentence
-            # Headings map is by character position, so we need to estimate
-            # For simplicity, we'll track heading by sentence index
-            sentence_in_text_pos = text.find(sentence, 0)  # Approximate
-            closest_heading = current_heading
-            for heading_pos, heading_text in sorted(headings.items()):
-                if sentence_in_text_pos >= heading_pos:
-                    closest_heading = heading_text
-                else:
-                    break
-            current_heading = closest_heading
+        for (sentence, sentence_pos), spaced_tokens in zip(sentences, spaced_counts):
+            while self.headings and self.headings[0][0] <= sentence_pos:
+                self.current_heading = self.headings.popleft()[1]
             
             # Add sentence to current chunk
-            current_chunk_sentences.append(sentence)
-            
-            # Estimate tokens for current chunk
-            current_chunk_text = ' '.join(current_chunk_sentences)
-            token_count = self.tokenizer.count_tokens(current_chunk_text)
+            window.append(_Sentence(sentence, sentence_pos, spaced_tokens))
             
-            # Decide if we should finalize this chunk
-            should_finalize = False
+            # Exact count only near the target; the running sum can be off by
+            # at most one token per joined sentence (fallback estimator)
+            if window.tokens + len(window.entries) < service.target_tokens:
+                continue
+            token_count = window.recount()
             
-            if token_count >= self.target_tokens:
-                # We've reached target size
-                should_finalize = True
-            elif token_count >= self.max_chunk_tokens:
-                # We've exceeded max size, must finalize
-                should_finalize = True
-            
-            if should_finalize:
-                # Calculate character range
-                chunk_text = ' '.join(current_chunk_sentences)
-                
-                # Find actual position in original text
-                # Start: find first sentence position
-                first_sentence = current_chunk_sentences[0]
-                chunk_start = text.find(first_sentence, current_char_start)
-                if chunk_start == -1:
-                    chunk_start = current_char_start
-                
-                # End: find last sentence position + length
-                last_sentence = current_chunk_sentences[-1]
-                last_sentence_start = text.find(last_sentence, chunk_start)
-                if last_sentence_start == -1:
-                    chunk_end = chunk_start + len(chunk_text)
-                else:
-                    chunk_end = last_sentence_start + len(last_sentence)
-                
-                # Create chunk
-                metadata = ChunkMetadata(
-                    heading=current_heading,
-                    char_start=chunk_start,
-                    char_end=chunk_end,
-                    token_count=token_count
-                )
-                
-                chunk = TextChunk(
-                    text=chunk_text,
-                    index=len(chunks),
-                    metadata=metadata
-                )
-                chunks.append(chunk)
+            # Finalize once we reach the target (which is below the maximum size)
+            if token_count >= service.target_tokens or token_count >= service.max_chunk_tokens:
+                first, last = window.entries[0], window.entries[-1]
+                chunks.append(self._emit(first.pos, last.pos + len(last.text), token_count))
                 
                 # Prepare overlap for next chunk
                 # Take last N sentences that fit within overlap token limit
-                overlap_sentences = []
+                overlap = []
                 overlap_tokens = 0
-                for sentence in reversed(current_chunk_sentences):
-                    sent_tokens = self.tokenizer.count_tokens(sentence)
-                    if overlap_tokens + sent_tokens <= self.overlap_tokens:
-                        overlap_sentences.insert(0, sentence)
+                for entry in reversed(window.entries):
+                    sent_tokens = window.sentence_tokens(entry)
+                    if overlap_tokens + sent_tokens <= service.overlap_tokens:
+                        overlap.append(entry)
                         overlap_tokens += sent_tokens
                     else:
                         break
                 
                 # Start new chunk with overlap
-                current_chunk_sentences = overlap_sentences
-                if overlap_sentences:
-                    # Update char start to beginning of overlap
-                    overlap_start_sentence = overlap_sentences[0]
-                    overlap_start = text.find(overlap_start_sentence, chunk_start)
-                    if overlap_start != -1:
-                        current_char_start = overlap_start
-                    else:
-                        current_char_start = chunk_end
-                else:
-                    current_char_start = chunk_end
-        
-        # Handle remaining sentences
-        if current_chunk_sentences:
-            chunk_text = ' '.join(current_chunk_sentences)
-            token_count = self.tokenizer.count_tokens(chunk_text)
-            
-            # Only add if it meets minimum size requirement
-            if token_count >= self.min_chunk_tokens:
-                # Find actual position in original text
-                first_sentence = current_chunk_sentences[0]
-                chunk_start = text.find(first_sentence, current_char_start)
-                if chunk_start == -1:
-                    chunk_start = current_char_start
-                
-                chunk_end = len(text)
-                
-                metadata = ChunkMetadata(
-                    heading=current_heading,
-                    char_start=chunk_start,
-                    char_end=chunk_end,
-                    token_count=token_count
-                )
-                
-                chunk = TextChunk(
-                    text=chunk_text,
-                    index=len(chunks),
-                    metadata=metadata
-                )
-                chunks.append(chunk)
+                window.reset(list(reversed(overlap)))
         
         return chunks
+    
+    def finish(self, text_end: int) -> List[TextChunk]:
+        """Close the last chunk (it runs to text_end) if it meets the minimum size"""
+        window = self.window
+        if not window.entries:
+            return []
+        token_count = window.recount()
+        
+        # Only add if it meets minimum size requirement
+        if token_count < self.service.min_chunk_tokens:
+            return []
+        return [self._emit(window.entries[0].pos, text_end, token_count)]
+    
+    def _emit(self, char_start: int, char_end: int, token_count: int) -> TextChunk:
+        metadata = ChunkMetadata(
+            heading=self.current_heading,
+            char_start=char_start,
+            char_end=char_end,
+            token_count=token_count
+        )
+        chunk = TextChunk(
+            text=self.window.text(),
+            index=self.chunk_count,
+            metadata=metadata
+        )
+        self.chunk_count += 1
+        return chunk
 
+
+class _SentenceWindow:
+    """
+    Sentences of the chunk being built, with a running token total.
+    
+    A chunk's text is its sentences joined by single spaces. Tokens never merge
+    across that boundary (each sentence ends in . ! or ? and the next starts
+    with a capital letter, so the space begins a new word), so the chunk's
+    token count is the first sentence's count plus each later sentence's count
+    with its leading space.
+    """
+    
+    def __init__(self, tokenizer: Tokenizer):
+        self.tokenizer = tokenizer
+        self.entries: List[_Sentence] = []
+        self.tokens = 0
+    
+    def sentence_tokens(self, entry: _Sentence) -> int:
+        """Tokens of a sentence on its own"""
+        if entry.bare_tokens is None:
+            entry.bare_tokens = self.tokenizer.count_tokens(entry.text)
+        return entry.bare_tokens
+    
+    def append(self, entry: _Sentence) -> None:
+        self.tokens += entry.spaced_tokens if self.entries else self.sentence_tokens(entry)
+        self.entries.append(entry)
+    
+    def reset(self, entries: List[_Sentence]) -> None:
+        self.entries = []
+        self.tokens = 0
+        for entry in entries:
+            self.append(entry)
+    
+    def text(self) -> str:
+        return ' '.join(entry.text for entry in self.entries)
+    
+    def recount(self) -> int:
+        """Exact token count of the joined text (resyncs the running total)"""
+        self.tokens = self.tokenizer.count_tokens(self.text())
+        return self.tokens
@@ -0,0 +1,204 @@
+"""
+Context Packer
+
+Fits chat history and retrieved chunks into a per-model prompt token budget.
+
+History is trimmed oldest turn first. Chunks are packed in score order until
+the budget is spent; when a chunk's neighbour from the same source is already
+packed, the sentences the two share (the chunker's overlap) are cut from the
+later one so the prompt doesn't carry them twice.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+from services.tokenizer import Tokenizer, get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Tokens for the "\n\n" between history turns and between chunks
+SEPARATOR_TOKENS = 1
+
+
+def prompt_budget_for(model: str) -> int:
+    """Prompt token budget for a chat model (PROMPT_TOKEN_BUDGETS, else PROMPT_TOKEN_BUDGET)"""
+    return settings.prompt_token_budgets.get(model, settings.prompt_token_budget)
+
+
+def shared_overlap(prev: str, nxt: str) -> int:
+    """
+    Length of the text a chunk shares with the chunk after it.
+
+    That is the longest suffix of prev that is also a prefix of nxt, starting
+    after a space in prev and followed by a space in nxt (so it is made of
+    whole sentences, as the chunker's overlap is). 0 if there is none.
+    """
+    if not nxt:
+        return 0
+    pos = prev.find(" ")
+    while pos != -1:
+        size = len(prev) - pos - 1
+        if (
+            0 < size < len(nxt)
+            and prev[pos + 1] == nxt[0]
+            and nxt[size] == " "
+            and nxt.startswith(prev[pos + 1:])
+        ):
+            return size
+        pos = prev.find(" ", pos + 1)
+    return 0
+
+
+@dataclass
+class PackedContext:
+    """History turns and chunk texts chosen for one prompt"""
+    # Kept conversation turns, oldest first
+    history: List[str] = field(default_factory=list)
+    # Packed chunks in score order, and the text used for each (overlap removed)
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    excerpts: List[str] = field(default_factory=list)
+    history_tokens: int = 0
+    context_tokens: int = 0
+    dropped_turns: int = 0
+    dropped_chunks: int = 0
+
+    @property
+    def history_text(self) -> str:
+        return "\n\n".join(self.history)
+
+    @property
+    def context(self) -> str:
+        return "\n\n".join(self.excerpts)
+
+
+class ContextPacker:
+    """Token-budgeted selection of history and context for a prompt"""
+
+    def __init__(
+        self,
+        budget: int,
+        history_max_tokens: int = 1000,
+        approximate: bool = False,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        """
+        Initialize context packer.
+
+        Args:
+            budget: Maximum prompt tokens (fixed parts, history and context)
+            history_max_tokens: Maximum tokens of conversation history
+            approximate: Count with Tokenizer.approx_tokens instead of exact counts
+            tokenizer: Tokenizer to count with (default: shared cl100k_base)
+        """
+        self.budget = budget
+        self.history_max_tokens = history_max_tokens
+        self.approximate = approximate
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def count(self, text: str) -> int:
+        """Token count used for budgeting (exact unless approximate)"""
+        if self.approximate:
+            return self.tokenizer.approx_tokens(text)
+        return self.tokenizer.count_tokens(text)
+
+    def _count_many(self, texts: List[str]) -> List[int]:
+        if self.approximate:
+            return [self.tokenizer.approx_tokens(text) for text in texts]
+        return self.tokenizer.count_tokens_batch(texts)
+
+    def pack(self, fixed_tokens: int, history: List[str], chunks: List[Dict[str, Any]]) -> PackedContext:
+        """
+        Choose history turns and chunk texts that fit the budget.
+
+        Args:
+            fixed_tokens: Tokens of the prompt without history and context
+                (system prompt, instructions and question)
+            history: Conversation turns, oldest first
+            chunks: Retrieved chunks (id, source_id, chunk_index, excerpt,
+                similarity), in any order
+
+        Returns:
+            PackedContext. The top chunk is always kept, even over budget, so
+            the answer stays grounded when the fixed parts alone fill it.
+        """
+        packed = PackedContext()
+        available = self.budget - fixed_tokens
+
+        # History: keep the newest turns that fit
+        history_budget = min(self.history_max_tokens, max(available, 0))
+        kept: List[str] = []
+        for turn, tokens in zip(reversed(history), reversed(self._count_many(history))):
+            if packed.history_tokens + tokens + SEPARATOR_TOKENS > history_budget:
+                break
+            kept.append(turn)
+            packed.history_tokens += tokens + SEPARATOR_TOKENS
+        packed.history = list(reversed(kept))
+        packed.dropped_turns = len(history) - len(kept)
+        available -= packed.history_tokens
+
+        # Context: fill by score, skipping chunks that no longer fit
+        ranked = sorted(chunks, key=lambda c: float(c.get("similarity") or 0.0), reverse=True)
+        full_counts = self._count_many([c.get("excerpt") or "" for c in ranked])
+        # (source_id, chunk_index) -> excerpt of packed chunks
+        packed_by_position: Dict[Tuple[Any, Any], str] = {}
+
+        for chunk, full_tokens in zip(ranked, full_counts):
+            text = self._without_shared_text(chunk, packed_by_position)
+            if text is None:
+                # Every sentence is already in the prompt through its neighbours
+                packed.dropped_chunks += 1
+                continue
+            tokens = full_tokens if text == chunk.get("excerpt") else self.count(text)
+            if packed.context_tokens + tokens + SEPARATOR_TOKENS > available and packed.chunks:
+                packed.dropped_chunks += 1
+                continue
+            packed.chunks.append(chunk)
+            packed.excerpts.append(text)
+            packed.context_tokens += tokens + SEPARATOR_TOKENS
+            if chunk.get("chunk_index") is not None:
+                packed_by_position[(chunk.get("source_id"), chunk["chunk_index"])] = chunk.get("excerpt") or ""
+
+        if packed.dropped_turns or packed.dropped_chunks:
+            logger.debug(
+                f"Prompt packed: budget={self.budget}, fixed={fixed_tokens}, history={packed.history_tokens}, "
+                f"context={packed.context_tokens}, dropped_turns={packed.dropped_turns}, dropped_chunks={packed.dropped_chunks}"
+            )
+        return packed
+
+    @staticmethod
+    def _without_shared_text(chunk: Dict[str, Any], packed_by_position: Dict[Tuple[Any, Any], str]) -> Optional[str]:
+        """
+        The chunk's excerpt minus the overlap with already packed neighbours.
+
+        Returns None if nothing new is left.
+        """
+        text = chunk.get("excerpt") or ""
+        index = chunk.get("chunk_index")
+        if index is None:
+            return text
+
+        start, end = 0, len(text)
+        previous = packed_by_position.get((chunk.get("source_id"), index - 1))
+        if previous:
+            shared = shared_overlap(previous, text)
+            if shared:
+                start = shared + 1  # and the joining space
+        following = packed_by_position.get((chunk.get("source_id"), index + 1))
+        if following:
+            shared = shared_overlap(text, following)
+            if shared:
+                end = len(text) - shared - 1
+        if (start, end) == (0, len(text)):
+            return text
+        return text[start:end].strip() or None
+
+
+def get_context_packer(model: str) -> ContextPacker:
+    """Context packer with the configured budget for a chat model"""
+    return ContextPacker(
+        budget=prompt_budget_for(model),
+        history_max_tokens=settings.prompt_history_max_tokens,
+        approximate=settings.prompt_budget_approximate,
+    )
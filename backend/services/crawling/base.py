@@ -3,13 +3,15 @@ from typing import Optional, Dict
 
 
 class CrawlResult:
-    def __init__(self, success: bool, url: str, canonical_url: Optional[str] = None, text: str = "", metadata: Optional[Dict] = None, error: Optional[str] = None):
+    def __init__(self, success: bool, url: str, canonical_url: Optional[str] = None, text: str = "", metadata: Optional[Dict] = None, error: Optional[str] = None, not_modified: bool = False):
         self.success = success
         self.url = url
         self.canonical_url = canonical_url or url
         self.text = text
         self.metadata = metadata or {}
         self.error = error
+        # Page unchanged since the last crawl (HTTP 304 or same checksum)
+        self.not_modified = not_modified
 
 
 class ContentExtractor(ABC):
@@ -20,8 +22,8 @@ class ContentExtractor(ABC):
 
 class HttpFetcher(ABC):
     @abstractmethod
-    def fetch(self, url: str) -> Dict:
-        """Return dict with: {status, headers, content(str), final_url}"""
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Return dict with: {status, headers, content(str), final_url}; headers are sent with the request"""
         raise NotImplementedError
 
 
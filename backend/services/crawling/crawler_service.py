@@ -1,4 +1,6 @@
 from typing import Optional, Dict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 import hashlib
 import logging
 
@@ -21,12 +23,55 @@ class CrawlerService:
         self.js_fetcher = PlaywrightFetcher()
         self.extractor = ReadabilityExtractor()
 
-    def crawl_single(self, url: str) -> CrawlResult:
+    @staticmethod
+    def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+        """Parse a Last-Modified header value (None if missing or malformed)"""
+        if not value:
+            return None
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def conditional_headers(etag: Optional[str] = None, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers from stored crawl metadata"""
+        headers: Dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        return headers
+
+    def crawl_single(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+        previous_checksum: Optional[str] = None,
+    ) -> CrawlResult:
+        """
+        Fetch and extract a single page.
+
+        With etag/last_modified from a previous crawl the request is conditional;
+        a 304 response returns a not_modified result without extracting anything.
+        If the extracted text hashes to previous_checksum, the result is also
+        marked not_modified (servers without validators, or cosmetic changes).
+        """
         robots = SimpleRobots(url)
         if not robots.allowed(url):
             return CrawlResult(False, url=url, error="Blocked by robots.txt")
 
-        resp = self.fetcher.fetch(url)
+        resp = self.fetcher.fetch(url, headers=self.conditional_headers(etag, last_modified))
+        if resp["status"] == 304:
+            logger.info(f"Not modified (304): {url}")
+            return CrawlResult(
+                True,
+                url=url,
+                metadata={"etag": etag, "last_modified": last_modified, "page_checksum": previous_checksum},
+                not_modified=True,
+            )
         if resp["status"] >= 400:
             return CrawlResult(False, url=url, error=f"HTTP {resp['status']}")
 
@@ -82,18 +127,20 @@ class CrawlerService:
 
         # Build metadata
         headers = resp.get("headers", {})
-        etag = headers.get("ETag") or headers.get("Etag")
-        last_modified = headers.get("Last-Modified")
         checksum = hashlib.sha256(result.text.encode("utf-8")).hexdigest()
         result.metadata.update({
-            "etag": etag,
-            "last_modified": last_modified,
+            "etag": headers.get("ETag") or headers.get("Etag"),
+            "last_modified": self.parse_http_date(headers.get("Last-Modified")),
             "page_checksum": checksum,
         })
         # Minimum content threshold after possible JS retry
         if len(result.text) < settings.crawler_min_content_chars:
             return CrawlResult(False, url=url, error=f"Extracted content too small ({len(result.text)} chars)")
 
+        if previous_checksum and checksum == previous_checksum:
+            logger.info(f"Content unchanged (checksum match): {url}")
+            result.not_modified = True
+
         return result
 
 
@@ -1,5 +1,5 @@
 import requests
-from typing import Dict
+from typing import Dict, Optional
 
 
 class RequestsFetcher:
@@ -9,8 +9,9 @@ class RequestsFetcher:
             "User-Agent": "ConvotCrawler/1.0 (+https://example.com)"
         }
 
-    def fetch(self, url: str) -> Dict:
-        resp = requests.get(url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        request_headers = {**self.headers, **headers} if headers else self.headers
+        resp = requests.get(url, headers=request_headers, timeout=self.timeout, allow_redirects=True)
         content_type = resp.headers.get("Content-Type", "")
         text = resp.text if "text/html" in content_type or content_type.startswith("text/") else ""
         return {
@@ -1,16 +1,80 @@
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import logging
+import threading
 from uuid import UUID
 
-from services.embeddings.base import EmbeddingProvider, TransientEmbeddingError, FatalEmbeddingError
+from services.embeddings.base import (
+    EmbeddingProvider,
+    TransientEmbeddingError,
+    RateLimitedEmbeddingError,
+    FatalEmbeddingError,
+)
+from services.embeddings.scheduler import (
+    AdaptiveConcurrency,
+    estimate_batch_tokens,
+    get_provider_limiter,
+    run_batches,
+)
 from config.settings import settings
+from core.cache import TTLCache
+from core.exceptions import DatabaseError
 from services.embeddings.openai_provider import OpenAIEmbeddingProvider
 from services.embeddings.gemini_provider import GeminiEmbeddingProvider
 from repositories.chunk_repo import ChunkRepository
+from repositories.embedding_cache_repo import EmbeddingCacheRepository
 
 logger = logging.getLogger(__name__)
 
 
+def _query_vector_size(key, vector) -> int:
+    # Python floats in a list cost ~32 bytes each (object + pointer)
+    return len(vector) * 32 + len(key[-1]) + 128
+
+
+# Process-wide cache for query embeddings, keyed by (provider, model, dimension, normalized text)
+query_embedding_cache = TTLCache(
+    name="query_embeddings",
+    ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+    max_entries=100_000,
+    max_bytes=settings.query_embedding_cache_max_bytes,
+    sizeof=_query_vector_size,
+)
+
+
+def normalize_query_text(query_text: str) -> str:
+    """Normalize query text for cache keys (case and whitespace insensitive)"""
+    return " ".join(query_text.split()).casefold()
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of chunk text (embedding cache key)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Per-source counters for the content-addressed embedding cache"""
+    texts: int = 0
+    cache_hits: int = 0
+    duplicates: int = 0
+    embedded: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, texts: int, cache_hits: int, duplicates: int, embedded: int) -> None:
+        with self._lock:
+            self.texts += texts
+            self.cache_hits += cache_hits
+            self.duplicates += duplicates
+            self.embedded += embedded
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of texts served without a provider call"""
+        return (self.texts - self.embedded) / self.texts if self.texts else 0.0
+
+
 class EmbeddingService:
     def __init__(
         self,
@@ -39,22 +103,26 @@ class EmbeddingService:
             ]
 
         self.repository = ChunkRepository(access_token=access_token)
+        self.cache_repository = EmbeddingCacheRepository() if settings.embedding_cache_enabled else None
 
     def _select_provider(self) -> List[EmbeddingProvider]:
         return self.providers
 
+    def _conform_vectors(self, provider: EmbeddingProvider, vectors: List[List[float]]) -> List[List[float]]:
+        # dimension guard
+        if any(len(v) != self.embedding_dimension for v in vectors):
+            logger.warning(
+                f"Provider {provider.name}:{provider.model} returned mismatched dimension; conforming"
+            )
+            vectors = [v[: self.embedding_dimension] for v in vectors]
+        return vectors
+
     def _embed_with_fallback(self, texts: List[str], user: Optional[str] = None) -> Tuple[List[List[float]], str]:
         last_error: Optional[Exception] = None
         for provider in self._select_provider():
             try:
                 vectors = provider.embed_texts(texts, user=user)
-                # dimension guard
-                if any(len(v) != self.embedding_dimension for v in vectors):
-                    logger.warning(
-                        f"Provider {provider.name}:{provider.model} returned mismatched dimension; conforming"
-                    )
-                    vectors = [v[: self.embedding_dimension] for v in vectors]
-                return vectors, provider.name
+                return self._conform_vectors(provider, vectors), provider.name
             except FatalEmbeddingError as e:
                 logger.error(f"Fatal error from {provider.name} embeddings: {e}")
                 last_error = e
@@ -70,33 +138,275 @@ class EmbeddingService:
                 continue
         raise TransientEmbeddingError(str(last_error) if last_error else "Embedding failed")
 
+    async def _embed_with_fallback_async(self, texts: List[str], user: Optional[str] = None) -> Tuple[List[List[float]], str]:
+        last_error: Optional[Exception] = None
+        for provider in self._select_provider():
+            try:
+                vectors = await provider.embed_texts_async(texts, user=user)
+                return self._conform_vectors(provider, vectors), provider.name
+            except FatalEmbeddingError as e:
+                logger.error(f"Fatal error from {provider.name} embeddings: {e}")
+                last_error = e
+                continue
+            except TransientEmbeddingError as e:
+                logger.warning(f"Transient error from {provider.name} embeddings: {e}; trying fallback")
+                last_error = e
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected error from {provider.name}: {e}")
+                last_error = e
+                continue
+        raise TransientEmbeddingError(str(last_error) if last_error else "Embedding failed")
+
+    def _embed_rate_limited(self, texts: List[str], concurrency: AdaptiveConcurrency) -> Tuple[List[List[float]], str]:
+        """
+        Ingestion variant of _embed_with_fallback.
+
+        Waits for the provider's rate limiter before each request. On a 429 it pauses
+        the provider for Retry-After (or an exponential backoff), reduces batch
+        concurrency and retries the same provider before falling back.
+        """
+        tokens = estimate_batch_tokens(texts)
+        last_error: Optional[Exception] = None
+        for provider in self._select_provider():
+            limiter = get_provider_limiter(provider.name)
+            for attempt in range(settings.embedding_rate_limit_retries + 1):
+                limiter.acquire(tokens)
+                try:
+                    vectors = provider.embed_texts(texts)
+                    concurrency.on_success()
+                    return self._conform_vectors(provider, vectors), provider.name
+                except RateLimitedEmbeddingError as e:
+                    last_error = e
+                    concurrency.on_throttle()
+                    delay = e.retry_after if e.retry_after is not None else min(60.0, 2.0 ** attempt)
+                    limiter.pause(delay)
+                    logger.warning(
+                        f"Rate limited by {provider.name} embeddings (attempt {attempt + 1}); retrying in {delay:.1f}s"
+                    )
+                    continue
+                except FatalEmbeddingError as e:
+                    logger.error(f"Fatal error from {provider.name} embeddings: {e}")
+                    last_error = e
+                    break
+                except TransientEmbeddingError as e:
+                    logger.warning(f"Transient error from {provider.name} embeddings: {e}; trying fallback")
+                    last_error = e
+                    break
+                except Exception as e:
+                    logger.error(f"Unexpected error from {provider.name}: {e}")
+                    last_error = e
+                    break
+        raise TransientEmbeddingError(str(last_error) if last_error else "Embedding failed")
+
+    def _embed_batch(
+        self,
+        texts: List[str],
+        concurrency: AdaptiveConcurrency,
+        stats: EmbeddingCacheStats,
+    ) -> Tuple[List[List[float]], str]:
+        """
+        Embed one ingestion batch through the content-addressed cache.
+
+        Identical texts in the batch are embedded once. Cached vectors are only
+        taken from the preferred provider/model, so a cache hit never mixes
+        vector spaces into a bot that is not already using a fallback.
+
+        Returns:
+            Tuple of (vectors in input order, provider_name or "cache")
+        """
+        hashes = [content_hash(t) for t in texts]
+        unique: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            unique.setdefault(h, t)
+
+        vectors_by_hash: Dict[str, List[float]] = {}
+        primary = self.providers[0]
+        if self.cache_repository is not None:
+            try:
+                vectors_by_hash = self.cache_repository.get_many(
+                    list(unique), primary.name, primary.model, self.embedding_dimension
+                )
+            except DatabaseError:
+                # Cache is an optimization; embed everything on read failure
+                vectors_by_hash = {}
+        cache_hits = len(vectors_by_hash)
+
+        misses = [h for h in unique if h not in vectors_by_hash]
+        provider_used = "cache"
+        if misses:
+            new_vectors, provider_used = self._embed_rate_limited([unique[h] for h in misses], concurrency)
+            vectors_by_hash.update(zip(misses, new_vectors))
+            if self.cache_repository is not None:
+                model = next(p.model for p in self.providers if p.name == provider_used)
+                try:
+                    self.cache_repository.put_many([
+                        {
+                            "content_hash": h,
+                            "provider": provider_used,
+                            "model": model,
+                            "dimension": self.embedding_dimension,
+                            "embedding": vectors_by_hash[h],
+                        }
+                        for h in misses
+                    ])
+                except DatabaseError:
+                    pass
+
+        stats.add(
+            texts=len(texts),
+            cache_hits=cache_hits,
+            duplicates=len(texts) - len(unique),
+            embedded=len(misses),
+        )
+        return [vectors_by_hash[h] for h in hashes], provider_used
+
+    def _log_cache_stats(self, source_id: UUID, stats: EmbeddingCacheStats) -> None:
+        if self.cache_repository is None:
+            return
+        logger.info(
+            f"Embedding cache: source_id={source_id}, texts={stats.texts}, cache_hits={stats.cache_hits}, "
+            f"duplicates={stats.duplicates}, embedded={stats.embedded}, hit_ratio={stats.hit_ratio:.1%}"
+        )
+
+    def _cached_query_vector(self, normalized: str) -> Optional[Tuple[List[float], str]]:
+        # Only the primary provider's vectors: once it is back after an outage,
+        # a cached fallback vector would be from a different vector space
+        primary = self._select_provider()[0]
+        cached = query_embedding_cache.get(
+            (primary.name, primary.model, self.embedding_dimension, normalized)
+        )
+        if cached is not None:
+            return cached, primary.name
+        return None
+
+    def _cache_query_vector(self, normalized: str, vector: List[float], provider_used: str) -> None:
+        primary = self._select_provider()[0]
+        if provider_used != primary.name:
+            # Fallback vectors are never looked up (see _cached_query_vector)
+            return
+        query_embedding_cache.set(
+            (primary.name, primary.model, self.embedding_dimension, normalized), vector
+        )
+
+    def embed_query(self, query_text: str, user: Optional[str] = None) -> Tuple[List[float], str]:
+        """
+        Embed a single query, consulting the process-wide query embedding cache first.
+
+        Cache entries are keyed per provider/model, and only the primary provider's
+        vectors are cached and looked up, so a vector embedded by the fallback
+        during an outage is never served once the primary is back.
+
+        Returns:
+            Tuple of (vector, provider_name)
+        """
+        normalized = normalize_query_text(query_text)
+        use_cache = settings.query_embedding_cache_enabled and bool(normalized)
+
+        if use_cache:
+            cached = self._cached_query_vector(normalized)
+            if cached is not None:
+                return cached
+
+        vectors, provider_used = self._embed_with_fallback([query_text], user=user)
+        vector = vectors[0]
+
+        if use_cache:
+            self._cache_query_vector(normalized, vector, provider_used)
+        return vector, provider_used
+
+    async def embed_query_async(self, query_text: str, user: Optional[str] = None) -> Tuple[List[float], str]:
+        """Async variant of embed_query (shares the same cache)"""
+        normalized = normalize_query_text(query_text)
+        use_cache = settings.query_embedding_cache_enabled and bool(normalized)
+
+        if use_cache:
+            cached = self._cached_query_vector(normalized)
+            if cached is not None:
+                return cached
+
+        vectors, provider_used = await self._embed_with_fallback_async([query_text], user=user)
+        vector = vectors[0]
+
+        if use_cache:
+            self._cache_query_vector(normalized, vector, provider_used)
+        return vector, provider_used
+
     def embed_chunks_for_source(self, source_id: UUID, texts: List[str], chunk_ids: List[UUID]) -> int:
         if not texts or not chunk_ids or len(texts) != len(chunk_ids):
             logger.warning("embed_chunks_for_source called with invalid inputs")
             return 0
 
-        total_updated = 0
         total = len(texts)
         total_batches = (total + self.batch_size - 1) // self.batch_size
-        logger.info(f"Embedding started: source_id={source_id}, chunks={total}, batch_size={self.batch_size}, batches={total_batches}")
-
-        for i in range(0, total, self.batch_size):
-            batch_num = (i // self.batch_size) + 1
-            batch_texts = texts[i : i + self.batch_size]
-            batch_ids = chunk_ids[i : i + self.batch_size]
-            logger.debug(
-                f"Processing batch {batch_num}/{total_batches} for source {source_id}: size={len(batch_texts)}"
-            )
+        concurrency = AdaptiveConcurrency(settings.embedding_max_concurrency)
+        cache_stats = EmbeddingCacheStats()
+        logger.info(
+            f"Embedding started: source_id={source_id}, chunks={total}, batch_size={self.batch_size}, "
+            f"batches={total_batches}, concurrency={concurrency.max_limit}"
+        )
 
-            vectors, provider_used = self._embed_with_fallback(batch_texts)
-            logger.debug(
-                f"Embedded batch {batch_num}/{total_batches} (size={len(batch_texts)}) using provider {provider_used}"
-            )
-            # Persist embeddings in batch
-            updated = self.repository.update_chunk_embeddings(batch_ids, vectors)
-            logger.debug(
-                f"Updated {updated}/{len(batch_ids)} chunk embeddings for batch {batch_num}/{total_batches}"
-            )
-            total_updated += updated
+        def _batch_job(i: int):
+            def _job() -> int:
+                batch_num = (i // self.batch_size) + 1
+                batch_texts = texts[i : i + self.batch_size]
+                batch_ids = chunk_ids[i : i + self.batch_size]
+                vectors, provider_used = self._embed_batch(batch_texts, concurrency, cache_stats)
+                # Persist embeddings in batch
+                updated = self.repository.update_chunk_embeddings(batch_ids, vectors)
+                logger.debug(
+                    f"Updated {updated}/{len(batch_ids)} chunk embeddings for batch {batch_num}/{total_batches} using provider {provider_used}"
+                )
+                return updated
+            return _job
+
+        results = run_batches([_batch_job(i) for i in range(0, total, self.batch_size)], concurrency)
+        total_updated = sum(results)
+        self._log_cache_stats(source_id, cache_stats)
         logger.info(f"Embedding completed: source_id={source_id}, updated={total_updated}/{total}")
         return total_updated
+
+    def embed_and_store_chunks(self, source_id: UUID, chunk_rows: List[dict]) -> int:
+        """
+        Embed chunk rows and insert them with their vectors, one insert per batch.
+
+        Each chunk is written once, already carrying its embedding, so there is no
+        window where stored chunks are missing from vector search.
+
+        Args:
+            source_id: Source UUID (for logging)
+            chunk_rows: Rows from ChunkService.build_chunk_rows (mutated: "embedding" is set)
+
+        Returns:
+            Number of chunks stored
+        """
+        total = len(chunk_rows)
+        total_batches = (total + self.batch_size - 1) // self.batch_size
+        concurrency = AdaptiveConcurrency(settings.embedding_max_concurrency)
+        cache_stats = EmbeddingCacheStats()
+        logger.info(
+            f"Embedding started: source_id={source_id}, chunks={total}, batch_size={self.batch_size}, "
+            f"batches={total_batches}, concurrency={concurrency.max_limit}, mode=single_write"
+        )
+
+        def _batch_job(i: int):
+            def _job() -> int:
+                batch_num = (i // self.batch_size) + 1
+                batch_rows = chunk_rows[i : i + self.batch_size]
+                vectors, provider_used = self._embed_batch(
+                    [r.get("excerpt", "") for r in batch_rows], concurrency, cache_stats
+                )
+                for row, vec in zip(batch_rows, vectors):
+                    row["embedding"] = vec
+                stored = self.repository.insert_chunks(batch_rows)
+                logger.debug(
+                    f"Stored batch {batch_num}/{total_batches} (size={len(batch_rows)}) using provider {provider_used}"
+                )
+                return stored
+            return _job
+
+        results = run_batches([_batch_job(i) for i in range(0, total, self.batch_size)], concurrency)
+        total_stored = sum(results)
+        self._log_cache_stats(source_id, cache_stats)
+        logger.info(f"Embedding completed: source_id={source_id}, stored={total_stored}/{total}")
+        return total_stored
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
+import asyncio
 
 
 class EmbeddingError(Exception):
@@ -10,6 +11,14 @@ class TransientEmbeddingError(EmbeddingError):
     """Errors that may succeed on retry (e.g., rate limit)."""
 
 
+class RateLimitedEmbeddingError(TransientEmbeddingError):
+    """Provider throttled the request (HTTP 429 / quota exhausted)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class FatalEmbeddingError(EmbeddingError):
     """Errors that should not be retried (e.g., invalid key)."""
 
@@ -39,3 +48,11 @@ class EmbeddingProvider(ABC):
         Must return one vector per input text.
         """
         raise NotImplementedError
+
+    async def embed_texts_async(self, texts: List[str], *, user: Optional[str] = None) -> List[List[float]]:
+        """
+        Async variant of embed_texts.
+        Providers with a native async SDK override this; the default runs the
+        blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.embed_texts, texts, user=user)
@@ -1,23 +1,41 @@
-import os
+import asyncio
 import logging
 from typing import List, Optional
 
+from services.provider_clients import ProviderNotConfigured, get_genai, gemini_model_id
 from services.embeddings.base import (
     EmbeddingProvider,
     TransientEmbeddingError,
+    RateLimitedEmbeddingError,
     FatalEmbeddingError,
 )
 
 logger = logging.getLogger(__name__)
 
+# batchEmbedContents accepts at most 100 requests per call
+MAX_BATCH_TEXTS = 100
+# Keep each call's payload well under the API request size limit
+MAX_BATCH_CHARS = 250_000
+
+# Native output dimension per model; all of these accept output_dimensionality
+# (Matryoshka embeddings) for smaller vectors
+NATIVE_DIMENSIONS = {
+    "gemini-embedding-001": 3072,
+    "text-embedding-004": 768,
+    "text-embedding-005": 768,
+    "text-multilingual-embedding-002": 768,
+}
+
 
 class GeminiEmbeddingProvider(EmbeddingProvider):
     def __init__(self, model: str = "text-embedding-004", target_dimension: int = 1536, on_mismatch: str = "truncate"):
         self._model = model
         self._target_dimension = target_dimension
         self._on_mismatch = on_mismatch
-        # text-embedding-004 returns 3072 dims
-        self._dimension = 3072 if model == "text-embedding-004" else target_dimension
+        native = NATIVE_DIMENSIONS.get(model.split("/")[-1])
+        # Ask the API for the target size instead of truncating locally
+        self._output_dimensionality = target_dimension if native and target_dimension < native else None
+        self._dimension = min(native, target_dimension) if native else target_dimension
 
     @property
     def name(self) -> str:
@@ -41,40 +59,97 @@ class GeminiEmbeddingProvider(EmbeddingProvider):
         # default truncate
         return vec[: self._target_dimension]
 
+    @staticmethod
+    def _batches(texts: List[str]) -> List[List[str]]:
+        """Split texts into batchEmbedContents calls within count and size limits"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_chars = 0
+        for t in texts:
+            if current and (len(current) >= MAX_BATCH_TEXTS or current_chars + len(t) > MAX_BATCH_CHARS):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(t)
+            current_chars += len(t)
+        if current:
+            batches.append(current)
+        return batches
+
     def embed_texts(self, texts: List[str], *, user: Optional[str] = None) -> List[List[float]]:
         try:
-            import google.generativeai as genai
+            genai = get_genai()
+        except ProviderNotConfigured as e:
+            raise FatalEmbeddingError(str(e))
+
+        if not texts:
+            return []
+
+        try:
+            model_id = gemini_model_id(self._model)
+            vectors: List[List[float]] = []
+            for batch in self._batches(texts):
+                # A list of contents is sent as one batchEmbedContents request
+                res = genai.embed_content(
+                    model=model_id,
+                    content=batch,
+                    output_dimensionality=self._output_dimensionality,
+                )
+                vectors.extend(self._extract_vectors(res, len(batch)))
+            return vectors
         except Exception as e:
-            raise FatalEmbeddingError(f"Google Generative AI SDK not available: {e}")
+            raise self._classify_error(e)
 
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise FatalEmbeddingError("Missing GOOGLE_API_KEY/GEMINI_API_KEY")
+    async def embed_texts_async(self, texts: List[str], *, user: Optional[str] = None) -> List[List[float]]:
+        try:
+            genai = get_genai()
+        except ProviderNotConfigured as e:
+            raise FatalEmbeddingError(str(e))
 
         if not texts:
             return []
 
         try:
-            genai.configure(api_key=api_key)
-            # Ensure model id is in the correct form for the SDK
-            model_id = self._model if self._model.startswith("models/") else f"models/{self._model}"
-            # Batch by looping; embed_content is per-text
+            model_id = gemini_model_id(self._model)
+            batches = self._batches(texts)
+            results = await asyncio.gather(
+                *(
+                    genai.embed_content_async(
+                        model=model_id,
+                        content=batch,
+                        output_dimensionality=self._output_dimensionality,
+                    )
+                    for batch in batches
+                )
+            )
             vectors: List[List[float]] = []
-            for t in texts:
-                res = genai.embed_content(model=model_id, content=t)
-                raw = res.get("embedding") or res.get("data", [{}])[0].get("embedding")
-                if isinstance(raw, dict) and "values" in raw:
-                    vec = raw["values"]
-                else:
-                    vec = raw
-                if not isinstance(vec, list):
-                    raise TransientEmbeddingError("Invalid embedding response from Gemini")
-                vectors.append(self._conform_dimension(vec))
+            for batch, res in zip(batches, results):
+                vectors.extend(self._extract_vectors(res, len(batch)))
             return vectors
         except Exception as e:
-            message = str(e).lower()
-            if any(t in message for t in ["rate", "quota", "temporar", "try again", "timeout"]):
-                raise TransientEmbeddingError(str(e))
-            if any(t in message for t in ["api key", "invalid", "unauthorized", "forbidden"]):
-                raise FatalEmbeddingError(str(e))
-            raise TransientEmbeddingError(str(e))
+            raise self._classify_error(e)
+
+    def _extract_vectors(self, res, expected: int) -> List[List[float]]:
+        raw = res.get("embedding") if isinstance(res, dict) else None
+        if not isinstance(raw, list) or len(raw) != expected:
+            raise TransientEmbeddingError("Invalid batch embedding response from Gemini")
+        vectors: List[List[float]] = []
+        for item in raw:
+            vec = item["values"] if isinstance(item, dict) and "values" in item else item
+            if not isinstance(vec, list):
+                raise TransientEmbeddingError("Invalid embedding response from Gemini")
+            vectors.append(self._conform_dimension(vec))
+        return vectors
+
+    @staticmethod
+    def _classify_error(e: Exception) -> Exception:
+        if isinstance(e, (TransientEmbeddingError, FatalEmbeddingError)):
+            return e
+        message = str(e).lower()
+        # google.api_core ResourceExhausted (429); the SDK does not expose Retry-After
+        if getattr(e, "code", None) == 429 or "resource exhausted" in message or "429" in message:
+            return RateLimitedEmbeddingError(str(e))
+        if any(t in message for t in ["rate", "quota", "temporar", "try again", "timeout"]):
+            return TransientEmbeddingError(str(e))
+        if any(t in message for t in ["api key", "invalid", "unauthorized", "forbidden"]):
+            return FatalEmbeddingError(str(e))
+        return TransientEmbeddingError(str(e))
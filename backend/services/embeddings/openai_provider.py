@@ -1,10 +1,11 @@
-import os
 import logging
 from typing import List, Optional
 
+from services.provider_clients import ProviderNotConfigured, get_openai_client, get_async_openai_client
 from services.embeddings.base import (
     EmbeddingProvider,
     TransientEmbeddingError,
+    RateLimitedEmbeddingError,
     FatalEmbeddingError,
 )
 
@@ -37,19 +38,14 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
 
     def embed_texts(self, texts: List[str], *, user: Optional[str] = None) -> List[List[float]]:
         try:
-            from openai import OpenAI
-        except Exception as e:
-            raise FatalEmbeddingError(f"OpenAI SDK not available: {e}")
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise FatalEmbeddingError("Missing OPENAI_API_KEY")
+            client = get_openai_client()
+        except ProviderNotConfigured as e:
+            raise FatalEmbeddingError(str(e))
 
         if not texts:
             return []
 
         try:
-            client = OpenAI(api_key=api_key)
             response = client.embeddings.create(
                 model=self._model,
                 input=texts,
@@ -58,10 +54,50 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             vectors = [item.embedding for item in response.data]
             return vectors
         except Exception as e:
-            message = str(e).lower()
-            if any(t in message for t in ["rate", "overloaded", "timeout", "temporar", "try again"]):
-                raise TransientEmbeddingError(str(e))
-            if any(t in message for t in ["api key", "invalid", "unauthorized", "forbidden"]):
-                raise FatalEmbeddingError(str(e))
-            # default transient to allow fallback
-            raise TransientEmbeddingError(str(e))
+            raise self._classify_error(e)
+
+    async def embed_texts_async(self, texts: List[str], *, user: Optional[str] = None) -> List[List[float]]:
+        try:
+            client = get_async_openai_client()
+        except ProviderNotConfigured as e:
+            raise FatalEmbeddingError(str(e))
+
+        if not texts:
+            return []
+
+        try:
+            response = await client.embeddings.create(
+                model=self._model,
+                input=texts,
+                user=user,
+            )
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            raise self._classify_error(e)
+
+    @staticmethod
+    def _retry_after(e: Exception) -> Optional[float]:
+        """Seconds from Retry-After / retry-after-ms headers of a 429 response"""
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if not headers:
+            return None
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    @classmethod
+    def _classify_error(cls, e: Exception) -> Exception:
+        if getattr(e, "status_code", None) == 429:
+            return RateLimitedEmbeddingError(str(e), retry_after=cls._retry_after(e))
+        message = str(e).lower()
+        if any(t in message for t in ["rate", "overloaded", "timeout", "temporar", "try again"]):
+            return TransientEmbeddingError(str(e))
+        if any(t in message for t in ["api key", "invalid", "unauthorized", "forbidden"]):
+            return FatalEmbeddingError(str(e))
+        # default transient to allow fallback
+        return TransientEmbeddingError(str(e))
@@ -0,0 +1,188 @@
+"""
+Embedding Scheduler
+
+Runs ingestion embedding batches concurrently within provider quotas.
+
+- ProviderRateLimiter: token buckets for requests/min and tokens/min per
+  provider, shared process-wide, plus a pause honoured by every caller after a
+  429 with Retry-After.
+- AdaptiveConcurrency: AIMD limit on in-flight batches (halved on throttling,
+  raised by one after a run of successes).
+- run_batches: executes batch jobs on a thread pool under both controls and
+  stops at the first failure.
+
+Only ingestion goes through the limiter; query embeddings are latency-bound
+and never wait behind a backlog of document batches.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+import logging
+import threading
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            # Requests larger than the bucket are allowed once it is full
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate_per_second
+
+
+class ProviderRateLimiter:
+    """Requests/min and tokens/min limits for one embedding provider (0 = unlimited)"""
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request carrying `tokens` input tokens may be sent"""
+        wait_seconds = max(
+            self._requests.reserve(1) if self._requests else 0.0,
+            self._tokens.reserve(tokens) if self._tokens else 0.0,
+            self._paused_until - time.monotonic(),
+        )
+        if wait_seconds > 0:
+            logger.debug(f"Embedding rate limit: provider={self.name}, waiting {wait_seconds:.2f}s")
+            time.sleep(wait_seconds)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all callers for `seconds` (e.g. from a Retry-After header)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on concurrent batches: halve on throttling, +1 after `increase_after` successes"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, increase_after: int = 5):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.increase_after = increase_after
+        self.limit = self.max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self._successes = 0
+            new_limit = max(self.min_limit, self.limit // 2)
+            if new_limit != self.limit:
+                logger.info(f"Embedding concurrency reduced: {self.limit} -> {new_limit}")
+                self.limit = new_limit
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(provider_name: str) -> ProviderRateLimiter:
+    """Process-wide rate limiter for a provider, configured from settings"""
+    limiter = _limiters.get(provider_name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider_name)
+            if limiter is None:
+                limiter = ProviderRateLimiter(
+                    provider_name,
+                    requests_per_minute=getattr(settings, f"embedding_{provider_name}_rpm", 0),
+                    tokens_per_minute=getattr(settings, f"embedding_{provider_name}_tpm", 0),
+                )
+                _limiters[provider_name] = limiter
+    return limiter
+
+
+def estimate_batch_tokens(texts: Sequence[str]) -> int:
+    """Cheap input-token estimate for rate limiting (~4 characters per token)"""
+    return sum(len(t) // 4 + 1 for t in texts)
+
+
+def run_batches(
+    jobs: Sequence[Callable[[], T]],
+    concurrency: AdaptiveConcurrency,
+) -> List[T]:
+    """
+    Run batch jobs concurrently under an adaptive concurrency limit.
+
+    Results are returned in job order. The first failure stops jobs that have not
+    started yet and is re-raised once in-flight jobs finish.
+    """
+    if not jobs:
+        return []
+    if concurrency.max_limit == 1 or len(jobs) == 1:
+        return [job() for job in jobs]
+
+    failed = threading.Event()
+
+    def _run(job: Callable[[], T]) -> Optional[T]:
+        concurrency.acquire()
+        try:
+            if failed.is_set():
+                return None
+            return job()
+        except BaseException:
+            failed.set()
+            raise
+        finally:
+            concurrency.release()
+
+    with ThreadPoolExecutor(max_workers=min(concurrency.max_limit, len(jobs)), thread_name_prefix="embed") as pool:
+        futures = [pool.submit(_run, job) for job in jobs]
+        wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future.done() and future.exception() is not None:
+                for pending in futures:
+                    pending.cancel()
+                raise future.exception()
+        return [future.result() for future in futures]
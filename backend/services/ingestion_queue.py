@@ -0,0 +1,155 @@
+"""
+Ingestion Queue
+
+API side of the durable ingestion queue (ingestion_jobs table). The upload,
+URL and refresh endpoints only enqueue jobs here; parsing, chunking and
+embedding run in separate worker processes (worker.py, see
+services/ingestion_worker.py), so they don't compete with query traffic.
+
+Workers can't reach this process's semantic answer cache, so a background
+loop polls for jobs that finished since its last check and invalidates the
+answer cache of their bots. finished_at is set by the database before the
+finishing transaction commits, so a job can become visible after one with a
+later finished_at; each check therefore re-reads a window behind the newest
+finished_at seen and skips the job ids it has already handled.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+import asyncio
+import logging
+
+from config.settings import settings
+from repositories.ingestion_job_repo import IngestionJobRepository
+from services.answer_cache import answer_cache
+
+logger = logging.getLogger(__name__)
+
+
+class TransientIngestionError(Exception):
+    """A job failure worth retrying (download, crawl, embedding or database error)"""
+
+
+class IngestionQueue:
+    """Enqueues ingestion jobs and watches for finished ones"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        poll_interval_seconds: float = 5.0,
+        finished_overlap_seconds: float = 60.0,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            max_attempts: Attempts per job before it fails
+            poll_interval_seconds: How often finished jobs are checked for
+                answer cache invalidation
+            finished_overlap_seconds: How far behind the newest finished_at
+                seen each check looks again, for jobs that committed late
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.finished_overlap = timedelta(seconds=max(0.0, finished_overlap_seconds))
+        self._repo: Optional[IngestionJobRepository] = None
+        self._task: Optional[asyncio.Task] = None
+        # Newest finished_at seen (database clock); set from the database on the first check
+        self._finished_cursor: Optional[datetime] = None
+        self._cursor_ready = False
+        # Job ids already handled that are still inside the overlap window
+        self._seen_jobs: Dict[str, datetime] = {}
+
+    @property
+    def repo(self) -> IngestionJobRepository:
+        if self._repo is None:
+            self._repo = IngestionJobRepository()
+        return self._repo
+
+    def enqueue_parse(self, source_id: UUID, bot_id: UUID) -> int:
+        """Queue a new source for parsing, chunking and embedding; returns jobs added"""
+        added = self.repo.enqueue_jobs(
+            [{"source_id": str(source_id), "bot_id": str(bot_id), "kind": "parse"}],
+            self.max_attempts,
+        )
+        logger.info(f"Ingestion job queued: kind=parse, source_id={source_id}, bot_id={bot_id}")
+        return added
+
+    def enqueue_refresh(self, source_ids: List[UUID], bot_id: UUID) -> int:
+        """
+        Queue conditional re-crawls of URL sources; sources that already have a
+        refresh queued are skipped. Returns jobs added.
+        """
+        added = self.repo.enqueue_jobs(
+            [{"source_id": str(source_id), "bot_id": str(bot_id), "kind": "refresh"} for source_id in source_ids],
+            self.max_attempts,
+        )
+        logger.info(f"Ingestion jobs queued: kind=refresh, bot_id={bot_id}, added={added}/{len(source_ids)}")
+        return added
+
+    def start(self) -> None:
+        """Start the finished-job watch loop (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def invalidate_finished(self, page_size: int = 1000) -> int:
+        """Drop cached answers of bots whose jobs finished since the last check; returns new jobs seen"""
+        if not self._cursor_ready:
+            # Jobs finished before the API started can't have cached answers to drop
+            last = await asyncio.to_thread(self.repo.get_last_finished_at)
+            self._finished_cursor = _parse_timestamp(last) if last else None
+            self._cursor_ready = True
+
+        since = None
+        if self._finished_cursor is not None:
+            since = (self._finished_cursor - self.finished_overlap).isoformat()
+        jobs: List[dict] = []
+        while True:
+            page = await asyncio.to_thread(self.repo.get_finished_jobs, since, page_size, len(jobs))
+            jobs.extend(page)
+            if len(page) < page_size:
+                break
+
+        new_jobs = [job for job in jobs if str(job["id"]) not in self._seen_jobs]
+        for bot_id in {job["bot_id"] for job in new_jobs}:
+            answer_cache.invalidate_bot(str(bot_id))
+        for job in new_jobs:
+            finished_at = _parse_timestamp(job["finished_at"])
+            self._seen_jobs[str(job["id"])] = finished_at
+            if self._finished_cursor is None or finished_at > self._finished_cursor:
+                self._finished_cursor = finished_at
+
+        # Jobs behind the window won't be read again
+        if self._finished_cursor is not None:
+            horizon = self._finished_cursor - self.finished_overlap
+            self._seen_jobs = {job_id: t for job_id, t in self._seen_jobs.items() if t > horizon}
+        return len(new_jobs)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval_seconds)
+            try:
+                await self.invalidate_finished()
+            except Exception as e:
+                logger.warning(f"Finished ingestion job check failed: error={str(e)}")
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+ingestion_queue = IngestionQueue(
+    max_attempts=settings.ingestion_job_max_attempts,
+    poll_interval_seconds=settings.ingestion_invalidation_poll_seconds,
+)
@@ -0,0 +1,171 @@
+"""
+Ingestion Worker
+
+Runs jobs from the durable ingestion queue (ingestion_jobs table) in a
+process of its own, so parsing and embedding don't compete with query traffic
+in the API. Start it with `python worker.py`; any number of worker processes
+can run side by side, since jobs are claimed with FOR UPDATE SKIP LOCKED.
+
+Each of the worker's threads claims and runs one job at a time. A heartbeat
+thread renews the lease on running jobs; if the process dies, the lease lapses
+and another worker claims the job again. Transient failures are retried with
+exponential backoff up to INGESTION_JOB_MAX_ATTEMPTS. A retry resumes rather
+than restarts: chunks stored by the earlier attempt are kept, and the next
+attempt re-indexes incrementally, embedding only what is still missing. If the
+last attempt fails too, the chunks of a source that was never indexed are
+removed.
+"""
+
+from typing import Optional, Set
+from uuid import UUID
+import logging
+import os
+import random
+import socket
+import threading
+import time
+
+from repositories.ingestion_job_repo import IngestionJobRepository
+from services.ingestion_queue import TransientIngestionError
+from services.parsing_service import ParsingService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """Claims and runs ingestion jobs with a fixed number of threads"""
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = 600,
+        poll_interval_seconds: float = 2.0,
+        retry_base_seconds: float = 30.0,
+        retry_max_seconds: float = 900.0,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            concurrency: Jobs run at the same time (one thread each)
+            worker_id: Name recorded on claimed jobs (default: host:pid)
+            lease_seconds: How long a claimed job stays with this worker
+                without a heartbeat before others may claim it
+            poll_interval_seconds: Idle wait between claims when the queue is empty
+            retry_base_seconds: Delay before the first retry; doubles per attempt
+            retry_max_seconds: Cap on the retry delay
+        """
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = max(30, lease_seconds)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.repo = IngestionJobRepository()
+        self._stopping = threading.Event()
+        self._running: Set[str] = set()
+        self._running_lock = threading.Lock()
+
+    def run(self) -> None:
+        """Run until stop() is called; running jobs are finished first"""
+        logger.info(f"Ingestion worker started: worker_id={self.worker_id}, concurrency={self.concurrency}")
+        heartbeat = threading.Thread(target=self._heartbeat, name="ingestion-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._work, name=f"ingestion-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.info(f"Ingestion worker stopped: worker_id={self.worker_id}")
+
+    def stop(self) -> None:
+        """Stop claiming jobs (running ones finish)"""
+        if not self._stopping.is_set():
+            logger.info(f"Ingestion worker stopping: worker_id={self.worker_id}")
+        self._stopping.set()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                jobs = self.repo.claim_jobs(self.worker_id, 1, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Job claim failed: worker_id={self.worker_id}, error={str(e)}")
+                jobs = []
+            if not jobs:
+                self._stopping.wait(self.poll_interval_seconds)
+                continue
+
+            job = jobs[0]
+            with self._running_lock:
+                self._running.add(job["id"])
+            try:
+                self._run_job(job)
+            except Exception as e:
+                # Bookkeeping failed; the lease lapses and the job is claimed again
+                logger.error(f"Job bookkeeping failed: job_id={job['id']}, error={str(e)}", exc_info=True)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job["id"])
+
+    def _run_job(self, job: dict) -> None:
+        job_id = job["id"]
+        kind = job.get("kind", "parse")
+        source_id = UUID(job["source_id"])
+        bot_id = UUID(job["bot_id"])
+        attempts = int(job.get("attempts") or 1)
+        max_attempts = int(job.get("max_attempts") or 1)
+        logger.info(
+            f"Job started: job_id={job_id}, kind={kind}, source_id={source_id}, "
+            f"attempt={attempts}/{max_attempts}, stage={job.get('stage')}"
+        )
+
+        try:
+            if kind == "refresh":
+                # Not retried: the source stays searchable and the next refresh tries again
+                ok = ParsingService().refresh_source(source_id, bot_id)
+            else:
+                service = ParsingService(
+                    retry_transient_errors=attempts < max_attempts,
+                    on_stage=lambda stage: self.repo.set_stage(job_id, self.worker_id, stage),
+                )
+                ok = service.parse_source(source_id, bot_id)
+        except TransientIngestionError as e:
+            delay = self._retry_delay(attempts)
+            self.repo.retry_job(job_id, self.worker_id, str(e), delay)
+            logger.warning(
+                f"Job failed, retrying: job_id={job_id}, source_id={source_id}, "
+                f"attempt={attempts}/{max_attempts}, retry_in={delay:.0f}s, error={str(e)}"
+            )
+            return
+        except Exception as e:
+            logger.error(f"Job error: job_id={job_id}, source_id={source_id}, error={str(e)}", exc_info=True)
+            self.repo.fail_job(job_id, self.worker_id, str(e))
+            return
+
+        if ok:
+            self.repo.complete_job(job_id, self.worker_id)
+            logger.info(f"Job completed: job_id={job_id}, kind={kind}, source_id={source_id}")
+        else:
+            self.repo.fail_job(job_id, self.worker_id, "Source could not be indexed (see the source's error_message)")
+            logger.warning(f"Job failed: job_id={job_id}, kind={kind}, source_id={source_id}")
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter, so retries of a bulk upload spread out"""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * (2 ** max(attempts - 1, 0)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _heartbeat(self) -> None:
+        # Daemon thread: keeps renewing while jobs drain after stop(), ends with the process
+        interval = self.lease_seconds / 3
+        while True:
+            time.sleep(interval)
+            with self._running_lock:
+                job_ids = list(self._running)
+            try:
+                self.repo.renew_leases(self.worker_id, job_ids)
+            except Exception as e:
+                logger.warning(f"Lease renewal failed: worker_id={self.worker_id}, error={str(e)}")
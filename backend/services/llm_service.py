@@ -1,12 +1,29 @@
-from typing import Optional
-import os
+from typing import Optional, Dict, Any, AsyncIterator
 import logging
 
 from config.settings import settings
+from services.provider_clients import get_openai_client, get_async_openai_client, get_gemini_model
 
 logger = logging.getLogger(__name__)
 
 
+def _openai_usage(usage) -> Dict[str, Optional[int]]:
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) if usage else None,
+        "completion_tokens": getattr(usage, "completion_tokens", None) if usage else None,
+        "total_tokens": getattr(usage, "total_tokens", None) if usage else None,
+    }
+
+
+def _gemini_usage(um) -> Dict[str, Optional[int]]:
+    # usage_metadata fields: prompt_token_count, candidates_token_count, total_token_count
+    return {
+        "prompt_tokens": getattr(um, "prompt_token_count", None) if um else None,
+        "completion_tokens": getattr(um, "candidates_token_count", None) if um else None,
+        "total_tokens": getattr(um, "total_token_count", None) if um else None,
+    }
+
+
 class LLMService:
     def __init__(
         self,
@@ -18,49 +35,127 @@ class LLMService:
         self.openai_model = openai_model
         self.gemini_model = gemini_model
 
+    @property
+    def preferred_model(self) -> str:
+        """Chat model of the preferred provider (the one prompts are budgeted for)"""
+        return self.openai_model if self.preferred == "openai" else self.gemini_model
+
     def _generate_openai(self, prompt: str):
-        try:
-            from openai import OpenAI
-        except Exception as e:
-            raise RuntimeError(f"OpenAI SDK not available: {e}")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("Missing OPENAI_API_KEY")
-        client = OpenAI(api_key=api_key)
+        client = get_openai_client()
         resp = client.chat.completions.create(
             model=self.openai_model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.2,
         )
         text = resp.choices[0].message.content or ""
-        usage = getattr(resp, "usage", None)
-        usage_out = {
-            "prompt_tokens": getattr(usage, "prompt_tokens", None) if usage else None,
-            "completion_tokens": getattr(usage, "completion_tokens", None) if usage else None,
-            "total_tokens": getattr(usage, "total_tokens", None) if usage else None,
-        }
-        return text, usage_out
+        return text, _openai_usage(getattr(resp, "usage", None))
 
     def _generate_gemini(self, prompt: str):
-        try:
-            import google.generativeai as genai
-        except Exception as e:
-            raise RuntimeError(f"Google Generative AI SDK not available: {e}")
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise RuntimeError("Missing GOOGLE_API_KEY/GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(self.gemini_model)
+        model = get_gemini_model(self.gemini_model)
         resp = model.generate_content(prompt)
         text = (getattr(resp, "text", None) or resp.candidates[0].content.parts[0].text)
-        um = getattr(resp, "usage_metadata", None)
-        # usage_metadata fields: prompt_token_count, candidates_token_count, total_token_count
-        usage_out = {
-            "prompt_tokens": getattr(um, "prompt_token_count", None) if um else None,
-            "completion_tokens": getattr(um, "candidates_token_count", None) if um else None,
-            "total_tokens": getattr(um, "total_token_count", None) if um else None,
-        }
-        return text, usage_out
+        return text, _gemini_usage(getattr(resp, "usage_metadata", None))
+
+    async def _generate_openai_async(self, prompt: str):
+        client = get_async_openai_client()
+        resp = await client.chat.completions.create(
+            model=self.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+        )
+        text = resp.choices[0].message.content or ""
+        return text, _openai_usage(getattr(resp, "usage", None))
+
+    async def _generate_gemini_async(self, prompt: str):
+        model = get_gemini_model(self.gemini_model)
+        resp = await model.generate_content_async(prompt)
+        text = (getattr(resp, "text", None) or resp.candidates[0].content.parts[0].text)
+        return text, _gemini_usage(getattr(resp, "usage_metadata", None))
+
+    async def _stream_openai(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        client = get_async_openai_client()
+        stream = await client.chat.completions.create(
+            model=self.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        usage = None
+        async for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield {"type": "token", "text": delta}
+            # The final chunk carries usage (and no choices) when include_usage is set
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+        yield {"type": "usage", "usage": _openai_usage(usage)}
+
+    async def _stream_gemini(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        model = get_gemini_model(self.gemini_model)
+        resp = await model.generate_content_async(prompt, stream=True)
+        um = None
+        async for chunk in resp:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety/finish metadata only)
+                text = ""
+            if text:
+                yield {"type": "token", "text": text}
+            um = getattr(chunk, "usage_metadata", None) or um
+        yield {"type": "usage", "usage": _gemini_usage(um)}
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a completion as it is generated.
+
+        Yields {"type": "token", "text": ...} events followed by a single
+        {"type": "done", "usage": {...}, "provider": ...} event. Falls back to the
+        other provider only if the preferred one fails before emitting any token.
+        """
+        providers = [self.preferred, "openai" if self.preferred == "gemini" else "gemini"]
+        last_err: Optional[Exception] = None
+        for p in providers:
+            started = False
+            try:
+                stream = self._stream_openai(prompt) if p == "openai" else self._stream_gemini(prompt)
+                usage = {}
+                async for event in stream:
+                    if event["type"] == "usage":
+                        usage = event["usage"]
+                        continue
+                    started = True
+                    yield event
+                yield {"type": "done", "usage": usage, "provider": p}
+                return
+            except Exception as e:
+                if started:
+                    # Tokens already reached the client; a fallback would duplicate output
+                    raise
+                logger.warning(f"LLM provider {p} failed to stream: {e}")
+                last_err = e
+                continue
+        raise RuntimeError(str(last_err) if last_err else "LLM generation failed")
+
+    async def generate_async(self, prompt: str):
+        """Async variant of generate(); returns (text, usage, provider)"""
+        providers = [self.preferred, "openai" if self.preferred == "gemini" else "gemini"]
+        last_err: Optional[Exception] = None
+        for p in providers:
+            try:
+                if p == "openai":
+                    text, usage = await self._generate_openai_async(prompt)
+                    return text, usage, "openai"
+                else:
+                    text, usage = await self._generate_gemini_async(prompt)
+                    return text, usage, "gemini"
+            except Exception as e:
+                logger.warning(f"LLM provider {p} failed: {e}")
+                last_err = e
+                continue
+        raise RuntimeError(str(last_err) if last_err else "LLM generation failed")
 
     def generate(self, prompt: str):
         providers = [self.preferred, "openai" if self.preferred == "gemini" else "gemini"]
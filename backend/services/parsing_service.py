@@ -6,41 +6,69 @@ Coordinates between parsers, storage, and source repository.
 Handles parsing asynchronously with proper error handling and status updates.
 """
 
-from typing import Optional
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, List, Optional
 from uuid import UUID
 import logging
+import os
+import tempfile
+import httpx
+from config.settings import settings
 from config.supabasedb import get_supabase_client
 from parsers.factory import ParserFactory
-from parsers.base import ParseResult
+from parsers.exceptions import ParsingFailedError
 from repositories.source_repo import SourceRepository
-from services.chunk_service import ChunkService
+from services.chunk_service import ChunkService, DIFF_COLUMNS, diff_chunks
+from services.answer_cache import answer_cache
+from services.ingestion_queue import TransientIngestionError
+from core.exceptions import NotFoundError
 from models.source_model import SourceStatus, SourceType
 
 logger = logging.getLogger(__name__)
 
+# Source files are downloaded through a short-lived signed URL, streamed to disk
+DOWNLOAD_URL_TTL_SECONDS = 300
+DOWNLOAD_TIMEOUT_SECONDS = 60.0
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
 
 class ParsingService:
     """
     Service for orchestrating document parsing operations.
     
     This service:
-    - Downloads files from storage
+    - Downloads files from storage (streamed to disk)
     - Selects appropriate parser
     - Extracts text and metadata
     - Updates source status
     - Handles errors gracefully
     """
     
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        retry_transient_errors: bool = False,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ):
         """
         Initialize parsing service.
         
         Args:
             access_token: User's JWT token for RLS-enabled operations
+                (None: service role, as in the ingestion worker)
+            retry_transient_errors: Raise TransientIngestionError for failures
+                worth retrying (download, crawl, embedding, database) instead of
+                marking the source failed; chunks stored so far are kept so the
+                retry resumes from them
+            on_stage: Called with each pipeline stage reached (download, index, finalize)
         """
         self.access_token = access_token
+        self.retry_transient_errors = retry_transient_errors
+        self.on_stage = on_stage
         self.parser_factory = ParserFactory()
-        self.source_repo = SourceRepository(access_token=access_token)
+        # No user session in the ingestion worker: service role, like ChunkRepository
+        self.source_repo = SourceRepository(access_token=access_token, use_service_role=access_token is None)
         self.chunk_service = ChunkService(access_token=access_token)
         self.storage_client = get_supabase_client(use_service_role=True)
 
@@ -68,11 +96,11 @@ class ParsingService:
         
         This method:
         1. Fetches source metadata
-        2. Downloads file from storage (if file source)
-        3. Selects appropriate parser
-        4. Extracts text
+        2. Selects appropriate parser (if file source)
+        3. Streams the file from storage to a temporary file
+        4. Extracts text page by page, chunking, embedding and storing it
+           in rolling batches
         5. Updates source status
-        6. Stores extracted text (to be used in Phase 5 for chunking)
         
         Args:
             source_id: Source UUID
@@ -80,7 +108,30 @@ class ParsingService:
         
         Returns:
             True if parsing succeeded, False otherwise
+        
+        If the source was never indexed and parsing fails for good, every
+        chunk stored for it is removed, including those an earlier attempt
+        kept for its retry.
+        
+        Raises:
+            TransientIngestionError: On a retryable failure, if retry_transient_errors
         """
+        try:
+            source = self.source_repo.get_source_by_id(source_id)
+            indexed_before = bool(source) and source.get("status") == SourceStatus.INDEXED.value
+        except Exception:
+            # Unknown: leave the chunks alone (the parse below reports the error)
+            indexed_before = True
+        
+        ok = self._parse_source(source_id, bot_id)
+        if not ok and not indexed_before:
+            try:
+                self.chunk_service.repository.delete_chunks_by_source(source_id)
+            except Exception as e:
+                logger.error(f"Partial chunk cleanup failed: source_id={source_id}, error={str(e)}")
+        return ok
+    
+    def _parse_source(self, source_id: UUID, bot_id: UUID) -> bool:
         try:
             # Update status to parsing
             self.source_repo.update_source_status(
@@ -105,11 +156,6 @@ class ParsingService:
                 
                 logger.debug(f"Parsing file: source_id={source_id}, type={source_type}, mime_type={mime_type}, path={storage_path}")
                 
-                # Download file from storage
-                file_content = self._download_file(storage_path)
-                file_size = len(file_content)
-                logger.debug(f"File downloaded: source_id={source_id}, size_bytes={file_size}")
-                
                 # Get file extension from storage path
                 file_extension = self._get_file_extension(storage_path)
                 
@@ -123,107 +169,40 @@ class ParsingService:
                 
                 logger.debug(f"Parser selected: source_id={source_id}, parser={parser.get_name()}")
                 
-                # Parse document
-                result: ParseResult = parser.parse(file_content, storage_path)
-                
-                if not result.success:
-                    # Update status to failed
-                    self.source_repo.update_source_status(
-                        source_id=source_id,
-                        status=SourceStatus.FAILED.value,
-                        error_message=result.error_message
-                    )
-                    logger.error(f"Parsing failed: source_id={source_id}, error={result.error_message}")
-                    return False
-                
-                # Store extracted text (for now, we'll just log it)
-                # In Phase 5, we'll create chunks from this text
-                extracted_text = result.text
-                metadata = result.metadata
-                
-                # Log extracted text details
-                text_length = len(extracted_text)
-                text_preview = extracted_text[:500] if text_length > 500 else extracted_text
-                text_preview_suffix = "..." if text_length > 500 else ""
-                
-                # Build metadata summary
-                metadata_summary = []
-                if "page_count" in metadata:
-                    metadata_summary.append(f"{metadata['page_count']} pages")
-                if "paragraph_count" in metadata:
-                    metadata_summary.append(f"{metadata['paragraph_count']} paragraphs")
-                if "total_lines" in metadata:
-                    metadata_summary.append(f"{metadata['total_lines']} lines")
-                if "encoding" in metadata:
-                    metadata_summary.append(f"encoding: {metadata['encoding']}")
-                
-                metadata_str = ", ".join(metadata_summary) if metadata_summary else "no metadata"
-                
-                logger.info(f"Parsing completed: source_id={source_id}, chars={text_length}, metadata={metadata_str}")
-                
-                # Log full text if it's relatively small (for debugging)
-                if text_length <= 5000:
-                    logger.debug(f"Full extracted text for source {source_id}:\n{extracted_text}")
-                
-                # Chunk the extracted text and store in database
-                logger.debug(f"Chunking started: source_id={source_id}")
-                try:
-                    created_chunks = self.chunk_service.chunk_and_store_source(
-                        source_id=source_id,
-                        bot_id=bot_id,
-                        text=extracted_text,
-                        source_type=SourceType(source_type)
-                    )
-                    
-                    logger.info(f"Chunking completed: source_id={source_id}, chunks={len(created_chunks)}")
-                    
-                except Exception as e:
-                    logger.error(f"Chunking failed: source_id={source_id}, error={str(e)}", exc_info=True)
-                    # Update status to failed if chunking fails
-                    self.source_repo.update_source_status(
-                        source_id=source_id,
-                        status=SourceStatus.FAILED.value,
-                        error_message=f"Chunking failed: {str(e)}"
-                    )
-                    return False
-                
-                # Phase 6: Generate embeddings for created chunks
-                try:
-                    from services.embedding_service import EmbeddingService
-                    chunk_texts = [c.get("excerpt", "") for c in created_chunks]
-                    chunk_ids = [c.get("id") for c in created_chunks]
-                    embedding_service = EmbeddingService(access_token=self.access_token)
-                    updated = embedding_service.embed_chunks_for_source(
-                        source_id=source_id,
-                        texts=chunk_texts,
-                        chunk_ids=chunk_ids,
-                    )
-                    logger.info(f"Embeddings updated: source_id={source_id}, chunks={updated}/{len(created_chunks)}")
-                except Exception as e:
-                    logger.error(f"Embedding failed: source_id={source_id}, error={str(e)}", exc_info=True)
-                    self.source_repo.update_source_status(
-                        source_id=source_id,
-                        status=SourceStatus.FAILED.value,
-                        error_message=f"Embedding failed: {str(e)}"
-                    )
-                    return False
+                # Stream the file to disk, then parse, chunk, embed and store it
+                # page by page so memory doesn't grow with the document
+                self._report_stage("download")
+                with self._download_to_file(storage_path, file_extension) as file_path:
+                    self._report_stage("index")
+                    try:
+                        self._index_pages(source_id, bot_id, parser.iter_pages(file_path), SourceType(source_type))
+                    except ParsingFailedError as e:
+                        self.source_repo.update_source_status(
+                            source_id=source_id,
+                            status=SourceStatus.FAILED.value,
+                            error_message=str(e)
+                        )
+                        logger.error(f"Parsing failed: source_id={source_id}, error={str(e)}")
+                        return False
+                    except Exception as e:
+                        logger.error(f"Indexing failed: source_id={source_id}, error={str(e)}", exc_info=True)
+                        return self._fail(source_id, str(e), transient=True)
 
                 # Update status to indexed (chunking + embeddings complete)
-                self.source_repo.update_source_status(
-                    source_id=source_id,
-                    status=SourceStatus.INDEXED.value
-                )
+                self._report_stage("finalize")
+                self._mark_indexed(source_id, bot_id)
 
                 return True
             
             # Handle URL sources (HTML) - Phase 7
             elif source_type == SourceType.HTML.value:
+                start_url = source.get("original_url") or source.get("canonical_url")
+                if not start_url:
+                    return self._fail(source_id, "Crawl error: Source has no URL", transient=False)
                 try:
                     from services.crawling.crawler_service import CrawlerService
                     crawler = CrawlerService(max_depth=1, max_pages=10)
-                    start_url = source.get("original_url") or source.get("canonical_url")
-                    if not start_url:
-                        raise ValueError("Source has no URL")
+                    self._report_stage("download")
                     logger.info(f"Crawl started: source_id={source_id}, url={start_url}")
                     crawl_result = crawler.crawl_single(start_url)
                     if not crawl_result.success:
@@ -235,89 +214,26 @@ class ParsingService:
                         logger.error(f"Crawl failed: source_id={source_id}, error={crawl_result.error}")
                         return False
 
-                    # Update source with canonical_url and metadata
-                    try:
-                        self.source_repo.update_source_status(
-                            source_id=source_id,
-                            status=SourceStatus.PARSING.value,
-                            error_message=None
-                        )
-                    except Exception:
-                        pass
-
-                    # Use extracted text and continue pipeline (chunk + embed)
-                    extracted_text = crawl_result.text
-                    metadata = {
-                        "etag": crawl_result.metadata.get("etag"),
-                        "last_modified": crawl_result.metadata.get("last_modified"),
-                        "page_checksum": crawl_result.metadata.get("page_checksum"),
-                        "canonical_url": crawl_result.canonical_url,
-                        "title": crawl_result.metadata.get("title"),
-                    }
-
-                    # Derive a fallback title from URL if missing
-                    default_heading = metadata.get("title")
-                    if not default_heading and crawl_result.canonical_url:
-                        default_heading = self._derive_title_from_url(crawl_result.canonical_url)
-
-                    # Log details
-                    text_length = len(extracted_text)
-                    logger.info(f"Crawl completed: source_id={source_id}, url={crawl_result.canonical_url}, chars={text_length}")
-
-                    # Chunk and embed (reuse same flow as files)
-                    logger.debug(f"Chunking started: source_id={source_id}")
-                    created_chunks = self.chunk_service.chunk_and_store_source(
-                        source_id=source_id,
-                        bot_id=bot_id,
-                        text=extracted_text,
-                        source_type=SourceType.HTML,
-                        default_heading=default_heading
-                    )
-                    if not created_chunks:
-                        logger.warning(f"No chunks generated: source_id={source_id}, reason=empty_or_non_extractive")
-                        self.source_repo.update_source_status(
-                            source_id=source_id,
-                            status=SourceStatus.INDEXED.value
-                        )
-                        return True
-                    else:
-                        logger.info(f"Chunking completed: source_id={source_id}, chunks={len(created_chunks)}")
-
-                    # Embeddings
-                    from services.embedding_service import EmbeddingService
-                    chunk_texts = [c.get("excerpt", "") for c in created_chunks]
-                    chunk_ids = [c.get("id") for c in created_chunks]
-                    embedding_service = EmbeddingService(access_token=self.access_token)
-                    updated = embedding_service.embed_chunks_for_source(
-                        source_id=source_id,
-                        texts=chunk_texts,
-                        chunk_ids=chunk_ids,
-                    )
-                    logger.info(f"Embeddings updated: source_id={source_id}, chunks={updated}/{len(created_chunks)}")
-
-                    # Mark indexed
-                    self.source_repo.update_source_status(
-                        source_id=source_id,
-                        status=SourceStatus.INDEXED.value
-                    )
+                    self._report_stage("index")
+                    self._index_crawl_result(source_id, bot_id, crawl_result)
                     return True
                 except Exception as e:
-                    error_msg = f"Crawl error: {str(e)}"
                     logger.error(f"Crawl error: source_id={source_id}, error={str(e)}", exc_info=True)
-                    self.source_repo.update_source_status(
-                        source_id=source_id,
-                        status=SourceStatus.FAILED.value,
-                        error_message=error_msg
-                    )
-                    return False
+                    return self._fail(source_id, f"Crawl error: {str(e)}", transient=True)
             
             else:
                 raise ValueError(f"Unsupported source type: {source_type}")
                 
+        except TransientIngestionError:
+            raise
         except Exception as e:
             error_msg = f"Error parsing source {source_id}: {str(e)}"
             logger.error(f"Parsing error: source_id={source_id}, bot_id={bot_id}, error={str(e)}", exc_info=True)
             
+            # Failed downloads and database errors are worth retrying; a missing source or parser is not
+            if self.retry_transient_errors and not isinstance(e, (ValueError, NotFoundError)):
+                raise TransientIngestionError(error_msg) from e
+            
             # Update status to failed
             try:
                 self.source_repo.update_source_status(
@@ -330,33 +246,439 @@ class ParsingService:
             
             return False
     
-    def _download_file(self, storage_path: str) -> bytes:
+    def refresh_source(self, source_id: UUID, bot_id: UUID) -> bool:
         """
-        Download file from Supabase Storage.
-        
+        Re-crawl a URL source, re-indexing only if the page changed.
+
+        The request carries If-None-Match / If-Modified-Since from the stored
+        etag and last_modified. A 304, or extracted text whose checksum matches
+        page_checksum, leaves the existing chunks in place; a 304 only updates
+        last_checked_at, a checksum match also stores the response's etag and
+        last_modified. Sources that were never indexed are parsed normally.
+
         Args:
-            storage_path: Path to file in storage bucket (format: bots/{bot_id}/sources/{source_id}/{filename})
+            source_id: Source UUID
+            bot_id: Bot UUID
+
+        Returns:
+            True if the source is indexed and current, False otherwise
+        """
+        source = self.source_repo.get_source_by_id(source_id)
+        if not source:
+            logger.error(f"Refresh failed: source_id={source_id}, error=not found")
+            return False
+        if source.get("source_type") != SourceType.HTML.value:
+            logger.warning(f"Refresh skipped: source_id={source_id}, reason=not a URL source")
+            return False
+        if source.get("status") != SourceStatus.INDEXED.value or not source.get("page_checksum"):
+            return self.parse_source(source_id, bot_id)
+
+        from services.crawling.crawler_service import CrawlerService
+        url = source.get("original_url") or source.get("canonical_url")
+        try:
+            crawl_result = CrawlerService(max_depth=1, max_pages=10).crawl_single(
+                url,
+                etag=source.get("etag"),
+                last_modified=self._parse_db_timestamp(source.get("last_modified")),
+                previous_checksum=source.get("page_checksum"),
+            )
+        except Exception as e:
+            # Existing chunks stay searchable; the next refresh retries
+            logger.error(f"Refresh crawl error: source_id={source_id}, error={str(e)}")
+            return False
+        if not crawl_result.success:
+            logger.warning(f"Refresh crawl failed: source_id={source_id}, error={crawl_result.error}")
+            return False
+
+        if crawl_result.not_modified:
+            if crawl_result.text:
+                # 200 with unchanged text: keep the server's new validators so the
+                # next refresh can be answered with a 304
+                self.source_repo.update_crawl_metadata(
+                    source_id,
+                    etag=crawl_result.metadata.get("etag"),
+                    last_modified=crawl_result.metadata.get("last_modified"),
+                    page_checksum=crawl_result.metadata.get("page_checksum"),
+                    canonical_url=crawl_result.canonical_url,
+                )
+            else:
+                self.source_repo.mark_checked(source_id)
+            logger.info(f"Refresh skipped: source_id={source_id}, reason=not_modified")
+            return True
+
+        logger.info(f"Refresh re-indexing: source_id={source_id}, url={crawl_result.canonical_url}")
+        try:
+            self.source_repo.update_source_status(source_id=source_id, status=SourceStatus.PARSING.value)
+            # Re-indexes incrementally: only chunks whose text changed are embedded
+            self._index_crawl_result(source_id, bot_id, crawl_result)
+            return True
+        except Exception as e:
+            logger.error(f"Refresh error: source_id={source_id}, error={str(e)}", exc_info=True)
+            self.source_repo.update_source_status(
+                source_id=source_id,
+                status=SourceStatus.FAILED.value,
+                error_message=f"Crawl error: {str(e)}"
+            )
+            return False
+
+    def _index_crawl_result(self, source_id: UUID, bot_id: UUID, crawl_result) -> None:
+        """Chunk and embed crawled text, store the crawl validators and mark the source indexed"""
+        extracted_text = crawl_result.text
+        title = crawl_result.metadata.get("title")
+
+        # Derive a fallback title from URL if missing
+        default_heading = title
+        if not default_heading and crawl_result.canonical_url:
+            default_heading = self._derive_title_from_url(crawl_result.canonical_url)
+
+        # Log details
+        text_length = len(extracted_text)
+        logger.info(f"Crawl completed: source_id={source_id}, url={crawl_result.canonical_url}, chars={text_length}")
+
+        # Chunk and embed (reuse same flow as files)
+        chunk_count = self._index_text(
+            source_id, bot_id, extracted_text, SourceType.HTML, default_heading=default_heading
+        )
+        if not chunk_count:
+            logger.warning(f"No chunks generated: source_id={source_id}, reason=empty_or_non_extractive")
+
+        self._report_stage("finalize")
+
+        # Validators for conditional re-crawls
+        try:
+            self.source_repo.update_crawl_metadata(
+                source_id,
+                etag=crawl_result.metadata.get("etag"),
+                last_modified=crawl_result.metadata.get("last_modified"),
+                page_checksum=crawl_result.metadata.get("page_checksum"),
+                canonical_url=crawl_result.canonical_url,
+            )
+        except Exception as e:
+            logger.warning(f"Crawl metadata not stored: source_id={source_id}, error={str(e)}")
+
+        # Mark indexed
+        self._mark_indexed(source_id, bot_id)
+
+    @staticmethod
+    def _parse_db_timestamp(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+    def _index_text(
+        self,
+        source_id: UUID,
+        bot_id: UUID,
+        text: str,
+        source_type: SourceType,
+        default_heading: Optional[str] = None,
+    ) -> int:
+        """
+        Chunk, embed and store text for a source.
+
+        In single-write mode (INGESTION_SINGLE_WRITE, the default) each embedding
+        batch is inserted as complete rows, so chunks are written once and are
+        searchable as soon as they exist; if embedding fails part-way, the chunks
+        already inserted for the source are removed. Otherwise chunks are inserted
+        first and their embeddings written afterwards.
+
+        Sources that already have chunks are re-indexed incrementally (see
+        _reindex_rows).
+
+        Returns:
+            Number of chunks stored
+
+        Raises:
+            ValueError: With a "Chunking failed" or "Embedding failed" message
+        """
+        from services.embedding_service import EmbeddingService
+
+        existing = self.chunk_service.repository.get_chunks_by_source(source_id, columns=DIFF_COLUMNS)
+        if existing:
+            try:
+                rows = self.chunk_service.build_chunk_rows(
+                    source_id, bot_id, text, source_type, default_heading=default_heading
+                )
+            except Exception as e:
+                raise ValueError(f"Chunking failed: {str(e)}")
+            return self._reindex_rows(source_id, rows, existing)
+
+        logger.debug(f"Chunking started: source_id={source_id}")
+        try:
+            if settings.ingestion_single_write:
+                chunks = self.chunk_service.build_chunk_rows(
+                    source_id, bot_id, text, source_type, default_heading=default_heading
+                )
+            else:
+                chunks = self.chunk_service.chunk_and_store_source(
+                    source_id=source_id,
+                    bot_id=bot_id,
+                    text=text,
+                    source_type=source_type,
+                    default_heading=default_heading
+                )
+        except Exception as e:
+            raise ValueError(f"Chunking failed: {str(e)}")
+        logger.info(f"Chunking completed: source_id={source_id}, chunks={len(chunks)}")
+        if not chunks:
+            return 0
+
+        embedding_service = EmbeddingService(access_token=self.access_token)
+        try:
+            if settings.ingestion_single_write:
+                stored = embedding_service.embed_and_store_chunks(source_id, chunks)
+            else:
+                stored = embedding_service.embed_chunks_for_source(
+                    source_id=source_id,
+                    texts=[c.get("excerpt", "") for c in chunks],
+                    chunk_ids=[c.get("id") for c in chunks],
+                )
+        except Exception as e:
+            if settings.ingestion_single_write:
+                try:
+                    self.chunk_service.repository.delete_chunks_by_source(source_id)
+                except Exception as cleanup_error:
+                    logger.error(f"Partial chunk cleanup failed: source_id={source_id}, error={str(cleanup_error)}")
+            raise ValueError(f"Embedding failed: {str(e)}")
+        logger.info(f"Embeddings stored: source_id={source_id}, chunks={stored}/{len(chunks)}")
+        return len(chunks)
+
+    def _index_pages(
+        self,
+        source_id: UUID,
+        bot_id: UUID,
+        pages: Iterable[str],
+        source_type: SourceType,
+    ) -> int:
+        """
+        Chunk, embed and store text that arrives page by page.
+        
+        Chunks are emitted as the pages are read and embedded and stored in
+        rolling batches of INGESTION_STREAM_BATCH_CHUNKS, so only the current
+        page and batch are held in memory. Rows are the same as _index_text
+        would store for the pages joined by blank lines. If anything fails
+        part-way, the chunks already stored for the source are removed, unless
+        the failure will be retried (retry_transient_errors): then they are
+        kept and the retry re-indexes incrementally, embedding only the rest.
+        
+        Sources that already have chunks are re-indexed incrementally, which
+        needs the full set of new rows (see _reindex_rows).
         
         Returns:
-            File content as bytes
+            Number of chunks stored
         
         Raises:
-            ValueError: If file download fails
+            ParsingFailedError: If the parser fails
+            ValueError: With a "Chunking failed" or "Embedding failed" message
         """
+        from services.embedding_service import EmbeddingService
+        
+        repository = self.chunk_service.repository
+        page_count = 0
+        char_count = 0
+        
+        def counted_pages() -> Iterator[str]:
+            nonlocal page_count, char_count
+            for page in pages:
+                page_count += 1
+                char_count += len(page)
+                yield page
+        
+        def checked_rows() -> Iterator[dict]:
+            try:
+                yield from self.chunk_service.iter_chunk_rows(source_id, bot_id, counted_pages(), source_type)
+            except ParsingFailedError:
+                raise
+            except Exception as e:
+                raise ValueError(f"Chunking failed: {str(e)}")
+        
+        existing = repository.get_chunks_by_source(source_id, columns=DIFF_COLUMNS)
+        if existing:
+            rows = list(checked_rows())
+            logger.info(f"Parsing completed: source_id={source_id}, pages={page_count}, chars={char_count}")
+            return self._reindex_rows(source_id, rows, existing)
+        
+        embedding_service = EmbeddingService(access_token=self.access_token)
+        batch_size = max(1, settings.ingestion_stream_batch_chunks)
+        batch: List[dict] = []
+        chunk_count = 0
+        stored = 0
+        logger.debug(f"Streaming ingestion started: source_id={source_id}, batch_chunks={batch_size}")
         try:
-            # Storage path format: bots/{bot_id}/sources/{source_id}/{filename}
-            # Supabase Storage download uses the full path as stored (same as upload)
-            # Download from sources bucket
-            response = self.storage_client.storage.from_("sources").download(storage_path)
-            
-            if not response:
-                raise ValueError(f"Failed to download file from storage: {storage_path}")
-            
-            return response
-            
+            for row in checked_rows():
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    stored += self._store_chunk_batch(source_id, batch, embedding_service)
+                    chunk_count += len(batch)
+                    batch = []
+            if batch:
+                stored += self._store_chunk_batch(source_id, batch, embedding_service)
+                chunk_count += len(batch)
+        except Exception as e:
+            if self.retry_transient_errors and not isinstance(e, ParsingFailedError):
+                logger.info(f"Partial chunks kept for retry: source_id={source_id}, chunks={chunk_count}")
+                raise
+            try:
+                repository.delete_chunks_by_source(source_id)
+            except Exception as cleanup_error:
+                logger.error(f"Partial chunk cleanup failed: source_id={source_id}, error={str(cleanup_error)}")
+            raise
+        
+        logger.info(
+            f"Parsing completed: source_id={source_id}, pages={page_count}, chars={char_count}, "
+            f"chunks={chunk_count}, embedded={stored}"
+        )
+        if not chunk_count:
+            logger.warning(f"No chunks generated: source_id={source_id}, reason=empty_or_non_extractive")
+        return chunk_count
+    
+    def _store_chunk_batch(self, source_id: UUID, rows: List[dict], embedding_service) -> int:
+        """Embed and store one batch of chunk rows; returns the number of embeddings stored"""
+        if settings.ingestion_single_write:
+            try:
+                return embedding_service.embed_and_store_chunks(source_id, rows)
+            except Exception as e:
+                raise ValueError(f"Embedding failed: {str(e)}")
+        
+        try:
+            created = self.chunk_service.repository.create_chunks(rows)
+        except Exception as e:
+            raise ValueError(f"Chunking failed: {str(e)}")
+        try:
+            return embedding_service.embed_chunks_for_source(
+                source_id=source_id,
+                texts=[c.get("excerpt", "") for c in created],
+                chunk_ids=[c.get("id") for c in created],
+            )
         except Exception as e:
-            logger.error(f"File download failed: path={storage_path}, error={str(e)}")
-            raise ValueError(f"Failed to download file: {str(e)}")
+            raise ValueError(f"Embedding failed: {str(e)}")
+
+    def _reindex_rows(self, source_id: UUID, rows: List[dict], existing: List[dict]) -> int:
+        """
+        Re-index a source that already has chunks, touching only what changed.
+
+        The new chunk rows are matched to the stored chunks by content hash.
+        Matched chunks keep their rows and embeddings (position metadata is
+        rewritten only if it moved); new chunks are embedded and inserted, then
+        chunks whose text is gone are deleted in bulk. New chunks go in before
+        old ones are removed, so the source never drops out of search.
+
+        Returns:
+            Number of chunks for the source after re-indexing
+
+        Raises:
+            ValueError: With an "Embedding failed" or "Re-indexing failed" message
+        """
+        from services.embedding_service import EmbeddingService
+
+        repository = self.chunk_service.repository
+        try:
+            # Chunks left without embeddings are treated as gone and re-created
+            unembedded = set(repository.get_unembedded_chunk_ids(source_id))
+        except Exception as e:
+            raise ValueError(f"Re-indexing failed: {str(e)}")
+        diff = diff_chunks([c for c in existing if c["id"] not in unembedded], rows)
+        diff.removed_ids.extend(unembedded)
+        logger.info(
+            f"Incremental re-index: source_id={source_id}, chunks={len(rows)}, kept={diff.kept}, "
+            f"moved={len(diff.updates)}, new={len(diff.new_rows)}, removed={len(diff.removed_ids)}"
+        )
+
+        if diff.new_rows:
+            embedding_service = EmbeddingService(access_token=self.access_token)
+            try:
+                embedding_service.embed_and_store_chunks(source_id, diff.new_rows)
+            except Exception as e:
+                try:
+                    repository.delete_chunks_by_ids([r["id"] for r in diff.new_rows])
+                except Exception as cleanup_error:
+                    logger.error(f"Partial chunk cleanup failed: source_id={source_id}, error={str(cleanup_error)}")
+                raise ValueError(f"Embedding failed: {str(e)}")
+
+        try:
+            repository.update_chunk_positions(diff.updates)
+            repository.delete_chunks_by_ids(diff.removed_ids)
+        except Exception as e:
+            raise ValueError(f"Re-indexing failed: {str(e)}")
+        return len(rows)
+
+    def _fail(self, source_id: UUID, error_message: str, transient: bool) -> bool:
+        """
+        Mark a source failed and return False, or raise TransientIngestionError
+        for a transient failure when the caller retries those.
+        """
+        if transient and self.retry_transient_errors:
+            raise TransientIngestionError(error_message)
+        self.source_repo.update_source_status(
+            source_id=source_id,
+            status=SourceStatus.FAILED.value,
+            error_message=error_message
+        )
+        return False
+
+    def _report_stage(self, stage: str) -> None:
+        if self.on_stage is None:
+            return
+        try:
+            self.on_stage(stage)
+        except Exception as e:
+            logger.warning(f"Stage report failed: stage={stage}, error={str(e)}")
+
+    def _mark_indexed(self, source_id: UUID, bot_id: UUID) -> None:
+        """Mark a source as indexed and drop cached answers for its bot"""
+        self.source_repo.update_source_status(
+            source_id=source_id,
+            status=SourceStatus.INDEXED.value
+        )
+        answer_cache.invalidate_bot(str(bot_id))
+    
+    @contextmanager
+    def _download_to_file(self, storage_path: str, file_extension: Optional[str] = None) -> Iterator[str]:
+        """
+        Download a file from Supabase Storage to a temporary file.
+        
+        The object is streamed to disk in 1 MiB pieces through a short-lived
+        signed URL, so the file is never held in memory. The temporary file is
+        removed when the context exits.
+        
+        Args:
+            storage_path: Path to file in storage bucket (format: bots/{bot_id}/sources/{source_id}/{filename})
+            file_extension: Suffix for the temporary file (e.g. '.pdf')
+        
+        Yields:
+            Path of the downloaded file
+        
+        Raises:
+            ConnectionError: If file download fails
+        """
+        tmp = tempfile.NamedTemporaryFile(suffix=file_extension or "", delete=False)
+        try:
+            try:
+                with tmp:
+                    signed = self.storage_client.storage.from_("sources").create_signed_url(
+                        storage_path, DOWNLOAD_URL_TTL_SECONDS
+                    )
+                    with httpx.stream("GET", signed["signedURL"], timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+                        response.raise_for_status()
+                        for data in response.iter_bytes(DOWNLOAD_CHUNK_BYTES):
+                            tmp.write(data)
+                    size = tmp.tell()
+                if not size:
+                    raise ValueError(f"Failed to download file from storage: {storage_path}")
+                logger.debug(f"File downloaded: path={storage_path}, size_bytes={size}")
+            except Exception as e:
+                logger.error(f"File download failed: path={storage_path}, error={str(e)}")
+                raise ConnectionError(f"Failed to download file: {str(e)}")
+            yield tmp.name
+        finally:
+            try:
+                os.remove(tmp.name)
+            except OSError:
+                pass
     
     def _get_file_extension(self, file_path: str) -> Optional[str]:
         """
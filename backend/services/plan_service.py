@@ -9,12 +9,23 @@ from typing import Dict, Any, Optional
 from uuid import UUID
 import logging
 
+from core.cache import TTLCache
 from core.exceptions import DatabaseError, NotFoundError
-from config.supabasedb import get_supabase_client
+from config.settings import settings
+from config.supabasedb import get_supabase_client, get_async_postgrest_client
 from models.plan_model import SubscriptionPlanModel
+from services.bot_config_cache import bot_config_cache
 
 logger = logging.getLogger(__name__)
 
+# Process-wide plan caches. Plans and subscriptions change rarely and only outside
+# the API (SQL, Supabase dashboard), so there is nothing here to invalidate them:
+# a subscription change applies within PLAN_CACHE_TTL_SECONDS, a plan edit within
+# PLAN_CATALOG_CACHE_TTL_SECONDS (or at once after a restart).
+# The bot -> owner mapping is served by bot_config_cache.
+user_plan_cache = TTLCache(name="user_plans", ttl_seconds=settings.plan_cache_ttl_seconds)
+plan_by_key_cache = TTLCache(name="subscription_plans", ttl_seconds=settings.plan_catalog_cache_ttl_seconds, max_entries=100)
+
 
 class PlanService:
     """Service for subscription plan operations"""
@@ -42,6 +53,10 @@ class PlanService:
         Raises:
             DatabaseError: If database operation fails
         """
+        cached = plan_by_key_cache.get(plan_key)
+        if cached is not None:
+            return dict(cached)
+
         try:
             # Use service role for plan lookups (plans are public data)
             client = get_supabase_client(use_service_role=True)
@@ -55,7 +70,7 @@ class PlanService:
                 .execute()
             )
             
-            return response.data
+            return self._cache_plan(plan_key, response.data if response else None)
         except Exception as e:
             logger.error(f"Error fetching plan {plan_key}: {str(e)}")
             raise DatabaseError(f"Failed to fetch plan: {str(e)}")
@@ -73,6 +88,10 @@ class PlanService:
         Raises:
             DatabaseError: If database operation fails
         """
+        cached = user_plan_cache.get(str(user_id))
+        if cached is not None:
+            return dict(cached)
+
         try:
             # Use service role to fetch user's subscription
             client = get_supabase_client(use_service_role=True)
@@ -88,27 +107,14 @@ class PlanService:
                 .execute()
             )
             
-            if sub_response.data and sub_response.data.get("subscription_plans"):
-                plan_data = sub_response.data["subscription_plans"]
-                plan_data["subscription_id"] = sub_response.data["id"]
-                plan_data["subscription_status"] = sub_response.data["status"]
-                plan_data["subscription_starts_at"] = sub_response.data.get("starts_at")
-                plan_data["subscription_ends_at"] = sub_response.data.get("ends_at")
+            if sub_response and sub_response.data and sub_response.data.get("subscription_plans"):
+                plan_data = self._plan_from_subscription(sub_response.data)
                 logger.debug(f"Found active subscription for user {user_id}: {plan_data.get('plan_key')}")
-                return plan_data
+                return self._cache_user_plan(user_id, plan_data)
             
             # No active subscription found, default to free plan
             logger.debug(f"No active subscription found for user {user_id}, defaulting to free plan")
-            free_plan = self.get_plan_by_key("free")
-            if not free_plan:
-                raise DatabaseError("Free plan not found in database")
-            
-            # Set default subscription info
-            free_plan["subscription_id"] = None
-            free_plan["subscription_status"] = "active"
-            free_plan["subscription_starts_at"] = None
-            free_plan["subscription_ends_at"] = None
-            return free_plan
+            return self._cache_user_plan(user_id, self._default_free_plan(self.get_plan_by_key("free")))
             
         except DatabaseError:
             raise
@@ -131,22 +137,13 @@ class PlanService:
             NotFoundError: If bot not found
         """
         try:
-            # Use service role to fetch bot owner
-            client = get_supabase_client(use_service_role=True)
+            # Get bot owner from the bot configuration cache (service role on a miss)
+            bot_config = bot_config_cache.get(bot_id)
             
-            # Get bot to find owner
-            bot_response = (
-                client.table("bots")
-                .select("created_by")
-                .eq("id", bot_id)
-                .maybe_single()
-                .execute()
-            )
-            
-            if not bot_response.data:
+            if not bot_config:
                 raise NotFoundError("Bot", bot_id)
             
-            owner_id = bot_response.data.get("created_by")
+            owner_id = bot_config.get("created_by")
             if not owner_id:
                 raise DatabaseError(f"Bot {bot_id} has no owner")
             
@@ -159,6 +156,111 @@ class PlanService:
             logger.error(f"Error fetching plan for bot {bot_id}: {str(e)}")
             raise DatabaseError(f"Failed to fetch bot plan: {str(e)}")
 
+    async def get_plan_by_key_async(self, plan_key: str) -> Optional[Dict[str, Any]]:
+        """Async variant of get_plan_by_key"""
+        cached = plan_by_key_cache.get(plan_key)
+        if cached is not None:
+            return dict(cached)
+
+        try:
+            client = get_async_postgrest_client(use_service_role=True)
+            response = await (
+                client.table("subscription_plans")
+                .select("*")
+                .eq("plan_key", plan_key)
+                .eq("is_active", True)
+                .maybe_single()
+                .execute()
+            )
+            return self._cache_plan(plan_key, response.data if response else None)
+        except Exception as e:
+            logger.error(f"Error fetching plan {plan_key}: {str(e)}")
+            raise DatabaseError(f"Failed to fetch plan: {str(e)}")
+
+    async def get_plan_for_user_async(self, user_id: str) -> Dict[str, Any]:
+        """Async variant of get_plan_for_user"""
+        cached = user_plan_cache.get(str(user_id))
+        if cached is not None:
+            return dict(cached)
+
+        try:
+            client = get_async_postgrest_client(use_service_role=True)
+            sub_response = await (
+                client.table("user_subscriptions")
+                .select("*, subscription_plans(*)")
+                .eq("user_id", user_id)
+                .eq("is_active", True)
+                .eq("status", "active")
+                .maybe_single()
+                .execute()
+            )
+
+            if sub_response and sub_response.data and sub_response.data.get("subscription_plans"):
+                return self._cache_user_plan(user_id, self._plan_from_subscription(sub_response.data))
+
+            return self._cache_user_plan(user_id, self._default_free_plan(await self.get_plan_by_key_async("free")))
+
+        except DatabaseError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching plan for user {user_id}: {str(e)}")
+            raise DatabaseError(f"Failed to fetch user plan: {str(e)}")
+
+    async def get_plan_for_bot_async(self, bot_id: str) -> Dict[str, Any]:
+        """Async variant of get_plan_for_bot"""
+        try:
+            bot_config = await bot_config_cache.get_async(bot_id)
+
+            if not bot_config:
+                raise NotFoundError("Bot", bot_id)
+
+            owner_id = bot_config.get("created_by")
+            if not owner_id:
+                raise DatabaseError(f"Bot {bot_id} has no owner")
+
+            return await self.get_plan_for_user_async(str(owner_id))
+
+        except (NotFoundError, DatabaseError):
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching plan for bot {bot_id}: {str(e)}")
+            raise DatabaseError(f"Failed to fetch bot plan: {str(e)}")
+
+    @staticmethod
+    def _cache_plan(plan_key: str, plan: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Cache an active plan by key and return a copy (callers may mutate it)"""
+        if not plan:
+            return None
+        plan_by_key_cache.set(plan_key, dict(plan))
+        return dict(plan)
+
+    @staticmethod
+    def _cache_user_plan(user_id: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a user's resolved plan and return a copy (callers may mutate it)"""
+        user_plan_cache.set(str(user_id), dict(plan))
+        return dict(plan)
+
+    @staticmethod
+    def _plan_from_subscription(subscription: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a user_subscriptions row (with embedded plan) into plan data"""
+        plan_data = subscription["subscription_plans"]
+        plan_data["subscription_id"] = subscription["id"]
+        plan_data["subscription_status"] = subscription["status"]
+        plan_data["subscription_starts_at"] = subscription.get("starts_at")
+        plan_data["subscription_ends_at"] = subscription.get("ends_at")
+        return plan_data
+
+    @staticmethod
+    def _default_free_plan(free_plan: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Attach default subscription info to the free plan"""
+        if not free_plan:
+            raise DatabaseError("Free plan not found in database")
+        free_plan["subscription_id"] = None
+        free_plan["subscription_status"] = "active"
+        free_plan["subscription_starts_at"] = None
+        free_plan["subscription_ends_at"] = None
+        return free_plan
+
     def check_plan_limit(
         self,
         plan: Dict[str, Any],
@@ -236,3 +338,6 @@ class PlanService:
         
         return True, None
 
+
+# Global plan service instance (service role; plans are not user-scoped)
+plan_service = PlanService(use_service_role=True)
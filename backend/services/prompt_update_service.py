@@ -10,7 +10,9 @@ import logging
 
 from repositories.prompt_update_repo import PromptUpdateRepository
 from repositories.bot_repo import BotRepository
-from services.bot_service import BotService
+from services.bot_service import bot_service
+from services.answer_cache import answer_cache
+from services.bot_config_cache import bot_config_cache
 from core.exceptions import ValidationError, NotFoundError, AuthorizationError
 
 logger = logging.getLogger(__name__)
@@ -29,7 +31,7 @@ class PromptUpdateService:
         self.access_token = access_token
         self.repository = PromptUpdateRepository(access_token=access_token)
         self.bot_repo = BotRepository(access_token=access_token)
-        self.bot_service = BotService()
+        self.bot_service = bot_service
 
     def create_prompt_update(
         self,
@@ -162,6 +164,8 @@ class PromptUpdateService:
             bot_id,
             {"system_prompt": new_prompt}
         )
+        bot_config_cache.invalidate(str(bot_id))
+        answer_cache.invalidate_bot(str(bot_id))
 
         logger.info(f"Prompt update applied: bot_id={bot_id}, update_id={update_id}, user_id={user_id}")
         return updated_bot
@@ -224,6 +228,8 @@ class PromptUpdateService:
             bot_id,
             {"system_prompt": old_prompt}
         )
+        bot_config_cache.invalidate(str(bot_id))
+        answer_cache.invalidate_bot(str(bot_id))
 
         logger.info(f"Prompt reverted: bot_id={bot_id}, update_id={update_id}, user_id={user_id}")
         return updated_bot
@@ -0,0 +1,183 @@
+"""
+Provider Clients
+
+Process-wide OpenAI and Gemini clients shared by the embedding and LLM
+services. Clients are created once, keep their HTTP/gRPC connections alive
+between calls, and are warmed up at startup so the first user query does not
+pay for DNS, TCP and TLS setup.
+
+The async OpenAI client is bound to the server's event loop; the sync client
+is safe to share across threadpool workers.
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+import threading
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderNotConfigured(RuntimeError):
+    """Provider SDK missing or API key not set"""
+
+
+_lock = threading.Lock()
+_openai_client = None
+_async_openai_client = None
+_genai = None
+_gemini_models: Dict[str, Any] = {}
+
+
+def _openai_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ProviderNotConfigured("Missing OPENAI_API_KEY")
+    return api_key
+
+
+def _gemini_api_key() -> str:
+    api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ProviderNotConfigured("Missing GOOGLE_API_KEY/GEMINI_API_KEY")
+    return api_key
+
+
+def _http_options() -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "timeout": httpx.Timeout(settings.provider_http_timeout_seconds, connect=settings.provider_http_connect_timeout_seconds),
+        "limits": httpx.Limits(
+            max_connections=settings.provider_http_max_connections,
+            max_keepalive_connections=settings.provider_http_max_keepalive,
+            keepalive_expiry=settings.provider_http_keepalive_expiry_seconds,
+        ),
+    }
+
+
+def get_openai_client():
+    """Shared sync OpenAI client (thread-safe)"""
+    global _openai_client
+    if _openai_client is None:
+        try:
+            import httpx
+            from openai import OpenAI
+        except Exception as e:
+            raise ProviderNotConfigured(f"OpenAI SDK not available: {e}")
+        api_key = _openai_api_key()
+        with _lock:
+            if _openai_client is None:
+                options = _http_options()
+                _openai_client = OpenAI(
+                    api_key=api_key,
+                    timeout=options["timeout"],
+                    max_retries=settings.provider_max_retries,
+                    http_client=httpx.Client(**options),
+                )
+    return _openai_client
+
+
+def get_async_openai_client():
+    """Shared async OpenAI client (use from the server's event loop only)"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        try:
+            import httpx
+            from openai import AsyncOpenAI
+        except Exception as e:
+            raise ProviderNotConfigured(f"OpenAI SDK not available: {e}")
+        options = _http_options()
+        _async_openai_client = AsyncOpenAI(
+            api_key=_openai_api_key(),
+            timeout=options["timeout"],
+            max_retries=settings.provider_max_retries,
+            http_client=httpx.AsyncClient(**options),
+        )
+    return _async_openai_client
+
+
+def get_genai():
+    """
+    The google.generativeai module, configured once.
+
+    genai.configure() resets the SDK's cached gRPC clients, so calling it per
+    request discards open connections; it is only called here.
+    """
+    global _genai
+    if _genai is None:
+        try:
+            import google.generativeai as genai
+        except Exception as e:
+            raise ProviderNotConfigured(f"Google Generative AI SDK not available: {e}")
+        api_key = _gemini_api_key()
+        with _lock:
+            if _genai is None:
+                genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+
+def get_gemini_model(model_name: str):
+    """Shared GenerativeModel per model name"""
+    model = _gemini_models.get(model_name)
+    if model is None:
+        model = get_genai().GenerativeModel(model_name)
+        _gemini_models[model_name] = model
+    return model
+
+
+def gemini_model_id(model_name: str) -> str:
+    """Model id in the form the SDK expects (models/...)"""
+    return model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+
+async def warm_up(timeout_seconds: Optional[float] = None) -> None:
+    """
+    Open connections to every configured provider.
+
+    Uses metadata calls where the API has them (OpenAI model lookup) and a
+    one-word embedding for Gemini, whose async gRPC channel has no cheaper
+    call. Failures are logged and never block startup.
+    """
+    timeout_seconds = timeout_seconds or settings.provider_warmup_timeout_seconds
+
+    async def _openai() -> None:
+        client = get_async_openai_client()
+        await client.models.retrieve(settings.openai_chat_model)
+
+    async def _gemini() -> None:
+        genai = get_genai()
+        await genai.embed_content_async(model=gemini_model_id(settings.gemini_embedding_model), content="warm-up")
+
+    tasks = {}
+    if os.getenv("OPENAI_API_KEY"):
+        tasks["openai"] = _openai()
+    if os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"):
+        tasks["gemini"] = _gemini()
+    if not tasks:
+        return
+
+    results = await asyncio.gather(
+        *(asyncio.wait_for(coro, timeout=timeout_seconds) for coro in tasks.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(tasks, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Provider warm-up failed: provider={name}, error={result!r}")
+        else:
+            logger.info(f"Provider warm-up complete: provider={name}")
+
+
+async def close_provider_clients() -> None:
+    """Close shared provider clients (call on application shutdown)"""
+    global _openai_client, _async_openai_client
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+    if _openai_client is not None:
+        _openai_client.close()
+        _openai_client = None
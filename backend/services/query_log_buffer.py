@@ -0,0 +1,192 @@
+"""
+Query Log Buffer
+
+Write-behind buffer for the queries table. Answers enqueue their log record
+and return immediately; a background task writes records as multi-row
+inserts when the batch size or the flush interval is reached.
+
+Memory is bounded: when the buffer is full the oldest records are dropped
+(and counted). When the database rejects a batch because of its data (e.g.
+a foreign key violation after a bot was deleted), the batch is split in
+halves until the offending records are isolated, and only those are dropped.
+Batches that fail otherwise are retried with exponential backoff up to a
+fixed number of attempts. The buffer is flushed on application shutdown.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+from repositories.query_repo import QueryRepository
+
+logger = logging.getLogger(__name__)
+
+# A buffered record and the attempts made to write it so far
+_Entry = Tuple[Dict[str, Any], int]
+
+
+def _is_rejected_data(error: Exception) -> bool:
+    """Whether the database refused the records themselves (SQLSTATE class 22 or 23)"""
+    cause = error.__cause__ or error
+    code = str(getattr(cause, "code", None) or "")
+    return code[:2] in ("22", "23")
+
+
+class QueryLogBuffer:
+    """Bounded in-memory buffer of query log records with batched writes"""
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 1.0,
+        max_buffer: int = 10_000,
+        max_attempts: int = 5,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            batch_size: Records per multi-row insert (reaching it triggers a flush)
+            flush_interval_seconds: Maximum time a record waits before being written
+            max_buffer: Maximum buffered records; the oldest are dropped beyond this
+            max_attempts: Attempts per batch before it is dropped
+        """
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer = max_buffer
+        self.max_attempts = max_attempts
+        # (record, attempts so far)
+        self._records: Deque[_Entry] = deque()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self._repo: Optional[QueryRepository] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        """Buffer a record for writing; never blocks and never raises"""
+        if len(self._records) >= self.max_buffer:
+            self._records.popleft()
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"Query log buffer full ({self.max_buffer}); dropped {self.dropped} records so far")
+        self._records.append((record, 0))
+        if len(self._records) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self, force: bool = False) -> None:
+        """
+        Write buffered records in batches.
+
+        Args:
+            force: Ignore retry backoff (used on shutdown)
+        """
+        async with self._flush_lock:
+            while self._records:
+                if not force and time.monotonic() < self._retry_at:
+                    return
+
+                batch = [self._records.popleft() for _ in range(min(self.batch_size, len(self._records)))]
+                rejected, failed, error = await self._insert(batch)
+                self.rejected += len(rejected)
+                self.dropped += len(rejected)
+                if not failed:
+                    self._retry_at = 0.0
+                    continue
+
+                self.failed_batches += 1
+                retry = [(r, attempts + 1) for r, attempts in failed if attempts + 1 < self.max_attempts]
+                self.dropped += len(failed) - len(retry)
+                # Put retries back at the front, in order, without exceeding the bound
+                room = self.max_buffer - len(self._records)
+                self.dropped += max(0, len(retry) - room)
+                self._records.extendleft(reversed(retry[:max(room, 0)]))
+                attempts = max((a for _, a in retry), default=0)
+                self._retry_at = time.monotonic() + min(2 ** attempts, 60)
+                logger.warning(f"Query log flush failed ({len(failed)} records, retrying {len(retry)}): {str(error)}")
+                if force:
+                    return
+
+    async def _insert(self, batch: List[_Entry]) -> Tuple[List[_Entry], List[_Entry], Optional[Exception]]:
+        """
+        Insert a batch, splitting it when the database rejects its data so
+        that only the offending records are left out.
+
+        Returns:
+            (rejected, failed, error): records the database refused, records
+            not written because of another error (worth retrying), and that error
+        """
+        try:
+            if self._repo is None:
+                self._repo = QueryRepository(access_token=None)
+            await self._repo.insert_queries_async([r for r, _ in batch])
+            self.written += len(batch)
+            return [], [], None
+        except Exception as e:
+            if not _is_rejected_data(e):
+                return [], batch, e
+            if len(batch) == 1:
+                logger.warning(f"Query log record rejected and dropped: {str(e)}")
+                return batch, [], None
+
+        middle = len(batch) // 2
+        rejected_head, failed_head, error_head = await self._insert(batch[:middle])
+        rejected_tail, failed_tail, error_tail = await self._insert(batch[middle:])
+        return rejected_head + rejected_tail, failed_head + failed_tail, error_head or error_tail
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffer counters"""
+        return {
+            "buffered": len(self._records),
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+        }
+
+    def start(self) -> None:
+        """Start the background flush loop (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and write everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(force=True)
+        if self._records:
+            logger.error(f"Query log buffer stopped with {len(self._records)} unwritten records")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Query log buffer error: {str(e)}")
+
+
+# Global query log buffer instance
+query_log_buffer = QueryLogBuffer(
+    batch_size=settings.query_log_batch_size,
+    flush_interval_seconds=settings.query_log_flush_interval_seconds,
+    max_buffer=settings.query_log_max_buffer,
+    max_attempts=settings.query_log_max_attempts,
+)
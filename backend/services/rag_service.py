@@ -1,51 +1,77 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Set
 from uuid import UUID
+import asyncio
 import logging
 import time
 
-from config.supabasedb import get_supabase_client
+from config.settings import settings
+from config.supabasedb import get_async_postgrest_client
+from services.answer_cache import answer_cache, prompt_version
+from services.bot_config_cache import bot_config_cache
+from services.context_packer import get_context_packer
 from services.embedding_service import EmbeddingService
 from services.llm_service import LLMService
-from services.bot_service import BotService
-from services.plan_service import PlanService
+from services.plan_service import plan_service
+from services.query_log_buffer import query_log_buffer
+from services.usage_counter import daily_usage_counter
 from repositories.query_repo import QueryRepository
-from repositories.source_repo import SourceRepository
-from core.exceptions import ValidationError, DatabaseError
+from core.exceptions import ValidationError, DatabaseError, NotFoundError, AuthorizationError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant. Use the provided context to answer. If unsure, say you don't know."
+
+# Strong references to fire-and-forget tasks (connection cleanup after streams end)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 
 class RagService:
+    """
+    Retrieval-augmented answering.
+
+    Fully async: database calls go through the async PostgREST client and the
+    LLM/embedding providers use their async SDKs, so one worker can hold many
+    in-flight queries. Create one instance per request; answer() and
+    stream_answer() release its connections when they finish, and callers that
+    stop after prepare_answer() must call aclose().
+    """
+
     def __init__(self, access_token: Optional[str] = None):
         self.access_token = access_token
         # For widget queries (access_token=None), use service role
         if access_token is None:
-            self.db = get_supabase_client(use_service_role=True)
-            # Embedding service can work without access_token (uses service role internally if needed)
-            self.embedding = EmbeddingService(access_token=None)
-            self.query_repo = QueryRepository(access_token=None)
-            # SourceRepository is only used when include_metadata=True (widget queries use False)
-            # So we don't need to initialize it for widget queries - lazy initialization if needed
-            self.source_repo = None  # Will be initialized lazily if include_metadata=True
+            self.db = get_async_postgrest_client(use_service_role=True)
         else:
-            self.db = get_supabase_client(access_token=access_token)
-            self.embedding = EmbeddingService(access_token=access_token)
-            self.query_repo = QueryRepository(access_token=access_token)
-            self.source_repo = SourceRepository(access_token=access_token)
+            self.db = get_async_postgrest_client(access_token=access_token)
+        self.embedding = EmbeddingService(access_token=access_token)
+        self.query_repo = QueryRepository(access_token=access_token, async_client=self.db)
+
+    async def aclose(self) -> None:
+        """Close per-request database connections (the shared service role client stays open)"""
+        if self.access_token is not None:
+            try:
+                await self.db.aclose()
+            except Exception as e:
+                logger.debug(f"Failed to close async client: {e}")
 
-    def retrieve(self, bot_id: UUID, query_text: str, top_k: int = 5, min_score: float = 0.25) -> List[Dict[str, Any]]:
+    async def retrieve(self, bot_id: UUID, query_text: str, top_k: int = 5, min_score: float = 0.25, query_vec: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         if not query_text or not query_text.strip():
             raise ValidationError("query_text is required")
 
-        # Embed query (single-vector batch)
-        vectors, provider = self.embedding._embed_with_fallback([query_text])
-        query_vec = vectors[0]
-        logger.debug(f"Query embedded: bot_id={bot_id}, provider={provider}")
+        if query_vec is None:
+            # Embed query (served from the query embedding cache when possible)
+            query_vec, provider = await self.embedding.embed_query_async(query_text)
+            logger.debug(f"Query embedded: bot_id={bot_id}, provider={provider}")
 
         # Call SQL function search_similar_chunks(bot_id, embedding, threshold, limit)
         try:
-            # Supabase Python client: use rpc with exact SQL arg names
-            response = self.db.rpc(
+            response = await self.db.rpc(
                 "search_similar_chunks",
                 {
                     "bot_uuid": str(bot_id),
@@ -62,54 +88,180 @@ class RagService:
             logger.error(f"Retrieval failed: bot_id={bot_id}, error={str(e)}")
             raise DatabaseError(f"Retrieval failed: {str(e)}")
 
-    def answer(self, bot_id: UUID, user_id: Optional[str], query_text: str, top_k: int = 5, min_score: float = 0.25, session_id: Optional[str] = None, page_url: Optional[str] = None, include_metadata: bool = False, chat_history: Optional[List[Dict[str, str]]] = None, custom_prompt: Optional[str] = None) -> Dict[str, Any]:
-        # Check query limits before processing
-        plan_service = PlanService(use_service_role=True)
-        
-        # Get plan for bot owner (works for both authenticated and widget queries)
-        bot_plan = plan_service.get_plan_for_bot(str(bot_id))
-        
-        # Check query per bot per day limit
+    async def answer(self, bot_id: UUID, user_id: Optional[str], query_text: str, top_k: int = 5, min_score: float = 0.25, session_id: Optional[str] = None, page_url: Optional[str] = None, include_metadata: bool = False, chat_history: Optional[List[Dict[str, str]]] = None, custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            prepared = await self.prepare_answer(bot_id, user_id, query_text, top_k, min_score, session_id, page_url, include_metadata, chat_history, custom_prompt)
+
+            if prepared["cached"] is not None:
+                self._log_query(prepared, prepared["cached"], usage=None, cache_hit=True)
+                return prepared["cached"]
+
+            llm = LLMService()
+            answer_text, usage, provider_used = await llm.generate_async(prepared["prompt"])
+
+            result = {
+                "answer": answer_text,
+                "citations": prepared["citations"],
+                "confidence": prepared["confidence"],
+                "context_preview": prepared["context"][:1000],
+            }
+
+            if prepared["cache_variant"] is not None:
+                answer_cache.store(str(bot_id), prepared["cache_variant"], prepared["query_vec"], result)
+
+            self._log_query(prepared, result, usage=usage)
+
+            return result
+        finally:
+            await self.aclose()
+
+    async def stream_answer(self, prepared: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer for a request prepared by prepare_answer().
+
+        Yields a "citations" event first, then "token" events as the LLM produces
+        them, then a final "done" event. The query is logged when the stream closes,
+        including when the client disconnects mid-answer.
+        """
+        cached = prepared["cached"]
+        parts: List[str] = []
+        usage: Optional[Dict[str, Any]] = None
+        completed = False
+        try:
+            yield {
+                "type": "citations",
+                "citations": (cached or prepared)["citations"],
+                "confidence": (cached or prepared)["confidence"],
+            }
+
+            if cached is not None:
+                yield {"type": "token", "text": cached.get("answer", "")}
+                yield {"type": "done", "latency_ms": self._elapsed_ms(prepared), "cache_hit": True}
+                return
+
+            async for event in LLMService().generate_stream(prepared["prompt"]):
+                if event["type"] == "token":
+                    parts.append(event["text"])
+                    yield event
+                elif event["type"] == "done":
+                    usage = event.get("usage")
+            completed = True
+
+            yield {"type": "done", "latency_ms": self._elapsed_ms(prepared), "usage": usage, "cache_hit": False}
+        finally:
+            # Runs on completion, on errors and when the client goes away. Logging only
+            # enqueues; closing is scheduled as a task because awaiting here fails once
+            # the request is cancelled.
+            if cached is not None:
+                self._log_query(prepared, cached, usage=None, cache_hit=True)
+            else:
+                result = {
+                    "answer": "".join(parts),
+                    "citations": prepared["citations"],
+                    "confidence": prepared["confidence"],
+                    "context_preview": prepared["context"][:1000],
+                }
+                if completed and prepared["cache_variant"] is not None:
+                    answer_cache.store(str(prepared["bot_id"]), prepared["cache_variant"], prepared["query_vec"], result)
+                if parts:
+                    self._log_query(prepared, result, usage=usage)
+            _spawn(self.aclose())
+
+    async def prepare_answer(self, bot_id: UUID, user_id: Optional[str], query_text: str, top_k: int = 5, min_score: float = 0.25, session_id: Optional[str] = None, page_url: Optional[str] = None, include_metadata: bool = False, chat_history: Optional[List[Dict[str, str]]] = None, custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run everything up to (but excluding) generation: quota check, query
+        embedding, bot/prompt lookup, chat history, answer cache and retrieval.
+
+        The plan lookup, daily quota count, bot fetch, chat history fetch and query
+        embedding are independent and run concurrently.
+
+        Raises before any output is produced, so streaming endpoints can surface
+        errors as regular HTTP responses.
+
+        Returns:
+            Dict with the assembled prompt, citations and logging context. If the
+            answer cache hit, "cached" holds the cached result and no retrieval ran.
+        """
+        if not query_text or not query_text.strip():
+            raise ValidationError("query_text is required")
+
+        t0 = time.time()
+
+        # The plan lookup and bot fetch share the bot config cache, so they cost no
+        # database round trip when the bot is warm
+        bot_plan, query_count, bot, history_turns, (query_vec, _) = await asyncio.gather(
+            # Get plan for bot owner (works for both authenticated and widget queries)
+            plan_service.get_plan_for_bot_async(str(bot_id)),
+            daily_usage_counter.get_count(bot_id),
+            self._fetch_bot(bot_id, user_id),
+            self._build_chat_history(bot_id, session_id, chat_history),
+            # Embed query up front; the vector serves both the answer cache and retrieval
+            self.embedding.embed_query_async(query_text),
+        )
+
+        # Check query per bot per day limit (count is None if the counter could not be read: fail open)
         max_queries_per_day = bot_plan.get("max_queries_per_bot_per_day")
-        if max_queries_per_day is not None:
-            # Count queries for this bot today (since midnight UTC)
-            from datetime import datetime, timezone, timedelta
-            now = datetime.now(timezone.utc)
-            midnight_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            try:
-                # Use service role to count queries
-                service_db = get_supabase_client(use_service_role=True)
-                query_count_resp = service_db.table("queries")\
-                    .select("*", count="exact")\
-                    .eq("bot_id", str(bot_id))\
-                    .gte("created_at", midnight_today.isoformat())\
-                    .execute()
-                
-                current_query_count = query_count_resp.count or 0
-                
-                if current_query_count >= max_queries_per_day:
-                    plan_name = bot_plan.get("display_name", "your plan")
-                    upgrade_email = "info@singlebit.xyz"
-                    raise ValidationError(
-                        f"You've reached the daily query limit ({max_queries_per_day} queries per bot per day) "
-                        f"on the {plan_name} plan. Payments are coming soon, but if you'd like "
-                        f"to use paid features now, please email us at {upgrade_email}."
-                    )
-            except ValidationError:
-                raise
-            except Exception as e:
-                logger.warning(f"Error checking query limit for bot {bot_id}: {str(e)}")
-                # Continue with query if limit check fails (fail open to avoid blocking)
-        
+        if max_queries_per_day is not None and query_count is not None and query_count >= max_queries_per_day:
+            plan_name = bot_plan.get("display_name", "your plan")
+            upgrade_email = "info@singlebit.xyz"
+            raise ValidationError(
+                f"You've reached the daily query limit ({max_queries_per_day} queries per bot per day) "
+                f"on the {plan_name} plan. Payments are coming soon, but if you'd like "
+                f"to use paid features now, please email us at {upgrade_email}."
+            )
+
+        # Use custom prompt if provided (for sandbox testing), otherwise use bot's prompt
+        if custom_prompt:
+            system_prompt = custom_prompt
+        else:
+            system_prompt = (bot or {}).get("system_prompt") if isinstance(bot, dict) else None
+            system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
+
+        prepared: Dict[str, Any] = {
+            "bot_id": bot_id,
+            "session_id": session_id,
+            "query_text": query_text,
+            "page_url": page_url,
+            "t0": t0,
+            "query_vec": query_vec,
+            "cache_variant": None,
+            "cached": None,
+            "citations": [],
+            "confidence": None,
+            "context": "",
+            "prompt": "",
+            "planned_prompt_tokens": None,
+        }
+
+        # Semantic answer cache: only plain questions (no conversation context, no sandbox prompt)
+        if settings.answer_cache_enabled and not custom_prompt and not history_turns:
+            cache_variant = (prompt_version(system_prompt), int(top_k), float(min_score), bool(include_metadata))
+            prepared["cache_variant"] = cache_variant
+            cached = answer_cache.lookup(str(bot_id), cache_variant, query_vec)
+            if cached is not None:
+                prepared["cached"] = cached
+                return prepared
+
         # Retrieve context
-        t0 = time.time()
-        chunks = self.retrieve(bot_id, query_text, top_k=top_k, min_score=min_score)
-        context = "\n\n".join([c.get("excerpt", "") for c in chunks])
-        
+        retrieved = await self.retrieve(bot_id, query_text, top_k=top_k, min_score=min_score, query_vec=query_vec)
+
+        # Fit history and context into the model's prompt budget and render the
+        # prompt (token counting is CPU-bound, so all of it runs off the event loop)
+        packer = get_context_packer(LLMService().preferred_model)
+
+        def plan_prompt():
+            fixed_tokens = packer.count(self._render_prompt(system_prompt, "", "", query_text, with_history=bool(history_turns)))
+            packed = packer.pack(fixed_tokens, history_turns, retrieved)
+            prompt = self._render_prompt(system_prompt, packed.history_text, packed.context, query_text, with_history=bool(packed.history))
+            return packed, prompt, packer.count(prompt)
+
+        packed, prompt, planned_prompt_tokens = await asyncio.to_thread(plan_prompt)
+        chunks = packed.chunks
+        context = packed.context
+
         confidence = None
         citations = []
-        
+
         # Only calculate confidence and fetch source info if metadata is requested (for testing/debugging)
         if include_metadata:
             # Calculate confidence from similarity scores (average of top scores)
@@ -119,7 +271,7 @@ class RagService:
                 confidence = sum(similarity_scores) / len(similarity_scores)
                 # Cap at 1.0
                 confidence = min(confidence, 1.0)
-            
+
             # Fetch source info for citations
             source_ids = set()
             chunk_source_map = {}
@@ -128,34 +280,23 @@ class RagService:
                 if source_id:
                     source_ids.add(source_id)
                     chunk_source_map[c.get("id")] = source_id
-            
-            # Batch fetch sources
+
+            # Batch fetch sources in one request
             # Note: Widget queries always use include_metadata=False, so this code only runs for authenticated queries
-            # Lazy initialize source_repo if needed
-            if self.source_repo is None:
-                self.source_repo = SourceRepository(access_token=self.access_token)
-            
-            sources_map = {}
-            for source_id in source_ids:
-                try:
-                    source = self.source_repo.get_source_by_id(UUID(source_id))
-                    if source:
-                        sources_map[source_id] = source
-                except Exception as e:
-                    logger.warning(f"Failed to fetch source {source_id}: {e}")
-            
+            sources_map = await self._fetch_sources(source_ids)
+
             # Build citations with source info
             for c in chunks:
                 chunk_id = c.get("id")
                 source_id = chunk_source_map.get(chunk_id)
                 source_info = sources_map.get(source_id) if source_id else None
-                
+
                 citation = {
                     "chunk_id": chunk_id,
                     "heading": c.get("heading"),
                     "score": c.get("similarity"),
                 }
-                
+
                 # Add source info if available
                 if source_info:
                     citation["source"] = {
@@ -173,37 +314,70 @@ class RagService:
                             parts = storage_path.split("/")
                             if parts:
                                 citation["source"]["filename"] = parts[-1]
-                
+
                 citations.append(citation)
         else:
             # Lightweight citations for production (just chunk IDs)
             citations = [{"chunk_id": c.get("id")} for c in chunks]
 
-        # Fetch bot to verify ownership and get system_prompt
-        bot_service = BotService()
-        bot = None
+        logger.debug(f"Prompt planned: bot_id={bot_id}, tokens={planned_prompt_tokens}, budget={packer.budget}, chunks={len(chunks)}/{len(retrieved)}")
+
+        prepared.update({
+            "citations": citations,
+            "confidence": confidence,
+            "context": context,
+            "prompt": prompt,
+            "planned_prompt_tokens": planned_prompt_tokens,
+        })
+        return prepared
+
+    @staticmethod
+    def _render_prompt(system_prompt: str, chat_history: str, context: str, query_text: str, with_history: bool) -> str:
+        """Build the LLM prompt, with the conversation section if with_history"""
+        if with_history:
+            return (
+                f"System prompt: {system_prompt}\n\n"
+                f"Previous conversation:\n{chat_history}\n\n"
+                f"Context from knowledge base:\n{context}\n\n"
+                f"User question: {query_text}\n\n"
+                f"Answer concisely and cite sources by heading if helpful. Consider the conversation history when answering."
+            )
+        return (
+            f"System prompt: {system_prompt}\n\n"
+            f"Context:\n{context}\n\n"
+            f"User question: {query_text}\n\n"
+            f"Answer concisely and cite sources by heading if helpful."
+        )
+
+    async def _fetch_bot(self, bot_id: UUID, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get the bot configuration from the bot config cache.
+        For authenticated queries also verify ownership; widget queries are
+        already scoped to the bot by their token.
+
+        Raises:
+            DatabaseError: If the lookup fails on an authenticated query (widget
+                queries carry on with the default configuration)
+        """
+        try:
+            bot = await bot_config_cache.get_async(str(bot_id))
+        except Exception as e:
+            logger.warning(f"Failed to fetch bot config: bot_id={bot_id}, error={str(e)}")
+            if user_id:
+                # Not a missing bot: let the owner see a server error, not a 404
+                raise DatabaseError(f"Failed to fetch bot: {str(e)}") from e
+            bot = None
+
         if user_id:
-            # Authenticated user query: verify ownership
-            bot = bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
-        else:
-            # Widget query: get bot without ownership check (token already validates access)
-            # Use service role to bypass RLS
-            service_db = get_supabase_client(use_service_role=True)
-            try:
-                result = service_db.table("bots").select("*").eq("id", str(bot_id)).single().execute()
-                bot = result.data if result.data else None
-            except Exception as e:
-                logger.warning(f"Failed to fetch bot for widget query: {e}")
-        
-        # Use custom prompt if provided (for sandbox testing), otherwise use bot's prompt
-        if custom_prompt:
-            system_prompt = custom_prompt
-        else:
-            system_prompt = (bot or {}).get("system_prompt") if isinstance(bot, dict) else None
-            system_prompt = system_prompt or "You are a helpful assistant. Use the provided context to answer. If unsure, say you don't know."
+            if not bot:
+                raise NotFoundError("Bot", str(bot_id))
+            if bot.get("created_by") != str(user_id):
+                logger.warning(f"Bot access denied: bot_id={bot_id}, requested_by={user_id}, owner={bot.get('created_by')}")
+                raise AuthorizationError("You do not have access to this bot")
+        return bot
 
-        # Build chat history string from provided chat_history or fetch from DB
-        chat_history_str = ""
+    async def _build_chat_history(self, bot_id: UUID, session_id: Optional[str], chat_history: Optional[List[Dict[str, str]]]) -> List[str]:
+        """Build chat history turns (oldest first) from provided chat_history or fetch from DB"""
         if chat_history:
             # Use chat history provided by client (from localStorage)
             history_parts = []
@@ -212,75 +386,77 @@ class RagService:
                 response = pair.get("response", "").strip()
                 if query and response:
                     history_parts.append(f"User: {query}\nAssistant: {response}")
-            
+
             if history_parts:
-                chat_history_str = "\n\n".join(history_parts)
                 logger.debug(f"Using {len(history_parts)} previous messages from client chat history")
-        elif session_id:
+            return history_parts
+
+        if session_id:
             # Fallback: fetch from database if chat_history not provided
-            try:
-                recent_messages = self.query_repo.get_recent_messages(bot_id, session_id, limit=5)
-                if recent_messages:
-                    history_parts = []
-                    for msg in recent_messages:
-                        query = msg.get("query_text", "")
-                        response = msg.get("response_summary", "")
-                        if query and response:
-                            history_parts.append(f"User: {query}\nAssistant: {response}")
-                    
-                    if history_parts:
-                        chat_history_str = "\n\n".join(history_parts)
-                        logger.debug(f"Retrieved {len(recent_messages)} previous messages from database for session {session_id}")
-            except Exception as e:
-                logger.warning(f"Failed to retrieve chat history from database: {e}")
+            recent_messages = await self.query_repo.get_recent_messages_async(bot_id, session_id, limit=5)
+            history_parts = []
+            for msg in recent_messages:
+                query = msg.get("query_text", "")
+                response = msg.get("response_summary", "")
+                if query and response:
+                    history_parts.append(f"User: {query}\nAssistant: {response}")
 
-        # Build prompt with chat history if available
-        if chat_history_str:
-            prompt = (
-                f"System prompt: {system_prompt}\n\n"
-                f"Previous conversation:\n{chat_history_str}\n\n"
-                f"Context from knowledge base:\n{context}\n\n"
-                f"User question: {query_text}\n\n"
-                f"Answer concisely and cite sources by heading if helpful. Consider the conversation history when answering."
-            )
-        else:
-            prompt = (
-                f"System prompt: {system_prompt}\n\n"
-                f"Context:\n{context}\n\n"
-                f"User question: {query_text}\n\n"
-                f"Answer concisely and cite sources by heading if helpful."
-            )
+            if history_parts:
+                logger.debug(f"Retrieved {len(recent_messages)} previous messages from database for session {session_id}")
+            return history_parts
 
-        llm = LLMService()
-        answer_text, usage, provider_used = llm.generate(prompt)
-        latency_ms = int((time.time() - t0) * 1000)
+        return []
 
-        result = {
-            "answer": answer_text,
-            "citations": citations,
-            "confidence": confidence,
-            "context_preview": context[:1000],
-        }
+    async def _fetch_sources(self, source_ids: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch source rows for citations, keyed by source id"""
+        if not source_ids:
+            return {}
+        try:
+            response = await self.db.table("sources")\
+                .select("id, source_type, original_url, canonical_url, storage_path")\
+                .in_("id", list(source_ids))\
+                .execute()
+            return {str(row["id"]): row for row in (response.data or [])}
+        except Exception as e:
+            logger.warning(f"Failed to fetch sources {sorted(source_ids)}: {e}")
+            return {}
 
-        # Log query
+    def _log_query(
+        self,
+        prepared: Dict[str, Any],
+        result: Dict[str, Any],
+        usage: Optional[Dict[str, Any]],
+        cache_hit: bool = False,
+    ) -> None:
+        """
+        Count a query toward the daily quota and queue its log record.
+
+        Never blocks: the record is written by the query log buffer in a later
+        batch. Failures are logged and swallowed.
+        """
+        latency_ms = self._elapsed_ms(prepared)
+        daily_usage_counter.record(prepared["bot_id"])
         try:
-            sid = session_id or "server-session"
-            self.query_repo.create_query(
-                bot_id=bot_id,
+            sid = prepared["session_id"] or "server-session"
+            record = QueryRepository.build_query_record(
+                bot_id=prepared["bot_id"],
                 session_id=sid,
-                query_text=query_text,
-                page_url=page_url,
-                returned_sources=citations,
-                response_summary=answer_text[:2000],
+                query_text=prepared["query_text"],
+                page_url=prepared["page_url"],
+                returned_sources=result.get("citations") or [],
+                response_summary=(result.get("answer") or "")[:2000],
                 tokens_used=(usage.get("total_tokens") if isinstance(usage, dict) else 0) or 0,
                 prompt_tokens=(usage.get("prompt_tokens") if isinstance(usage, dict) else None),
                 completion_tokens=(usage.get("completion_tokens") if isinstance(usage, dict) else None),
-                confidence=confidence,
+                planned_prompt_tokens=prepared.get("planned_prompt_tokens"),
+                confidence=result.get("confidence"),
                 latency_ms=latency_ms,
+                cache_hit=cache_hit,
             )
+            query_log_buffer.enqueue(record)
         except Exception as e:
             logger.warning(f"Failed to log query: {e}")
 
-        return result
-
-
+    @staticmethod
+    def _elapsed_ms(prepared: Dict[str, Any]) -> int:
+        return int((time.time() - prepared["t0"]) * 1000)
@@ -12,8 +12,9 @@ from urllib.parse import urlparse
 
 from core.exceptions import ValidationError, NotFoundError, AuthorizationError, DatabaseError
 from repositories.source_repo import SourceRepository
-from services.bot_service import BotService
-from services.plan_service import PlanService
+from services.bot_service import bot_service
+from services.plan_service import plan_service
+from services.answer_cache import answer_cache
 from models.source_model import SourceType, SourceStatus
 from config.supabasedb import get_supabase_client
 
@@ -98,7 +99,6 @@ class SourceService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         # Validate source type for files
@@ -106,7 +106,6 @@ class SourceService:
             raise ValidationError(f"Invalid source type for file upload: {source_type}")
 
         # Get user plan to check limits
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         # Check document limit per bot
@@ -175,11 +174,9 @@ class SourceService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         # Get user plan to check limits
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         # Check URL limit per bot
@@ -231,7 +228,6 @@ class SourceService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         return self.repository.get_sources_by_bot(bot_id)
@@ -254,7 +250,6 @@ class SourceService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         source = self.repository.get_source_by_id(source_id)
@@ -267,6 +262,33 @@ class SourceService:
 
         return source
 
+    def get_refreshable_sources(self, bot_id: UUID, user_id: UUID, source_id: Optional[UUID] = None) -> List[dict]:
+        """
+        Get the URL sources of a bot to re-crawl (one source, or all of them).
+
+        Args:
+            bot_id: ID of the bot
+            user_id: ID of the user (for authorization)
+            source_id: Optional single source to refresh
+
+        Returns:
+            List of URL source records
+
+        Raises:
+            ValidationError: If the requested source is not a URL source
+            AuthorizationError: If user doesn't own the bot
+            NotFoundError: If source not found
+            DatabaseError: If database operation fails
+        """
+        if source_id is not None:
+            source = self.get_source(source_id, bot_id, user_id)
+            if source.get("source_type") != SourceType.HTML.value:
+                raise ValidationError("Only URL sources can be refreshed")
+            return [source]
+
+        sources = self.get_sources_by_bot(bot_id, user_id)
+        return [s for s in sources if s.get("source_type") == SourceType.HTML.value]
+
     def delete_source(self, source_id: UUID, bot_id: UUID, user_id: UUID) -> bool:
         """
         Delete a source and its associated file from storage.
@@ -285,7 +307,6 @@ class SourceService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         # Get source details before deletion to get storage path
@@ -322,5 +343,7 @@ class SourceService:
             logger.info(f"Skipping storage deletion for URL source {source_id}")
 
         # Delete the database row
-        return self.repository.delete_source(source_id, bot_id)
+        deleted = self.repository.delete_source(source_id, bot_id)
+        answer_cache.invalidate_bot(str(bot_id))
+        return deleted
 
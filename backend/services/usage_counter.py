@@ -0,0 +1,185 @@
+"""
+Daily Usage Counter
+
+Per-bot, per-UTC-day query counters for the daily quota check.
+
+Each process keeps an in-memory count per bot: the last value read from the
+bot_daily_usage table plus increments recorded locally that have not been
+written yet. Local increments are flushed in batches through the
+increment_bot_daily_usage RPC, the database value is re-read every few seconds
+to pick up other workers, and the table is periodically reconciled against the
+queries table (yesterday is reset to its final count; today's counters are
+only raised, since query logs still in write-behind buffers are not counted).
+A quota check is a dictionary lookup on the hot path and at most one
+single-row read otherwise.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+from repositories.usage_repo import UsageRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+@dataclass
+class _DailyUsage:
+    stored: int = 0  # Last count read from / written to the database
+    pending: int = 0  # Local increments not yet flushed
+    fetched_at: float = 0.0  # time.monotonic() of the last database read
+
+
+class DailyUsageCounter:
+    """In-process daily query counters backed by the bot_daily_usage table"""
+
+    def __init__(
+        self,
+        refresh_seconds: float = 10,
+        flush_interval_seconds: float = 5,
+        flush_threshold: int = 50,
+        reconcile_interval_seconds: float = 600,
+    ):
+        """
+        Initialize the counter.
+
+        Args:
+            refresh_seconds: How long a database read is trusted before re-reading
+            flush_interval_seconds: How often pending increments are written
+            flush_threshold: Pending increments (all bots) that trigger an early flush
+            reconcile_interval_seconds: How often counters are reset from the queries table
+        """
+        self.refresh_seconds = refresh_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_threshold = flush_threshold
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        # (bot_id, day) -> usage
+        self._usage: Dict[Tuple[str, date], _DailyUsage] = {}
+        self._pending_total = 0
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_count(self, bot_id: UUID) -> Optional[int]:
+        """
+        Current query count for a bot today.
+
+        Returns:
+            Count including unflushed local increments, or None if the counter
+            could not be read (callers fail open)
+        """
+        key = (str(bot_id), _today())
+        usage = self._usage.get(key)
+        if usage is not None and time.monotonic() - usage.fetched_at < self.refresh_seconds:
+            return usage.stored + usage.pending
+
+        try:
+            stored = await UsageRepository().get_daily_query_count(bot_id, key[1])
+        except Exception as e:
+            logger.warning(f"Error reading daily usage for bot {bot_id}: {str(e)}")
+            return None
+
+        usage = self._usage.setdefault(key, _DailyUsage())
+        usage.stored = stored
+        usage.fetched_at = time.monotonic()
+        return usage.stored + usage.pending
+
+    def record(self, bot_id: UUID, amount: int = 1) -> None:
+        """Count served queries for a bot today (written to the database asynchronously)"""
+        usage = self._usage.setdefault((str(bot_id), _today()), _DailyUsage())
+        usage.pending += amount
+        self._pending_total += amount
+        if self._pending_total >= self.flush_threshold and not self._flush_lock.locked():
+            asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Write pending increments with one RPC call per bot/day"""
+        async with self._flush_lock:
+            batch = [(key, usage.pending) for key, usage in self._usage.items() if usage.pending]
+            if not batch:
+                return
+
+            repo = UsageRepository()
+            for (bot_id, day), amount in batch:
+                usage = self._usage.get((bot_id, day))
+                if usage is None:
+                    continue
+                try:
+                    new_count = await repo.increment_daily_query_count(bot_id, day, amount)
+                except Exception as e:
+                    # Keep the increments; the next flush retries them
+                    logger.warning(f"Failed to flush daily usage for bot {bot_id}: {str(e)}")
+                    continue
+                usage.pending -= amount
+                self._pending_total -= amount
+                usage.stored = new_count
+                usage.fetched_at = time.monotonic()
+
+            # Forget past days once they are fully written
+            today = _today()
+            for key in [k for k, u in self._usage.items() if k[1] < today and not u.pending]:
+                del self._usage[key]
+
+    async def reconcile(self) -> None:
+        """
+        Reconcile yesterday's and today's counters with the queries table and
+        re-read them on next use. Yesterday is closed and reset to its count;
+        today's counters can only go up (the RPC never lowers them).
+        """
+        await self.flush()
+        today = _today()
+        try:
+            repo = UsageRepository()
+            closed = await repo.reconcile_daily_query_counts(today - timedelta(days=1))
+            updated = await repo.reconcile_daily_query_counts(today)
+            logger.info(f"Daily usage reconciled: bots_yesterday={closed}, bots_today={updated}")
+        except Exception as e:
+            logger.warning(f"Daily usage reconcile failed: {str(e)}")
+            return
+        for usage in self._usage.values():
+            usage.fetched_at = 0.0
+
+    def start(self) -> None:
+        """Start the background flush/reconcile loop (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and flush pending increments"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        last_reconcile = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                if self.reconcile_interval_seconds and time.monotonic() - last_reconcile >= self.reconcile_interval_seconds:
+                    last_reconcile = time.monotonic()
+                    await self.reconcile()
+                else:
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Daily usage background task error: {str(e)}")
+
+
+# Global daily usage counter instance
+daily_usage_counter = DailyUsageCounter(
+    refresh_seconds=settings.usage_counter_refresh_seconds,
+    flush_interval_seconds=settings.usage_counter_flush_interval_seconds,
+    reconcile_interval_seconds=settings.usage_counter_reconcile_interval_seconds,
+)
@@ -0,0 +1,154 @@
+"""
+Widget Token Cache
+
+Process-wide TTL cache of validated widget tokens, keyed by the SHA-256 hash
+of the plain token. Entries hold the token record with its expiry already
+parsed and its allowed domains already normalized, so a widget request is
+validated without touching the database. Revoking a token evicts it
+immediately; other workers drop it when the (short) TTL expires.
+
+last_used_at updates are coalesced: each use is recorded in memory and a
+background task writes one batched update per flush interval, so the column
+is accurate to that interval.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+from config.settings import settings
+from core.cache import TTLCache
+from repositories.widget_token_repo import WidgetTokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a PostgREST timestamp into a timezone-aware datetime"""
+    if not value:
+        return None
+    if value.endswith("Z"):
+        value = value.replace("Z", "+00:00")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+@dataclass
+class CachedWidgetToken:
+    """A widget token record prepared for validation"""
+    data: Dict[str, Any]
+    expires_at: Optional[datetime] = None
+    allowed_domains: Tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "CachedWidgetToken":
+        return cls(
+            data=record,
+            expires_at=parse_timestamp(record.get("expires_at")),
+            allowed_domains=tuple(d.rstrip("/") for d in (record.get("allowed_domains") or []) if d),
+        )
+
+
+class WidgetTokenCache:
+    """Validated widget tokens by hash, plus coalesced last_used_at writes"""
+
+    def __init__(self, ttl_seconds: float = 60, flush_interval_seconds: float = 60, max_entries: int = 10_000):
+        """
+        Initialize widget token cache.
+
+        Args:
+            ttl_seconds: Time-to-live for cached tokens (0 disables caching)
+            flush_interval_seconds: How often pending last_used_at updates are written
+            max_entries: Maximum number of cached tokens
+        """
+        self.flush_interval_seconds = flush_interval_seconds
+        self._cache = TTLCache(name="widget_tokens", ttl_seconds=ttl_seconds, max_entries=max_entries)
+        # token id -> token hash, for eviction on revoke
+        self._hash_by_id: Dict[str, str] = {}
+        # token id -> latest use not yet written
+        self._last_used: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, token_hash: str) -> Optional[CachedWidgetToken]:
+        """Return the cached token for a hash, or None on a miss"""
+        return self._cache.get(token_hash)
+
+    def store(self, token_hash: str, record: Dict[str, Any]) -> CachedWidgetToken:
+        """Prepare a token record for validation and cache it"""
+        entry = CachedWidgetToken.from_record(record)
+        self._cache.set(token_hash, entry)
+        with self._lock:
+            if len(self._hash_by_id) > self._cache.max_entries:
+                self._hash_by_id = {i: h for i, h in self._hash_by_id.items() if h in self._cache}
+            self._hash_by_id[str(record["id"])] = token_hash
+        return entry
+
+    def invalidate(self, token_id: str) -> None:
+        """Evict a token by id (called on revoke)"""
+        with self._lock:
+            token_hash = self._hash_by_id.pop(str(token_id), None)
+            self._last_used.pop(str(token_id), None)
+        if token_hash and self._cache.delete(token_hash):
+            logger.debug(f"Widget token cache invalidated: token_id={token_id}")
+
+    def touch(self, token_id: str) -> None:
+        """Record a token use; written to last_used_at on the next flush"""
+        with self._lock:
+            self._last_used[str(token_id)] = datetime.now(timezone.utc)
+
+    async def flush(self) -> None:
+        """Write pending last_used_at values in a single update"""
+        with self._lock:
+            pending, self._last_used = self._last_used, {}
+        if not pending:
+            return
+        try:
+            await WidgetTokenRepository.update_last_used_many_async(list(pending), max(pending.values()))
+        except Exception as e:
+            # Keep the newest timestamps; the next flush retries them
+            logger.warning(f"Failed to flush widget token last_used_at ({len(pending)} tokens): {str(e)}")
+            with self._lock:
+                for token_id, used_at in pending.items():
+                    # Anything recorded since the swap is newer
+                    self._last_used.setdefault(token_id, used_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        return {**self._cache.stats(), "pending_last_used": len(self._last_used)}
+
+    def start(self) -> None:
+        """Start the background flush loop (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and write pending updates"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Widget token flush task error: {str(e)}")
+
+
+# Global widget token cache instance
+widget_token_cache = WidgetTokenCache(
+    ttl_seconds=settings.widget_token_cache_ttl_seconds,
+    flush_interval_seconds=settings.widget_token_last_used_flush_seconds,
+)
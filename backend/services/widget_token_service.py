@@ -14,8 +14,9 @@ import logging
 
 from core.exceptions import ValidationError, NotFoundError, AuthorizationError
 from repositories.widget_token_repo import WidgetTokenRepository
-from services.bot_service import BotService
-from services.plan_service import PlanService
+from services.bot_service import bot_service
+from services.plan_service import plan_service
+from services.widget_token_cache import widget_token_cache
 
 logger = logging.getLogger(__name__)
 
@@ -78,11 +79,9 @@ class WidgetTokenService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot = bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         # Get user plan to check limits
-        plan_service = PlanService(use_service_role=True)
         user_plan = plan_service.get_plan_for_user(str(user_id))
         
         # Check widget token limit per bot
@@ -148,7 +147,6 @@ class WidgetTokenService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
         return self.repository.get_tokens_by_bot(bot_id)
@@ -168,33 +166,27 @@ class WidgetTokenService:
             # Hash the provided token
             token_hash = hashlib.sha256(token.encode()).hexdigest()
 
-            # Get token from database
-            token_data = self.repository.get_token_by_hash(token_hash)
+            # Cached tokens skip the database entirely
+            entry = widget_token_cache.get(token_hash)
+            if entry is None:
+                token_data = self.repository.get_token_by_hash(token_hash)
 
-            if not token_data:
-                logger.warning("Token not found")
-                return None
+                if not token_data:
+                    logger.warning("Token not found")
+                    return None
+
+                entry = widget_token_cache.store(token_hash, token_data)
+
+            token_data = entry.data
 
             # Check expiration
             from datetime import timezone
-            if token_data.get("expires_at"):
-                expires_at_str = token_data["expires_at"]
-                # Handle different timestamp formats
-                if expires_at_str.endswith("Z"):
-                    expires_at = datetime.fromisoformat(expires_at_str.replace("Z", "+00:00"))
-                else:
-                    expires_at = datetime.fromisoformat(expires_at_str)
-                
-                # Ensure timezone-aware
-                if expires_at.tzinfo is None:
-                    expires_at = expires_at.replace(tzinfo=timezone.utc)
-                
-                if expires_at <= datetime.now(timezone.utc):
-                    logger.warning(f"Token {token_data['id']} has expired")
-                    return None
+            if entry.expires_at and entry.expires_at <= datetime.now(timezone.utc):
+                logger.warning(f"Token {token_data['id']} has expired")
+                return None
 
-            # Check domain whitelist
-            allowed_domains = token_data.get("allowed_domains", [])
+            # Check domain whitelist (normalized when the token was cached)
+            allowed_domains = entry.allowed_domains
             
             # Check if we're in development mode (allows origin=None for testing)
             from config.settings import settings
@@ -213,19 +205,16 @@ class WidgetTokenService:
                     # Origin provided - validate it matches allowed domains
                     origin_normalized = origin.rstrip("/")
                     
-                    # Check if origin matches any allowed domain
-                    domain_match = False
-                    for domain in allowed_domains:
-                        domain_normalized = domain.rstrip("/")
-                        # Exact match or subdomain match
-                        if (origin_normalized == domain_normalized or
-                            origin_normalized.endswith(f".{domain_normalized}") or
-                            origin_normalized.startswith(domain_normalized)):
-                            domain_match = True
-                            break
+                    # Check if origin matches any allowed domain (exact match or subdomain match)
+                    domain_match = any(
+                        origin_normalized == domain
+                        or origin_normalized.endswith(f".{domain}")
+                        or origin_normalized.startswith(domain)
+                        for domain in allowed_domains
+                    )
 
                     if not domain_match:
-                        logger.warning(f"Origin {origin} not in allowed domains for token {token_data['id']}::{allowed_domains}")
+                        logger.warning(f"Origin {origin} not in allowed domains for token {token_data['id']}::{list(allowed_domains)}")
                         return None
             else:
                 # If no allowed_domains configured, check environment
@@ -235,10 +224,10 @@ class WidgetTokenService:
                     return None
                 # In dev mode, allow origin=None for tokens without domain restrictions
 
-            # Update last_used_at
-            self.repository.update_last_used(UUID(token_data["id"]))
+            # Record last_used_at (written in a periodic batch)
+            widget_token_cache.touch(token_data["id"])
 
-            return token_data
+            return dict(token_data)
 
         except Exception as e:
             logger.error(f"Error validating token: {str(e)}")
@@ -262,8 +251,9 @@ class WidgetTokenService:
             DatabaseError: If database operation fails
         """
         # Verify user owns the bot
-        bot_service = BotService()
         bot_service.get_bot(str(bot_id), str(user_id), access_token=self.access_token)
 
-        return self.repository.delete_token(token_id, bot_id)
+        deleted = self.repository.delete_token(token_id, bot_id)
+        widget_token_cache.invalidate(str(token_id))
+        return deleted
 
@@ -0,0 +1,101 @@
+"""
+PDF page extraction benchmark: serial vs the process pool at several worker counts.
+
+Writes synthetic text PDFs (one Helvetica text block per page) of each size to
+a temporary directory and times PDFParser.iter_pages over them. The pool is
+warmed up before timing, so process start-up isn't counted. Reports seconds
+per document and speed-up over serial extraction.
+
+Run from backend/:
+    python tests/bench_pdf_pages.py --pages 50 300 1000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LINES_PER_PAGE = 45
+WORDS = "the quick brown fox jumps over a lazy dog while seven wizards quietly box jugs".split()
+
+
+def _write_pdf(path, pages):
+    """Write a minimal PDF with pages of plain text lines"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page_num in range(pages):
+        lines = []
+        for line_num in range(LINES_PER_PAGE):
+            words = [WORDS[(page_num + line_num + i) % len(WORDS)] for i in range(12)]
+            lines.append(f"({' '.join(words).capitalize()} {page_num}.{line_num}.) Tj T*")
+        stream = ("BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(lines) + " ET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _run(parser, path):
+    t0 = time.perf_counter()
+    chars = sum(len(text) for text in parser.iter_pages(path))
+    return time.perf_counter() - t0, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 300, 1000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    args = parser.parse_args()
+
+    # Settings are loaded on import (and by each worker process); no Supabase calls are made
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+    os.environ.setdefault("SUPABASE_ANON_KEY", "bench-anon-key")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench-service-key")
+    from parsers.pdf_parser import PDFParser, shutdown_page_pool
+
+    print(f"cores: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"bench-{pages}.pdf")
+            _write_pdf(path, pages)
+            serial, chars = _run(PDFParser(workers=0), path)
+            print(f"{pages:>5} pages      serial: {serial:7.2f} s ({chars} chars)")
+            for workers in sorted(set(args.workers)):
+                pdf_parser = PDFParser(workers=workers, pages_per_task=args.pages_per_task, parallel_min_pages=0)
+                # Start the worker processes before timing
+                _run(pdf_parser, path)
+                elapsed, parallel_chars = _run(pdf_parser, path)
+                assert parallel_chars == chars, "parallel extraction returned different text"
+                print(
+                    f"{pages:>5} pages  {workers:>2} workers: {elapsed:7.2f} s "
+                    f"({serial / elapsed:.2f}x serial)"
+                )
+    shutdown_page_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Supabase client benchmark: per-call create_client vs the pooled PostgREST client.
+
+Simulates one authenticated query that builds the five user-scoped clients it
+needs (RagService, ChunkRepository, QueryRepository, SourceRepository,
+BotRepository) and makes one request with each, against a local stub that
+speaks just enough PostgREST. Reports TCP connections opened and Python
+allocations per query.
+
+Run from backend/:
+    python tests/bench_supabase_clients.py --queries 200
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CLIENTS_PER_QUERY = 5
+ACCESS_TOKEN = "bench-user-token"
+
+
+class _StubPostgrest(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        # Drain the request body (postgrest sends "{}"), or it is read as the
+        # start of the next request on the kept-alive connection
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _legacy_client(access_token):
+    """The pre-pooling behaviour: a full supabase Client per call"""
+    from supabase import create_client
+
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"])
+    client.postgrest.auth(access_token)
+    return client
+
+
+def _pooled_client(access_token):
+    from config.supabasedb import get_supabase_client
+
+    return get_supabase_client(access_token=access_token)
+
+
+def _run(factory, queries):
+    _StubPostgrest.connections = 0
+    tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    t0 = time.perf_counter()
+    for _ in range(queries):
+        for _ in range(CLIENTS_PER_QUERY):
+            factory(ACCESS_TOKEN).table("bots").select("id").limit(1).execute()
+    elapsed = time.perf_counter() - t0
+    stats = tracemalloc.take_snapshot().compare_to(start_snapshot, "filename")
+    tracemalloc.stop()
+    allocations = sum(max(stat.count_diff, 0) for stat in stats)
+    return {
+        "connections_per_query": _StubPostgrest.connections / queries,
+        "retained_allocations_per_query": allocations / queries,
+        "ms_per_query": elapsed * 1000 / queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubPostgrest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    # create_client only accepts JWT-shaped keys
+    os.environ.setdefault("SUPABASE_ANON_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.YmVuY2g")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench-service-key")
+
+    for name, factory in (("create_client per call", _legacy_client), ("pooled", _pooled_client)):
+        result = _run(factory, args.queries)
+        print(
+            f"{name:>24}: {result['connections_per_query']:.2f} connections/query, "
+            f"{result['retained_allocations_per_query']:.0f} retained allocations/query, "
+            f"{result['ms_per_query']:.2f} ms/query"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Ingestion worker entry point.
+
+Runs parsing, chunking and embedding jobs from the ingestion queue, separately
+from the API. Start as many as needed (each takes INGESTION_WORKER_CONCURRENCY
+jobs at a time); SIGTERM or Ctrl+C stops claiming and lets running jobs finish.
+
+Run from backend/:
+    python worker.py [--concurrency N] [--worker-id NAME]
+"""
+
+import argparse
+import signal
+
+from config.settings import settings
+from core.logging import setup_logging
+from parsers.pdf_parser import shutdown_page_pool
+from services.ingestion_worker import IngestionWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.ingestion_worker_concurrency)
+    parser.add_argument("--worker-id", default=None, help="Name recorded on claimed jobs (default: host:pid)")
+    args = parser.parse_args()
+
+    setup_logging()
+    worker = IngestionWorker(
+        concurrency=args.concurrency,
+        worker_id=args.worker_id,
+        lease_seconds=settings.ingestion_job_lease_seconds,
+        poll_interval_seconds=settings.ingestion_worker_poll_seconds,
+        retry_base_seconds=settings.ingestion_retry_base_seconds,
+        retry_max_seconds=settings.ingestion_retry_max_seconds,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    try:
+        worker.run()
+    finally:
+        shutdown_page_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -97,6 +97,7 @@ CREATE TABLE IF NOT EXISTS public.sources (
     etag TEXT,
     last_modified TIMESTAMP WITH TIME ZONE,
     page_checksum TEXT,  -- Content hash for deduplication
+    last_checked_at TIMESTAMP WITH TIME ZONE,  -- Last crawl or conditional re-check
     
     -- Metadata
     file_size BIGINT,  -- File size in bytes
@@ -194,10 +195,12 @@ CREATE TABLE IF NOT EXISTS public.queries (
     tokens_used INTEGER NOT NULL DEFAULT 0,
     prompt_tokens INTEGER,  -- Detailed token breakdown
     completion_tokens INTEGER,
+    planned_prompt_tokens INTEGER,  -- Prompt size planned by the context packer (cl100k_base)
     
     -- Quality metrics
     confidence FLOAT,  -- Confidence score 0-1
     latency_ms INTEGER,  -- Response time in milliseconds
+    cache_hit BOOLEAN NOT NULL DEFAULT FALSE,  -- Answer served from the semantic answer cache
     
     -- Feedback
     user_feedback TEXT,  -- 'thumbs_up', 'thumbs_down', or NULL
@@ -220,6 +223,10 @@ CREATE INDEX IF NOT EXISTS idx_queries_created_at ON public.queries(created_at D
 CREATE INDEX IF NOT EXISTS idx_queries_confidence ON public.queries(confidence) WHERE confidence IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_queries_feedback ON public.queries(user_feedback) WHERE user_feedback IS NOT NULL;
 
+-- Columns added after initial release (safe to re-run on existing databases)
+ALTER TABLE public.queries ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE public.queries ADD COLUMN IF NOT EXISTS planned_prompt_tokens INTEGER;
+
 -- =====================================================
 -- 6. CREATE SYSTEM PROMPT UPDATES TABLE
 -- =====================================================
@@ -782,6 +789,7 @@ export interface Source {
   etag?: string;
   last_modified?: string;
   page_checksum?: string;
+  last_checked_at?: string;
   file_size?: number;
   mime_type?: string;
   created_at: string;
@@ -817,8 +825,10 @@ export interface Query {
   tokens_used: number;
   prompt_tokens?: number;
   completion_tokens?: number;
+  planned_prompt_tokens?: number;
   confidence?: number;
   latency_ms?: number;
+  cache_hit: boolean;
   user_feedback?: 'thumbs_up' | 'thumbs_down';
   created_at: string;
 }
@@ -852,8 +862,388 @@ export interface RateLimit {
   window_start: string;
   count: number;
 }
+
+export interface BotDailyUsage {
+  bot_id: string;
+  usage_date: string;
+  query_count: number;
+  updated_at: string;
+}
+
+export interface IngestionJob {
+  id: string;
+  source_id: string;
+  bot_id: string;
+  kind: 'parse' | 'refresh';
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage: string | null;
+  attempts: number;
+  max_attempts: number;
+  run_after: string;
+  locked_by: string | null;
+  locked_at: string | null;
+  last_error: string | null;
+  created_at: string;
+  updated_at: string;
+  finished_at: string | null;
+}
 */
 
+-- =====================================================
+-- 23. CREATE BOT DAILY USAGE TABLE (query quota counters)
+-- =====================================================
+-- One row per bot per UTC day. The API increments it through
+-- increment_bot_daily_usage() so the daily quota check reads a single row
+-- instead of counting today's queries. reconcile_bot_daily_usage() brings the
+-- counters in line with the queries table and is run periodically: a closed
+-- day is reset to its count, while today's counter is only ever raised (query
+-- logs are written behind, so today's queries rows lag the counter).
+
+CREATE TABLE IF NOT EXISTS public.bot_daily_usage (
+    bot_id UUID NOT NULL REFERENCES public.bots(id) ON DELETE CASCADE,
+    usage_date DATE NOT NULL,  -- UTC day
+    query_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    PRIMARY KEY (bot_id, usage_date),
+    CONSTRAINT valid_query_count CHECK (query_count >= 0)
+);
+
+CREATE INDEX IF NOT EXISTS idx_bot_daily_usage_date ON public.bot_daily_usage(usage_date);
+
+-- Managed by service role only (no user policies)
+ALTER TABLE public.bot_daily_usage ENABLE ROW LEVEL SECURITY;
+
+-- Atomically add `amount` queries to a bot's counter for a day; returns the new count
+CREATE OR REPLACE FUNCTION public.increment_bot_daily_usage(
+    bot_uuid UUID,
+    usage_day DATE,
+    amount INTEGER DEFAULT 1
+)
+RETURNS INTEGER AS $$
+DECLARE
+    new_count INTEGER;
+BEGIN
+    INSERT INTO public.bot_daily_usage AS u (bot_id, usage_date, query_count, updated_at)
+    VALUES (bot_uuid, usage_day, GREATEST(amount, 0), NOW())
+    ON CONFLICT (bot_id, usage_date)
+    DO UPDATE SET
+        query_count = u.query_count + GREATEST(EXCLUDED.query_count, 0),
+        updated_at = NOW()
+    RETURNING u.query_count INTO new_count;
+    
+    RETURN new_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Reconcile a day's counters with the queries table; returns the number of bots updated.
+-- Past days are reset to the count; today's counters never go down.
+CREATE OR REPLACE FUNCTION public.reconcile_bot_daily_usage(
+    usage_day DATE DEFAULT (NOW() AT TIME ZONE 'UTC')::DATE
+)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    INSERT INTO public.bot_daily_usage AS u (bot_id, usage_date, query_count, updated_at)
+    SELECT q.bot_id, usage_day, COUNT(*), NOW()
+    FROM public.queries q
+    WHERE q.created_at >= (usage_day::TIMESTAMP AT TIME ZONE 'UTC')
+    AND q.created_at < ((usage_day + 1)::TIMESTAMP AT TIME ZONE 'UTC')
+    GROUP BY q.bot_id
+    ON CONFLICT (bot_id, usage_date)
+    DO UPDATE SET
+        query_count = CASE
+            WHEN usage_day < (NOW() AT TIME ZONE 'UTC')::DATE THEN EXCLUDED.query_count
+            -- Buffered and dropped query logs are missing from today's count
+            ELSE GREATEST(u.query_count, EXCLUDED.query_count)
+        END,
+        updated_at = NOW();
+    
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    
+    -- Drop counters older than a week (the quota only looks at today)
+    DELETE FROM public.bot_daily_usage WHERE usage_date < usage_day - 7;
+    
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT ALL ON public.bot_daily_usage TO service_role;
+GRANT EXECUTE ON FUNCTION public.increment_bot_daily_usage(UUID, DATE, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.reconcile_bot_daily_usage(DATE) TO service_role;
+
+-- =====================================================
+-- 24. BULK CHUNK EMBEDDING UPDATE
+-- =====================================================
+-- Writes a whole embedding batch in one statement. payload is a JSON array of
+-- {"id": "<chunk uuid>", "embedding": [..floats..]}. Runs with the caller's
+-- privileges, so RLS still limits users to chunks of their own bots.
+
+CREATE OR REPLACE FUNCTION public.update_chunk_embeddings(payload JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE public.chunks c
+    SET embedding = (p.value->>'embedding')::vector(1536)
+    FROM jsonb_array_elements(payload) AS p(value)
+    WHERE c.id = (p.value->>'id')::UUID;
+    
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION public.update_chunk_embeddings(JSONB) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.update_chunk_embeddings(JSONB) TO service_role;
+
+-- =====================================================
+-- 25. CREATE EMBEDDING CACHE TABLE (content-addressed vectors)
+-- =====================================================
+-- Embeddings keyed by SHA-256 of the chunk text plus provider, model and
+-- dimension, so re-uploaded documents and boilerplate repeated across pages
+-- are not embedded again. Shared across bots; service role only.
+
+CREATE TABLE IF NOT EXISTS public.embedding_cache (
+    content_hash TEXT NOT NULL,  -- SHA-256 hex of the chunk text
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    dimension INTEGER NOT NULL,
+    embedding vector NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    PRIMARY KEY (content_hash, provider, model, dimension)
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_created_at ON public.embedding_cache(created_at);
+
+-- Managed by service role only (no user policies)
+ALTER TABLE public.embedding_cache ENABLE ROW LEVEL SECURITY;
+
+-- Drop cache entries older than `max_age`; returns the number of rows deleted
+CREATE OR REPLACE FUNCTION public.cleanup_embedding_cache(max_age INTERVAL DEFAULT INTERVAL '90 days')
+RETURNS INTEGER AS $$
+DECLARE
+    deleted_count INTEGER;
+BEGIN
+    DELETE FROM public.embedding_cache WHERE created_at < NOW() - max_age;
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT ALL ON public.embedding_cache TO service_role;
+GRANT EXECUTE ON FUNCTION public.cleanup_embedding_cache(INTERVAL) TO service_role;
+
+-- =====================================================
+-- 26. SOURCE REFRESH METADATA
+-- =====================================================
+-- URL sources are re-crawled conditionally (If-None-Match / If-Modified-Since
+-- from etag and last_modified, then page_checksum). last_checked_at records
+-- the last check, including ones that found the page unchanged. Adds the
+-- column to databases created before it was part of the sources table.
+
+ALTER TABLE public.sources ADD COLUMN IF NOT EXISTS last_checked_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_sources_last_checked_at ON public.sources(last_checked_at) WHERE source_type = 'html';
+
+-- =====================================================
+-- 27. CREATE INGESTION JOBS TABLE (durable ingestion queue)
+-- =====================================================
+-- Parsing, chunking and embedding run in dedicated worker processes
+-- (backend/worker.py), not in the API. The API inserts jobs through
+-- enqueue_ingestion_jobs(); workers take them with claim_ingestion_jobs(),
+-- which uses FOR UPDATE SKIP LOCKED so any number of workers can poll the
+-- table without taking the same job. A running job's locked_at is renewed by
+-- its worker through renew_ingestion_job_leases(); a job whose lease has lapsed
+-- (the worker died) is claimed again, or failed once it has used all its
+-- attempts. Lease and retry times are set with the database clock. Service
+-- role only.
+
+CREATE TABLE IF NOT EXISTS public.ingestion_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    source_id UUID NOT NULL REFERENCES public.sources(id) ON DELETE CASCADE,
+    bot_id UUID NOT NULL REFERENCES public.bots(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL DEFAULT 'parse',  -- parse | refresh
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued | running | succeeded | failed
+    stage TEXT,  -- last pipeline stage reached (download, index, finalize)
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    locked_by TEXT,
+    locked_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE,
+    
+    CONSTRAINT valid_job_kind CHECK (kind IN ('parse', 'refresh')),
+    CONSTRAINT valid_job_status CHECK (status IN ('queued', 'running', 'succeeded', 'failed'))
+);
+
+-- At most one queued job per source and kind (repeated requests collapse into it)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_queued_source
+    ON public.ingestion_jobs(source_id, kind) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_ready ON public.ingestion_jobs(run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_running ON public.ingestion_jobs(locked_at) WHERE status = 'running';
+-- The API polls recently finished jobs to drop cached answers of their bots.
+-- finished_at is taken before the finishing transaction commits, so the poll
+-- re-reads an overlap window and skips job ids it has already seen.
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_finished ON public.ingestion_jobs(finished_at) WHERE status = 'succeeded';
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_source_id ON public.ingestion_jobs(source_id);
+
+DROP TRIGGER IF EXISTS trigger_ingestion_jobs_updated_at ON public.ingestion_jobs;
+CREATE TRIGGER trigger_ingestion_jobs_updated_at
+    BEFORE UPDATE ON public.ingestion_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.handle_updated_at();
+
+-- Managed by service role only (no user policies)
+ALTER TABLE public.ingestion_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Queue jobs from [{source_id, bot_id, kind}]; returns the number of jobs added
+CREATE OR REPLACE FUNCTION public.enqueue_ingestion_jobs(
+    payload JSONB,
+    attempts_allowed INTEGER DEFAULT 3
+)
+RETURNS INTEGER AS $$
+DECLARE
+    inserted_count INTEGER;
+BEGIN
+    INSERT INTO public.ingestion_jobs (source_id, bot_id, kind, max_attempts)
+    SELECT
+        (item->>'source_id')::UUID,
+        (item->>'bot_id')::UUID,
+        COALESCE(item->>'kind', 'parse'),
+        GREATEST(attempts_allowed, 1)
+    FROM jsonb_array_elements(payload) AS item
+    ON CONFLICT (source_id, kind) WHERE status = 'queued' DO NOTHING;
+    
+    GET DIAGNOSTICS inserted_count = ROW_COUNT;
+    RETURN inserted_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Claim up to `max_jobs` ready jobs for `worker` (oldest first); returns the claimed rows
+CREATE OR REPLACE FUNCTION public.claim_ingestion_jobs(
+    worker TEXT,
+    max_jobs INTEGER DEFAULT 1,
+    lease_seconds INTEGER DEFAULT 600
+)
+RETURNS SETOF public.ingestion_jobs AS $$
+BEGIN
+    -- Lapsed jobs with no attempts left fail, and so do the sources they were parsing
+    WITH exhausted AS (
+        UPDATE public.ingestion_jobs j
+        SET status = 'failed',
+            last_error = 'Worker stopped before the job finished',
+            locked_by = NULL,
+            locked_at = NULL,
+            finished_at = NOW()
+        WHERE j.status = 'running'
+        AND j.locked_at < NOW() - make_interval(secs => lease_seconds)
+        AND j.attempts >= j.max_attempts
+        RETURNING j.source_id, j.kind
+    )
+    UPDATE public.sources s
+    SET status = 'failed', error_message = 'Ingestion worker stopped before finishing'
+    FROM exhausted e
+    WHERE s.id = e.source_id AND e.kind = 'parse' AND s.status = 'parsing';
+    
+    RETURN QUERY
+    UPDATE public.ingestion_jobs j
+    SET status = 'running',
+        attempts = j.attempts + 1,
+        locked_by = worker,
+        locked_at = NOW()
+    WHERE j.id IN (
+        SELECT c.id FROM public.ingestion_jobs c
+        WHERE (c.status = 'queued' AND c.run_after <= NOW())
+        OR (c.status = 'running' AND c.locked_at < NOW() - make_interval(secs => lease_seconds))
+        ORDER BY c.run_after
+        LIMIT GREATEST(max_jobs, 1)
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Extend the lease of jobs `worker` is running; returns the number renewed.
+-- Leases are timed by the database clock only, so workers' clocks can't skew them.
+CREATE OR REPLACE FUNCTION public.renew_ingestion_job_leases(
+    worker TEXT,
+    job_ids UUID[]
+)
+RETURNS INTEGER AS $$
+DECLARE
+    renewed_count INTEGER;
+BEGIN
+    UPDATE public.ingestion_jobs j
+    SET locked_at = NOW()
+    WHERE j.id = ANY(job_ids)
+    AND j.locked_by = worker
+    AND j.status = 'running';
+    
+    GET DIAGNOSTICS renewed_count = ROW_COUNT;
+    RETURN renewed_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Put a job `worker` holds back in the queue, to run again `delay_seconds` from now;
+-- returns false if the worker no longer holds it
+CREATE OR REPLACE FUNCTION public.retry_ingestion_job(
+    job_id UUID,
+    worker TEXT,
+    error_message TEXT,
+    delay_seconds DOUBLE PRECISION DEFAULT 0
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE public.ingestion_jobs j
+    SET status = 'queued',
+        locked_by = NULL,
+        locked_at = NULL,
+        last_error = error_message,
+        run_after = NOW() + make_interval(secs => GREATEST(delay_seconds, 0))
+    WHERE j.id = job_id
+    AND j.locked_by = worker;
+    
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Finish a job `worker` holds as succeeded or failed; returns false if the worker
+-- no longer holds it. finished_at comes from the database clock, which is what
+-- the API polls it against.
+CREATE OR REPLACE FUNCTION public.complete_ingestion_job(
+    job_id UUID,
+    worker TEXT,
+    succeeded BOOLEAN DEFAULT TRUE,
+    error_message TEXT DEFAULT NULL
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE public.ingestion_jobs j
+    SET status = CASE WHEN succeeded THEN 'succeeded' ELSE 'failed' END,
+        locked_by = NULL,
+        locked_at = NULL,
+        last_error = CASE WHEN succeeded THEN NULL ELSE error_message END,
+        finished_at = NOW()
+    WHERE j.id = job_id
+    AND j.locked_by = worker;
+    
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT ALL ON public.ingestion_jobs TO service_role;
+GRANT EXECUTE ON FUNCTION public.enqueue_ingestion_jobs(JSONB, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.claim_ingestion_jobs(TEXT, INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.renew_ingestion_job_leases(TEXT, UUID[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.retry_ingestion_job(UUID, TEXT, TEXT, DOUBLE PRECISION) TO service_role;
+GRANT EXECUTE ON FUNCTION public.complete_ingestion_job(UUID, TEXT, BOOLEAN, TEXT) TO service_role;
+
 -- =====================================================
 -- SCRIPT COMPLETION
 -- =====================================================
@@ -863,11 +1253,11 @@ DO $$
 BEGIN
     RAISE NOTICE 'Convot database schema setup completed successfully!';
     RAISE NOTICE 'Features included:';
-    RAISE NOTICE '- 7 core tables (bots, sources, chunks, queries, prompt_updates, widget_tokens, rate_limits)';
+    RAISE NOTICE '- 10 core tables (bots, sources, chunks, queries, prompt_updates, widget_tokens, rate_limits, bot_daily_usage, embedding_cache, ingestion_jobs)';
     RAISE NOTICE '- pgvector extension for embeddings with HNSW index';
     RAISE NOTICE '- Row Level Security (RLS) policies for data isolation';
     RAISE NOTICE '- Comprehensive indexes for performance';
-    RAISE NOTICE '- Helper functions for analytics and vector search';
+    RAISE NOTICE '- Helper functions for analytics, vector search and bulk embedding writes';
     RAISE NOTICE '- Analytics views for dashboard';
     RAISE NOTICE '- Automatic timestamp triggers';
     RAISE NOTICE '- Data validation constraints';